@@ -14,20 +14,80 @@ Company: Axes Systems GmbH | Option B: Rule-Based Geometry Validation
 Version: 7.0.0
 """
 
-import streamlit as st
-import pandas as pd
+from __future__ import annotations
+
 import numpy as np
-import folium
 import json
+import importlib
+import importlib.util
 from datetime import datetime
-from streamlit_folium import st_folium
-from shapely import wkt
+import shapely
 from shapely.geometry import Point, LineString
 import re
-from collections import defaultdict
-from typing import List, Dict, Tuple, Optional
-from sklearn.ensemble import IsolationForest
-from sklearn.preprocessing import StandardScaler
+import io
+import os
+import sys
+import bz2
+import gzip
+import lzma
+import time
+import csv
+import zipfile
+import sqlite3
+import shutil
+import tempfile
+import hashlib
+import argparse
+import subprocess
+import threading
+import contextvars
+import functools
+from collections import defaultdict, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait as futures_wait
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict, Tuple, Optional, Iterable, Iterator, BinaryIO, Union, Callable, NamedTuple
+
+
+class _LazyModule:
+    """
+    Stand-in for a heavy dependency that imports it on first attribute
+    access, so ``import app`` and the welcome screen don't pay for pandas or
+    folium until a dataset is actually analysed or drawn.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr: str):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+def _deferred_st(decorator: str, **options) -> Callable:
+    """
+    ``@st.<decorator>(**options)``, applied when the function is first called
+    so that module-level UI helpers don't import Streamlit for headless runs.
+    """
+    def wrap(fn: Callable) -> Callable:
+        applied = None
+
+        @functools.wraps(fn)
+        def call(*args, **kwargs):
+            nonlocal applied
+            if applied is None:
+                applied = getattr(st, decorator)(**options)(fn) if options else getattr(st, decorator)(fn)
+            return applied(*args, **kwargs)
+        return call
+    return wrap
+
+
+st = _LazyModule('streamlit')
+pd = _LazyModule('pandas')
+folium = _LazyModule('folium')
+streamlit_folium = _LazyModule('streamlit_folium')
 
 # =============================================================================
 # CONFIGURATION
@@ -42,65 +102,47 @@ APP_CONFIG = {
     "members": ["Puranjay Gambhir", "Akshobhya Rao", "Rohan Kumar"],
     "error_type": "ENDPOINT_GAP",
     "error_label": "Route Continuity Gap",
+    # Metrics are off unless a batch run asks for them or this env var is set
+    "metrics_env": "GAPDETECTOR_METRICS",
+    "metrics_port_env": "GAPDETECTOR_METRICS_PORT",
+    # WKT inputs above this size (MB on disk) run out-of-core from memory-mapped arrays
+    "ooc_threshold_mb": 1024,
+    "ooc_threshold_env": "GAPDETECTOR_OOC_THRESHOLD_MB",
+    "ooc_memory_mb": 512,
+    # Background analyses: shared worker threads, queue limit, and how long a
+    # rerun waits before switching to the polling progress view
+    "job_workers": 2,
+    "job_max_pending": 8,
+    "job_grace_seconds": 1.5,
+    # Approximate memory held by cached pipeline artifacts, shared by all sessions
+    "pipeline_cache_mb": 512,
+    # Cold `import app` budget checked by `python app.py bench-import`
+    "import_budget_ms": 400,
 }
 
 # =============================================================================
-# DEMO DATA — Problem 2 streets_xgen.wkt (56 LINESTRINGs)
-# =============================================================================
-DEMO_WKT_DATA = """LINESTRING(7071.421606 8585.627528, 7074.672945 8588.813669, 7074.902551 8589.026835, 7075.084535 8589.196346, 7079.265638 8592.884220, 7081.745726 8594.906230, 7087.160750 8598.968277, 7091.114457 8601.621165, 7097.122261 8605.189984, 7104.911244 8609.486740, 7105.304126 8609.703307, 7105.767874 8609.959559, 7144.536643 8631.196101, 7154.035087 8636.400567, 7154.349676 8636.571269, 7154.424397 8636.611861, 7163.899654 8641.749543, 7194.100989 8658.211975, 7204.788850 8664.037795, 7217.453480 8671.075087, 7225.937575 8676.277228, 7229.984882 8679.124346, 7234.367017 8682.488447, 7238.456504 8685.821480, 7243.451150 8690.254299, 7247.565354 8694.303307, 7251.962457 8699.059843, 7255.123087 8702.735811, 7259.170961 8707.866520, 7262.826576 8713.000630, 7262.874709 8713.070759, 7263.406488 8713.854425, 7268.192504 8721.195591, 7269.545140 8723.350488)
-LINESTRING(7228.943036 8691.704220, 7230.263868 8692.301820)
-LINESTRING(7230.130016 8690.909669, 7236.635528 8693.947843, 7238.203087 8694.558992, 7246.566879 8698.129852)
-LINESTRING(7233.052082 8685.026022, 7233.114331 8684.900731)
-LINESTRING(7235.343383 8681.162627, 7235.951754 8680.340183)
-LINESTRING(7233.114331 8684.900731, 7234.209751 8682.695150, 7234.367017 8682.488447, 7234.542142 8682.245745, 7235.343383 8681.162627)
-LINESTRING(7230.130016 8690.909669, 7233.052082 8685.026022)
-LINESTRING(7255.510243 8699.099074, 7250.881096 8693.964737, 7245.560806 8688.592006, 7239.691219 8683.390375, 7235.951754 8680.340183)
-LINESTRING(7219.235906 8686.145197, 7230.130016 8690.909669)
-LINESTRING(7171.129701 8650.784296, 7172.734677 8650.679301, 7173.495099 8650.929033, 7174.214079 8651.165216, 7192.126998 8660.929323, 7197.898450 8664.075326)
-LINESTRING(7150.309569 8645.723660, 7151.809323 8646.372283, 7152.455452 8646.687836)
-LINESTRING(7178.488951 8636.167899, 7179.095849 8636.294381)
-LINESTRING(7235.951754 8680.340183, 7235.062809 8679.661965, 7231.893165 8677.230009, 7226.680365 8673.607106, 7220.970935 8670.106261, 7215.024189 8666.676907, 7210.789172 8664.323641, 7203.506230 8660.303943, 7191.076082 8653.528460, 7187.602110 8651.634803, 7183.533657 8649.417090, 7179.077877 8646.988365, 7173.680598 8644.046343)
-LINESTRING(7173.680598 8644.046343, 7178.431691 8637.105203, 7179.218646 8635.065449)
-LINESTRING(7152.922545 8639.584441, 7153.182312 8638.969380)
-LINESTRING(7152.922545 8639.584441, 7153.400580 8639.845512, 7155.481039 8640.973587, 7159.220787 8643.001380, 7165.913783 8646.640781, 7168.378110 8647.984063, 7170.192680 8648.973184, 7170.323414 8649.225921, 7170.529550 8649.624302, 7171.129701 8650.784296)
-LINESTRING(7149.314835 8641.775055, 7151.010860 8642.887597, 7150.309569 8645.723660)
-LINESTRING(7159.331735 8627.200894, 7160.009443 8627.429027, 7160.622293 8627.964718)
-LINESTRING(7160.622293 8627.964718, 7161.134457 8628.255496, 7161.850828 8628.826280, 7163.425814 8629.276309, 7164.344580 8629.632567, 7165.696139 8630.103005, 7169.024466 8631.261468, 7171.403754 8632.280239, 7173.416693 8633.310123, 7174.659005 8634.026778, 7175.660031 8634.604195, 7177.199414 8635.492233, 7178.007798 8635.958532, 7178.488951 8636.167899)
-LINESTRING(7160.535723 8626.610494, 7160.009443 8627.429027, 7159.280315 8628.578646, 7155.343729 8634.079106)
-LINESTRING(7155.846879 8634.352252, 7154.349676 8636.571269, 7153.182312 8638.969380)
-LINESTRING(7155.343729 8634.079106, 7156.744044 8634.838564, 7157.181770 8635.075880, 7158.321865 8635.694060, 7164.473783 8639.029814, 7171.316220 8642.757487, 7173.680598 8644.046343)
-LINESTRING(7155.846879 8634.352252, 7155.343729 8634.079106)
-LINESTRING(7160.535723 8626.610494, 7163.093197 8627.735509, 7169.459698 8630.137304, 7172.826746 8631.579005, 7178.738627 8634.989310, 7179.218646 8635.065449)
-LINESTRING(7152.922545 8639.584441, 7146.890306 8636.283666, 7136.488517 8630.585235, 7134.319162 8629.396894, 7124.383899 8624.969065, 7123.323969 8624.777953, 7121.539899 8624.753065, 7118.794885 8624.141065, 7118.036787 8624.066457, 7117.057928 8624.132050, 7116.004913 8624.447093)
-LINESTRING(7116.004913 8624.447093, 7112.647899 8624.312050, 7111.216913 8624.249065, 7107.446608 8624.105802, 7101.497594 8623.934816, 7098.702406 8624.024447)
-LINESTRING(7097.387528 8625.209953, 7096.202759 8628.525808, 7096.091868 8628.836088, 7094.616094 8632.063616, 7094.575502 8632.152454, 7094.528787 8632.254614, 7094.032838 8633.339263, 7097.047370 8635.481575)
-LINESTRING(7098.702406 8624.024447, 7099.318488 8623.211528)
-LINESTRING(7097.387528 8625.209953, 7098.702406 8624.024447)
-LINESTRING(7089.693165 8635.350614, 7093.515969 8630.246551, 7097.387528 8625.209953)
-LINESTRING(7104.226620 8612.107370, 7104.311093 8611.937461)
-LINESTRING(7099.318488 8623.211528, 7104.226620 8612.107370)
-LINESTRING(7097.887446 8624.084598, 7083.675950 8619.934734, 7065.840416 8611.314803)
-LINESTRING(7065.840416 8611.314803, 7065.689216 8610.036491, 7065.330009 8608.768101)
-LINESTRING(7065.849090 8609.703591, 7066.134992 8610.118299, 7083.707584 8618.672806, 7085.072580 8619.137802, 7099.318488 8623.211528)
-LINESTRING(7065.849090 8609.703591, 7065.689216 8610.036491, 7065.592441 8610.237921)
-LINESTRING(7115.152479 8607.998154, 7118.572479 8608.358154, 7119.388517 8608.574154, 7124.440479 8611.886154, 7128.544535 8614.742117, 7129.348498 8615.426117, 7136.590847 8621.963206, 7137.610186 8622.521575, 7138.110047 8622.795345, 7155.354331 8626.387465, 7159.331735 8627.200894)
-LINESTRING(7155.343729 8634.079106, 7154.315490 8633.515861, 7153.494236 8633.065890, 7144.602803 8628.194211, 7134.657279 8622.746306, 7128.239131 8619.230608, 7122.178772 8615.910898, 7116.403011 8612.747093, 7112.053701 8610.364630, 7108.643225 8608.496485, 7106.827238 8606.270154)
-LINESTRING(7106.625298 8606.725342, 7106.827238 8606.270154)
-LINESTRING(7106.625298 8606.725342, 7105.304126 8609.703307, 7104.311093 8611.937461)
-LINESTRING(7106.827238 8606.270154, 7109.809455 8599.548132, 7110.782362 8597.356157)
-LINESTRING(7079.423924 8595.277739, 7078.770085 8595.916724, 7076.599654 8596.376220)
-LINESTRING(7076.599654 8596.376220, 7073.598444 8593.672479)
-LINESTRING(7073.598444 8593.672479, 7072.557335 8594.218658, 7071.476598 8594.855376)
-LINESTRING(7102.205405 8610.012227, 7095.419206 8606.216466, 7089.858992 8602.878217, 7084.575269 8599.029789, 7079.423924 8595.277739)
-LINESTRING(7074.076422 8591.860120, 7073.526784 8591.375282)
-LINESTRING(7072.623950 8594.066154, 7072.557335 8594.218658, 7065.849090 8609.703591)
-LINESTRING(7073.526784 8591.375282, 7074.141449 8590.748598, 7074.097682 8590.508277)
-LINESTRING(7104.226620 8612.107370, 7097.580850 8608.486054, 7094.466028 8606.711339, 7090.380907 8604.284655, 7087.550343 8602.438507, 7083.294236 8599.398803, 7081.232315 8597.852050, 7078.770085 8595.916724, 7074.076422 8591.860120)
-LINESTRING(7072.623950 8594.066154, 7073.270646 8592.708359, 7074.076422 8591.860120)
-LINESTRING(7076.039187 8586.425254, 7076.445109 8585.496170)
-LINESTRING(7073.644989 8591.195792, 7074.097682 8590.508277, 7074.902551 8589.026835, 7076.039187 8586.425254)
-LINESTRING(7076.445109 8585.496170, 7078.460542 8580.883238)
-LINESTRING(7078.460542 8580.883238, 7088.449323 8586.079937, 7107.773102 8595.942917, 7107.972548 8596.047402, 7110.782362 8597.356157)"""
+# DEMO DATA — Problem 2 streets_xgen.wkt (56 LINESTRINGs, under demo_files/)
+# =============================================================================
+DEMO_WKT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'demo_files', 'streets_xgen.wkt')
+
+
+def demo_wkt() -> str:
+    """The demo network's WKT, read on first use rather than at import."""
+    global _DEMO_WKT
+    if _DEMO_WKT is None:
+        with open(DEMO_WKT_PATH, encoding='utf-8') as fh:
+            _DEMO_WKT = fh.read()
+    return _DEMO_WKT
+
+
+_DEMO_WKT: Optional[str] = None
+
+
+def __getattr__(name: str):
+    # DEMO_WKT_DATA used to be embedded in this module; keep it importable
+    if name == 'DEMO_WKT_DATA':
+        return demo_wkt()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # =============================================================================
 # ERROR EXAMPLES — for training & demonstration
@@ -133,6 +175,15 @@ LINESTRING(500.6 500.4, 520 510, 540 520)
 LINESTRING(360 430, 365 415, 370 400)
 LINESTRING(370.3 400.15, 375 385, 380 370)"""
 
+# Built-in examples; with the demo network they are parsed and analysed once
+# per server process, on first use (see _builtin_datasets)
+BUILTIN_EXAMPLES = {
+    'correct': EXAMPLE_CORRECT,
+    'error1': EXAMPLE_ERROR_1,
+    'error2': EXAMPLE_ERROR_2,
+    'error3': EXAMPLE_ERROR_3,
+}
+
 
 # =============================================================================
 # CUSTOM CSS — GLASSMORPHISM + DM SANS
@@ -494,82 +545,456 @@ CUSTOM_CSS = """
 """
 
 
+# =============================================================================
+# CORE ENGINE — Pipeline DAG & Detector Registry
+# =============================================================================
+
+class PipelineNode(NamedTuple):
+    fn: Callable
+    inputs: Union[Tuple[str, ...], Callable[[Dict], Tuple[str, ...]]]
+    params: Tuple[str, ...]
+
+
+# name -> node; ``lines`` is the source every other node derives from
+PIPELINE_NODES: Dict[str, PipelineNode] = {}
+
+PIPELINE_DEFAULTS = {
+    'precision': APP_CONFIG['precision'],
+    'contamination': 0.15,
+    'cluster_snap': True,
+    'drop_duplicates': False,  # leave duplicate copies out of gap detection
+    'detectors': None,  # None = every registered detector
+}
+
+
+def pipeline_node(name: str, inputs=(), params: Iterable[str] = ()):
+    """Register ``fn(*input_values, **param_values)`` as DAG node ``name``."""
+    def register(fn: Callable) -> Callable:
+        PIPELINE_NODES[name] = PipelineNode(fn, inputs, tuple(params))
+        return fn
+    return register
+
+
+class PipelineContext:
+    """
+    Evaluates pipeline DAG nodes for one network. A node's key hashes its name,
+    its parameters and its inputs' keys (``lines`` is keyed by content), so a
+    changed parameter recomputes only the nodes downstream of it — the rest
+    come from ``PIPELINE_CACHE``. Within one context each node runs at most once.
+    """
+
+    def __init__(self, lines: List[LineString], params: Optional[Dict] = None,
+                 metrics: Optional['MetricsRegistry'] = None, cache: Optional['ResultCache'] = None):
+        self.lines = lines
+        self.params = dict(PIPELINE_DEFAULTS, **(params or {}))
+        if self.params['detectors'] is None:
+            self.params['detectors'] = tuple(DETECTORS)
+        self.params['detectors'] = tuple(self.params['detectors'])
+        self.metrics = metrics if metrics is not None else METRICS
+        self.cache = cache
+        self._values: Dict[str, object] = {'lines': lines}
+        self._keys: Dict[str, str] = {}
+
+    def inputs(self, name: str) -> Tuple[str, ...]:
+        inputs = PIPELINE_NODES[name].inputs
+        return tuple(inputs(self.params) if callable(inputs) else inputs)
+
+    def key(self, name: str) -> str:
+        if name not in self._keys:
+            if name == 'lines':
+                self._keys[name] = network_fingerprint(self.lines)
+            else:
+                h = hashlib.blake2b(name.encode(), digest_size=16)
+                for dep in self.inputs(name):
+                    h.update(self.key(dep).encode())
+                h.update(repr([(p, self.params.get(p)) for p in PIPELINE_NODES[name].params]).encode())
+                self._keys[name] = h.hexdigest()
+        return self._keys[name]
+
+    def _cache(self) -> 'ResultCache':
+        return self.cache if self.cache is not None else PIPELINE_CACHE
+
+    def get(self, name: str):
+        if name not in self._values:
+            self._values[name] = self._cache().get_or_compute((name, self.key(name)), lambda: self._compute(name))
+        return self._values[name]
+
+    def plan(self, targets: Iterable[str]) -> List[str]:
+        """Nodes that evaluating ``targets`` will actually compute (not cached), inputs first."""
+        order: List[str] = []
+        seen = set()
+
+        def visit(name):
+            if name in seen or name in self._values or (name, self.key(name)) in self._cache():
+                return
+            seen.add(name)
+            for dep in self.inputs(name):
+                visit(dep)
+            order.append(name)
+        for target in targets:
+            visit(target)
+        return order
+
+    def _compute(self, name: str):
+        node = PIPELINE_NODES[name]
+        args = [self.get(dep) for dep in self.inputs(name)]
+        report_progress(name)
+        with self.metrics.time(name):
+            value = node.fn(*args, **{p: self.params.get(p) for p in node.params})
+        report_progress(name, 1.0, value)
+        return value
+
+
+class Detector:
+    """
+    Base for pluggable checks. ``requires`` names the pipeline nodes whose
+    values are passed positionally to ``run()`` (``detect()`` by default);
+    constructor kwargs come from the ``<name>_params`` pipeline parameter.
+    """
+
+    name: str = ''
+    requires: Tuple[str, ...] = ()
+    label: str = ''
+
+    def run(self, *artifacts) -> List[Dict]:
+        return self.detect(*artifacts)
+
+    def detect(self, *artifacts) -> List[Dict]:
+        raise NotImplementedError
+
+
+DETECTORS: Dict[str, type] = {}
+
+
+def register_detector(cls: type) -> type:
+    """Class decorator adding a ``Detector`` subclass to the registry and the DAG."""
+    DETECTORS[cls.name] = cls
+    param = f'{cls.name}_params'
+    pipeline_node(f'detect_{cls.name}', cls.requires, (param,))(
+        lambda *artifacts, **kw: cls(**(kw[param] or {})).run(*artifacts))
+    return cls
+
+
+def run_detectors(ctx: PipelineContext, names: Optional[Iterable[str]] = None) -> List[Dict]:
+    """Issues from the named detectors (the context's enabled set by default)."""
+    names = ctx.params['detectors'] if names is None else names
+    return [issue for name in names for issue in ctx.get(f'detect_{name}')]
+
+
+# =============================================================================
+# CORE ENGINE — Streaming Statistics (mergeable one-pass accumulators)
+# =============================================================================
+
+class QuantileSketch:
+    """
+    KLL-style mergeable quantile sketch. Values enter level 0; a full level is
+    sorted and every other item (random offset) moves up a level with double
+    weight. Rank error is about 1/k, memory O(k log n); while nothing has been
+    compacted the sketch is exact and ``quantile`` matches ``np.percentile``.
+    """
+
+    def __init__(self, k: int = 256, seed: int = 0):
+        self.k = k
+        self.n = 0
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level: int) -> int:
+        return max(2, int(np.ceil(self.k * (2 / 3) ** (len(self.levels) - 1 - level))))
+
+    def update(self, values) -> 'QuantileSketch':
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        self.n += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            if len(self.levels[level]) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(self.levels[level])
+                # An odd item out stays behind so total weight is preserved
+                held, items = (items[:1], items[1:]) if len(items) % 2 else (items[:0], items)
+                self.levels[level] = held
+                self.levels[level + 1] = np.concatenate(
+                    [self.levels[level + 1], items[self._rng.integers(2)::2]])
+            level += 1
+
+    def merge(self, other: 'QuantileSketch') -> 'QuantileSketch':
+        self.k = min(self.k, other.k)
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    @property
+    def exact(self) -> bool:
+        return all(len(items) == 0 for items in self.levels[1:])
+
+    def quantile(self, q: float) -> float:
+        if self.n == 0:
+            return float('nan')
+        if self.exact:
+            return float(np.quantile(self.levels[0], q))
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(v), 2 ** h, dtype=np.float64) for h, v in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        cum = np.cumsum(weights[order])
+        return float(items[order][min(np.searchsorted(cum, q * cum[-1]), len(cum) - 1)])
+
+
+class NetworkStats:
+    """
+    Network summary built from mergeable one-pass accumulators — count, sum,
+    min/max and a quantile sketch of segment lengths plus an endpoint-degree
+    histogram. Feed line batches and per-node degrees as they stream in;
+    partial results from tiles or worker processes combine with ``merge``.
+    Node degrees must come from disjoint node sets (e.g. hash partitions).
+    """
+
+    def __init__(self, k: int = 256):
+        self.segments = 0
+        self.total_length = 0.0
+        self.min_length = float('inf')
+        self.max_length = float('-inf')
+        self.length_sketch = QuantileSketch(k)
+        self.degree_hist = np.zeros(0, dtype=np.int64)
+
+    def add_lines(self, lines) -> 'NetworkStats':
+        return self.add_lengths(shapely.length(np.asarray(lines, dtype=object)))
+
+    def add_lengths(self, lengths: np.ndarray) -> 'NetworkStats':
+        lengths = np.asarray(lengths, dtype=np.float64)
+        if len(lengths):
+            self.segments += len(lengths)
+            self.total_length += float(lengths.sum())
+            self.min_length = min(self.min_length, float(lengths.min()))
+            self.max_length = max(self.max_length, float(lengths.max()))
+            self.length_sketch.update(lengths)
+        return self
+
+    def add_degrees(self, node_degree: np.ndarray) -> 'NetworkStats':
+        self._add_hist(np.bincount(np.asarray(node_degree, dtype=np.int64)))
+        return self
+
+    def _add_hist(self, hist: np.ndarray):
+        size = max(len(self.degree_hist), len(hist))
+        merged = np.zeros(size, dtype=np.int64)
+        merged[:len(self.degree_hist)] += self.degree_hist
+        merged[:len(hist)] += hist
+        self.degree_hist = merged
+
+    def merge(self, other: 'NetworkStats') -> 'NetworkStats':
+        self.segments += other.segments
+        self.total_length += other.total_length
+        self.min_length = min(self.min_length, other.min_length)
+        self.max_length = max(self.max_length, other.max_length)
+        self.length_sketch.merge(other.length_sketch)
+        self._add_hist(other.degree_hist)
+        return self
+
+    def summary(self) -> Dict:
+        """The ``compute_stats`` dict, plus median length and the degree histogram."""
+        if self.segments == 0:
+            raise ValueError("No segments accumulated")
+        return {
+            'total_segments': self.segments,
+            'total_length': round(self.total_length, 2),
+            'avg_length': round(self.total_length / self.segments, 2),
+            'min_length': round(self.min_length, 4),
+            'max_length': round(self.max_length, 2),
+            'median_length': round(self.length_sketch.quantile(0.5), 4),
+            'total_endpoints': int(self.degree_hist.sum()),
+            'connected_nodes': int(self.degree_hist[2:].sum()),
+            'dangling_nodes': int(self.degree_hist[1:2].sum()),
+            'degree_histogram': {d: int(c) for d, c in enumerate(self.degree_hist) if c},
+        }
+
+
 # =============================================================================
 # CORE ENGINE — Feature Extraction
 # =============================================================================
 
+# Column types of the feature table. Ids, counts and degrees are narrow
+# integers and ML-only values float32; coordinates, lengths and gaps stay
+# float64 because the rules compare them at the input's precision.
+FEATURE_DTYPES = {
+    'geometry_id': np.int32,
+    'length': np.float64,
+    'n_vertices': np.int32,
+    'vertex_density': np.float32,
+    'start_x': np.float64, 'start_y': np.float64,
+    'end_x': np.float64, 'end_y': np.float64,
+    'start_degree': np.int16,
+    'end_degree': np.int16,
+    'connectivity_score': np.float64,
+    'min_gap_start': np.float64,
+    'min_gap_end': np.float64,
+    'nearest_seg_start': np.int32,
+    'nearest_seg_end': np.int32,
+    'ml_anomaly': np.int8,
+    'ml_score': np.float32,
+}
+
+
+def feature_frame(columns: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """
+    Feature table in ``FEATURE_DTYPES``. Each column is cast at most once
+    (not at all when it already has its type); an integer column whose values
+    would not fit is widened instead of wrapping.
+    """
+    cast = {}
+    for name, values in columns.items():
+        values = np.asarray(values)
+        dtype = np.dtype(FEATURE_DTYPES.get(name, values.dtype))
+        if dtype.kind == 'i' and values.dtype.kind in 'iu' and len(values):
+            info = np.iinfo(dtype)
+            if values.min() < info.min or values.max() > info.max:
+                dtype = np.dtype(np.int64)
+        cast[name] = values.astype(dtype, copy=False)
+    return pd.DataFrame(cast, copy=False)
+
+
 class FeatureExtractor:
-    """Extract per-segment features focused on endpoint connectivity."""
+    """
+    Extract per-segment features focused on endpoint connectivity. Degrees
+    and geometry columns are cheap; the nearest-other-line gap columns are
+    the expensive part, so ``extract_all`` can measure them for dangling
+    endpoints only and ``complete`` fills in the rest when a consumer needs
+    every endpoint. Lines marked in ``exclude`` (e.g. duplicate copies) keep
+    their rows but neither add to other lines' degrees nor serve as gap targets.
+    """
 
-    def __init__(self, lines: List[LineString], precision: int = 6):
+    def __init__(self, lines: List[LineString], precision: int = 6,
+                 tree: Optional[shapely.STRtree] = None, segments: Optional['SegmentArrays'] = None,
+                 exclude: Optional[np.ndarray] = None):
         self.lines = lines
         self.precision = precision
+        self.tree = tree
+        self.segments = segments
+        self.exclude = exclude if exclude is not None and exclude.any() else None
         self._endpoint_map: Dict[Tuple, List[int]] = defaultdict(list)
-        self._build_endpoint_map()
 
     def _round(self, pt: Tuple) -> Tuple:
         return (round(pt[0], self.precision), round(pt[1], self.precision))
 
     def _build_endpoint_map(self):
-        for idx, line in enumerate(self.lines):
-            coords = list(line.coords)
-            self._endpoint_map[self._round(coords[0])].append(idx)
-            self._endpoint_map[self._round(coords[-1])].append(idx)
-
-    def extract_all(self) -> pd.DataFrame:
-        rows = []
-        for idx, line in enumerate(self.lines):
-            coords = list(line.coords)
-            length = line.length
-            n_vertices = len(coords)
-            vertex_density = n_vertices / length if length > 0 else 0
-            start = self._round(coords[0])
-            end = self._round(coords[-1])
-            start_degree = len(self._endpoint_map[start])
-            end_degree = len(self._endpoint_map[end])
-
-            # Nearest distance from each endpoint to any OTHER line
-            start_pt, end_pt = Point(start), Point(end)
-            min_dist_start = float('inf')
-            min_dist_end = float('inf')
-            nearest_seg_start = -1
-            nearest_seg_end = -1
-            for j, other in enumerate(self.lines):
-                if j == idx:
-                    continue
-                d_s = start_pt.distance(other)
-                d_e = end_pt.distance(other)
-                if d_s < min_dist_start:
-                    min_dist_start = d_s
-                    nearest_seg_start = j + 1
-                if d_e < min_dist_end:
-                    min_dist_end = d_e
-                    nearest_seg_end = j + 1
-            connectivity_score = min(min_dist_start, min_dist_end)
-
-            rows.append({
-                'geometry_id': idx + 1,
-                'length': round(length, 4),
-                'n_vertices': n_vertices,
-                'vertex_density': round(vertex_density, 6),
-                'start_x': start[0], 'start_y': start[1],
-                'end_x': end[0], 'end_y': end[1],
-                'start_degree': start_degree,
-                'end_degree': end_degree,
-                'connectivity_score': round(connectivity_score, 4),
-                'min_gap_start': round(min_dist_start, 4),
-                'min_gap_end': round(min_dist_end, 4),
-                'nearest_seg_start': nearest_seg_start,
-                'nearest_seg_end': nearest_seg_end,
-            })
-        return pd.DataFrame(rows)
+        starts, ends = line_endpoints(self.lines)
+        # Python floats, so rounding matches the built-in round() on coordinates
+        self._ends = [(self._round(s), self._round(e)) for s, e in zip(starts.tolist(), ends.tolist())]
+        for idx, (start, end) in enumerate(self._ends):
+            if self.exclude is not None and self.exclude[idx]:
+                continue
+            self._endpoint_map[start].append(idx)
+            self._endpoint_map[end].append(idx)
+
+    def _candidates(self, tree: shapely.STRtree) -> Callable:
+        candidates = strtree_candidates(tree)
+        if self.exclude is None:
+            return candidates
+
+        def kept(xy: np.ndarray, radius: float) -> Tuple[np.ndarray, np.ndarray]:
+            pt_idx, line_idx = candidates(xy, radius)
+            keep = ~self.exclude[line_idx]
+            return pt_idx[keep], line_idx[keep]
+        return kept
+
+    def _measure_gaps(self, xy: np.ndarray, measure: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Nearest distance from the ``measure``-ed endpoints (start, end
+        interleaved) to any OTHER line, and that line's id; NaN and -1 elsewhere.
+        """
+        n = len(self.lines)
+        min_gap, nearest_seg = np.full(2 * n, np.nan), np.full(2 * n, -1, dtype=np.int64)
+        which = np.flatnonzero(measure)
+        if len(which) == 0:
+            return min_gap, nearest_seg
+        geoms = np.asarray(self.lines, dtype=object)
+        tree = self.tree if self.tree is not None else shapely.STRtree(geoms)
+        segments = self.segments if self.segments is not None else SegmentArrays(geoms)
+        # Most endpoints touch a neighbour or sit within a fraction of a
+        # segment of one; the rest widen their search on their own
+        radius = float(np.median(segments.length)) / 4 if len(segments.length) else 0.0
+        dist, line, _, _ = nearest_other_line(segments, self._candidates(tree), xy[which], which // 2, radius)
+        min_gap[which] = dist
+        nearest_seg[which] = np.where(line >= 0, line + 1, -1)
+        return min_gap, nearest_seg
+
+    @staticmethod
+    def _gap_columns(min_gap: np.ndarray, nearest_seg: np.ndarray) -> Dict[str, np.ndarray]:
+        min_gap, nearest_seg = min_gap.reshape(-1, 2), nearest_seg.reshape(-1, 2)
+        return {
+            # NaN when either endpoint is unmeasured
+            'connectivity_score': np.round(min_gap.min(axis=1), 4),
+            'min_gap_start': np.round(min_gap[:, 0], 4),
+            'min_gap_end': np.round(min_gap[:, 1], 4),
+            'nearest_seg_start': nearest_seg[:, 0],
+            'nearest_seg_end': nearest_seg[:, 1],
+        }
+
+    def extract_all(self, endpoints: str = 'all') -> pd.DataFrame:
+        """
+        Feature table. With ``endpoints='dangling'`` gaps are measured only at
+        degree-1 endpoints — all that gap detection reads — and are NaN
+        (nearest segment -1) at connected ones.
+        """
+        self._build_endpoint_map()
+        n = len(self.lines)
+        geoms = np.asarray(self.lines, dtype=object)
+        length = shapely.length(geoms) if n else np.empty(0)
+        n_vertices = shapely.get_num_coordinates(geoms)
+        xy = np.asarray(self._ends, dtype=np.float64).reshape(n, 4)
+        degree = np.asarray([(len(self._endpoint_map[s]), len(self._endpoint_map[e])) for s, e in self._ends],
+                            dtype=np.int32).reshape(n, 2)
+        if self.exclude is not None:
+            # An excluded line still meets itself at its own endpoints
+            degree += self.exclude[:, None]
+        measure = degree.ravel() == 1 if endpoints == 'dangling' else np.ones(2 * n, dtype=bool)
+        min_gap, nearest_seg = self._measure_gaps(xy.reshape(2 * n, 2), measure)
+
+        vertex_density = np.divide(n_vertices, length, out=np.zeros(n), where=length > 0)
+        return feature_frame({
+            'geometry_id': np.arange(1, n + 1),
+            'length': np.round(length, 4),
+            'n_vertices': n_vertices,
+            'vertex_density': np.round(vertex_density, 6),
+            'start_x': xy[:, 0], 'start_y': xy[:, 1],
+            'end_x': xy[:, 2], 'end_y': xy[:, 3],
+            'start_degree': degree[:, 0],
+            'end_degree': degree[:, 1],
+            **self._gap_columns(min_gap, nearest_seg),
+        })
+
+    def complete(self, features: pd.DataFrame) -> pd.DataFrame:
+        """``features`` with every unmeasured endpoint gap filled in; measured ones are kept."""
+        gaps = features[['min_gap_start', 'min_gap_end']].to_numpy().ravel()
+        measure = np.isnan(gaps)
+        if not measure.any():
+            return features
+        xy = features[['start_x', 'start_y', 'end_x', 'end_y']].to_numpy().reshape(-1, 2)
+        min_gap, nearest_seg = self._measure_gaps(xy, measure)
+        # Kept values are already rounded; rounding them again is a no-op
+        min_gap[~measure] = gaps[~measure]
+        nearest_seg[~measure] = features[['nearest_seg_start', 'nearest_seg_end']].to_numpy().ravel()[~measure]
+        complete = features.copy(deep=False)
+        for name, values in feature_frame(self._gap_columns(min_gap, nearest_seg)).items():
+            complete[name] = values
+        return complete
 
 
 # =============================================================================
 # CORE ENGINE — Gap Detector (ONE error type: endpoint gaps)
 # =============================================================================
 
-class GapDetector:
+@register_detector
+class GapDetector(Detector):
     """
     Detects the ONE error type: route continuity gaps.
     A gap exists when a dangling endpoint (degree == 1) is near but not
@@ -578,29 +1003,60 @@ class GapDetector:
     All thresholds derived from the dataset itself (no hardcoded values).
     """
 
-    def detect(self, features: pd.DataFrame) -> List[Dict]:
-        issues: List[Dict] = []
+    name = 'endpoint_gap'
+    requires = ('gap_features', 'gap_threshold')
+    label = 'Endpoint gaps'
+    gap_threshold: Optional[float] = None
 
+    def adaptive_threshold(self, features: pd.DataFrame) -> float:
         # Compute adaptive gap threshold using TWO signals:
         # 1. Data-driven: 75th percentile of dangling endpoint gaps (captures most gaps)
         # 2. Scale-aware: cap at 15% of average segment length (prevents dead-end FPs)
         # The minimum of both ensures near-miss gaps are caught without
         # flagging legitimate dead-end road terminals.
+        # The percentile comes from a mergeable sketch, so chunked or tiled runs
+        # can combine per-chunk sketches into one global threshold.
+        avg_length = float(features['length'].mean()) if len(features) > 0 else 0
+        return self.threshold_from_sketch(self.gap_sketch(features), avg_length)
+
+    # Exact up to this many gaps (matches np.percentile); beyond it the
+    # sketch's rank error is about 2/k
+    sketch_k = 1024
+
+    @classmethod
+    def gap_sketch(cls, features: pd.DataFrame) -> QuantileSketch:
+        """Sketch of the positive, finite dangling-endpoint gaps in a feature table (or chunk)."""
         dangling_start_gaps = features.loc[features['start_degree'] == 1, 'min_gap_start']
         dangling_end_gaps = features.loc[features['end_degree'] == 1, 'min_gap_end']
-        all_dangling_gaps = pd.concat([dangling_start_gaps, dangling_end_gaps])
-        positive_gaps = all_dangling_gaps[(all_dangling_gaps > 0) & np.isfinite(all_dangling_gaps)]
+        return cls.sketch_gaps(pd.concat([dangling_start_gaps, dangling_end_gaps]).to_numpy())
 
-        avg_length = float(features['length'].mean()) if len(features) > 0 else 0
-        scale_threshold = avg_length * 0.15 if avg_length > 0 else 5.0
+    @classmethod
+    def sketch_gaps(cls, dangling_gaps: np.ndarray, sketch: Optional[QuantileSketch] = None) -> QuantileSketch:
+        sketch = sketch if sketch is not None else QuantileSketch(cls.sketch_k)
+        return sketch.update(dangling_gaps[(dangling_gaps > 0) & np.isfinite(dangling_gaps)])
+
+    @staticmethod
+    def scale_threshold(avg_length: float) -> float:
+        return avg_length * 0.15 if avg_length > 0 else 5.0
+
+    @classmethod
+    def threshold_from_sketch(cls, sketch: QuantileSketch, avg_length: float) -> float:
+        scale_threshold = cls.scale_threshold(avg_length)
 
-        if len(positive_gaps) >= 4:
-            data_threshold = float(np.percentile(positive_gaps, 75))
+        if sketch.n >= 4:
+            data_threshold = sketch.quantile(0.75)
             gap_threshold = min(data_threshold, scale_threshold)
-        elif len(positive_gaps) >= 1:
+        elif sketch.n >= 1:
             gap_threshold = scale_threshold
         else:
             gap_threshold = scale_threshold
+        return gap_threshold
+
+    def detect(self, features: pd.DataFrame, gap_threshold: Optional[float] = None) -> List[Dict]:
+        issues: List[Dict] = []
+        if gap_threshold is None:
+            gap_threshold = self.adaptive_threshold(features)
+        self.gap_threshold = gap_threshold
 
         for _, row in features.iterrows():
             gid = int(row['geometry_id'])
@@ -650,31 +1106,91 @@ class GapDetector:
         return issues
 
 
+# =============================================================================
+# CORE ENGINE — Short Segment Detector
+# =============================================================================
+
+@register_detector
+class ShortSegmentDetector(Detector):
+    """
+    Flags sliver segments far shorter than the network's typical segment —
+    usually digitizing leftovers that collapse into a point once snapped.
+    """
+
+    name = 'short_segment'
+    requires = ('gap_features',)
+    label = 'Short segments'
+
+    def __init__(self, min_length_ratio: float = 0.02):
+        self.min_length_ratio = min_length_ratio
+
+    def detect(self, features: pd.DataFrame) -> List[Dict]:
+        if len(features) < 2:
+            return []
+        limit = float(features['length'].median()) * self.min_length_ratio
+        issues: List[Dict] = []
+        for row in features[features['length'] < limit].itertuples(index=False):
+            issues.append({
+                'geometry_id': int(row.geometry_id),
+                'error_type': 'SHORT_SEGMENT',
+                'endpoint': 'segment',
+                'description': (
+                    f"Segment #{row.geometry_id} is only {row.length:.4f} units long, under "
+                    f"{self.min_length_ratio:.0%} of the median segment ({limit:.4f}). "
+                    f"Likely a digitizing sliver."
+                ),
+                'gap_distance': float(row.length),
+                'location': ((row.start_x + row.end_x) / 2, (row.start_y + row.end_y) / 2),
+                'start': (row.start_x, row.start_y),
+                'end': (row.end_x, row.end_y),
+                'confidence': max(0.4, 1 - row.length / limit),
+                'source': 'rule',
+            })
+        return issues
+
+
 # =============================================================================
 # CORE ENGINE — ML Anomaly Detection (Isolation Forest)
 # =============================================================================
 
-class AnomalyDetector:
+@register_detector
+class AnomalyDetector(Detector):
     """Isolation Forest to flag segments with anomalous connectivity — supports gap detection."""
 
+    name = 'ml_anomaly'
+    requires = ('ml_scores',)
+    label = 'ML anomalies'
+
+    FEATURE_COLUMNS = ('length', 'n_vertices', 'vertex_density', 'connectivity_score',
+                       'start_degree', 'end_degree', 'min_gap_start', 'min_gap_end')
+
     def __init__(self, contamination: float = 0.15):
+        # scikit-learn is the slowest import here; load it with the first model
+        from sklearn.preprocessing import StandardScaler
         self.contamination = contamination
-        self.scaler = StandardScaler()
+        # Scales the freshly built matrix in place (see model_matrix)
+        self.scaler = StandardScaler(copy=False)
+
+    def model_matrix(self, features: pd.DataFrame) -> np.ndarray:
+        """Model inputs as one float64 array, written column by column with no intermediate frames."""
+        X = np.empty((len(features), len(self.FEATURE_COLUMNS)))
+        for j, col in enumerate(self.FEATURE_COLUMNS):
+            X[:, j] = features[col].to_numpy()
+        np.copyto(X, 999999.0, where=np.isinf(X))
+        return X
 
     def detect(self, features: pd.DataFrame) -> Tuple[pd.DataFrame, List[Dict]]:
-        features = features.copy()
+        from sklearn.ensemble import IsolationForest
+        # New columns only: the shallow copy shares the input's data, which stays untouched
+        features = features.copy(deep=False)
 
         # Guard: need enough samples for meaningful anomaly detection
         if len(features) < 5:
-            features['ml_anomaly'] = 0
-            features['ml_score'] = 0.0
+            features['ml_anomaly'] = np.zeros(len(features), dtype=FEATURE_DTYPES['ml_anomaly'])
+            features['ml_score'] = np.zeros(len(features), dtype=FEATURE_DTYPES['ml_score'])
             return features, []
 
-        feat_cols = ['length', 'n_vertices', 'vertex_density', 'connectivity_score',
-                     'start_degree', 'end_degree', 'min_gap_start', 'min_gap_end']
-        X = features[feat_cols].copy()
-        X = X.replace([np.inf, -np.inf], 999999)
-        X_scaled = self.scaler.fit_transform(X.values)
+        X_scaled = self.scaler.fit_transform(self.model_matrix(features))
 
         # Adjust contamination if dataset is small — avoid flagging too many
         if len(features) < 20:
@@ -684,35 +1200,48 @@ class AnomalyDetector:
             effective_contamination = self.contamination
         model = IsolationForest(contamination=effective_contamination, n_estimators=100, random_state=42)
         preds = model.fit_predict(X_scaled)
-        scores = model.decision_function(X_scaled)
-
-        features['ml_anomaly'] = (preds == -1).astype(int)
-        features['ml_score'] = np.round(-scores, 4)
-
+        ml_score = np.round(-model.decision_function(X_scaled), 4)
+        del X_scaled
+
+        anomaly = preds == -1
+        features['ml_anomaly'] = anomaly.astype(FEATURE_DTYPES['ml_anomaly'])
+        features['ml_score'] = ml_score.astype(FEATURE_DTYPES['ml_score'])
+
+        # Issue fields come from the float64 scores and the frame's own columns
+        flagged = np.flatnonzero(anomaly)
+        gid = features['geometry_id'].to_numpy()
+        gap_start, gap_end = features['min_gap_start'].to_numpy(), features['min_gap_end'].to_numpy()
+        conn = features['connectivity_score'].to_numpy()
+        sx, sy = features['start_x'].to_numpy(), features['start_y'].to_numpy()
+        ex, ey = features['end_x'].to_numpy(), features['end_y'].to_numpy()
         issues: List[Dict] = []
-        for _, row in features[features['ml_anomaly'] == 1].iterrows():
+        for k in flagged:
             # Use the max of endpoint gaps (the more problematic endpoint)
-            gap_dist = float(max(row['min_gap_start'], row['min_gap_end']))
+            gap_dist = float(max(gap_start[k], gap_end[k]))
             if np.isinf(gap_dist):
-                gap_dist = float(row['connectivity_score']) if np.isfinite(row['connectivity_score']) else 0.0
+                gap_dist = float(conn[k]) if np.isfinite(conn[k]) else 0.0
+            score = ml_score[k]
             issues.append({
-                'geometry_id': int(row['geometry_id']),
+                'geometry_id': int(gid[k]),
                 'error_type': 'ENDPOINT_GAP',
                 'endpoint': 'ml_flagged',
                 'description': (
-                    f"ML model flagged segment #{int(row['geometry_id'])} as having "
-                    f"anomalous connectivity (score: {row['ml_score']:.4f}). "
+                    f"ML model flagged segment #{int(gid[k])} as having "
+                    f"anomalous connectivity (score: {score:.4f}). "
                     f"Potential hidden gap or unusual endpoint pattern."
                 ),
                 'gap_distance': gap_dist,
-                'location': (row['start_x'], row['start_y']),
-                'start': (row['start_x'], row['start_y']),
-                'end': (row['end_x'], row['end_y']),
-                'confidence': min(1.0, float(row['ml_score']) / 0.5) if row['ml_score'] > 0 else 0.3,
+                'location': (sx[k], sy[k]),
+                'start': (sx[k], sy[k]),
+                'end': (ex[k], ey[k]),
+                'confidence': min(1.0, float(score) / 0.5) if score > 0 else 0.3,
                 'source': 'ml',
             })
         return features, issues
 
+    def run(self, ml_scores: Tuple[pd.DataFrame, List[Dict]]) -> List[Dict]:
+        return ml_scores[1]
+
 
 # =============================================================================
 # CORE ENGINE — Decision Logic
@@ -721,178 +1250,2153 @@ class AnomalyDetector:
 class DecisionEngine:
     @staticmethod
     def combine(rule_issues: List[Dict], ml_issues: List[Dict]) -> List[Dict]:
-        """Merge, deduplicate, boost confidence for double-flagged."""
+        """Merge, deduplicate, boost confidence for gaps flagged by both rule and ML."""
         by_id: Dict[int, List[Dict]] = defaultdict(list)
         for issue in rule_issues + ml_issues:
             by_id[issue['geometry_id']].append(issue)
 
-        final: List[Dict] = []
-        seen_keys = set()
+        final: List[Dict] = []
+        seen_keys = set()
+
+        for gid, items in by_id.items():
+            # Only an endpoint gap is what the ML model corroborates
+            gaps = [i for i in items if i['error_type'] == 'ENDPOINT_GAP']
+            sources = set(i['source'] for i in gaps)
+            both = 'rule' in sources and 'ml' in sources
+            for item in items:
+                key = (item['geometry_id'], item.get('endpoint', ''))
+                if key in seen_keys:
+                    continue
+                seen_keys.add(key)
+                entry = dict(item)
+                if both and entry['error_type'] == 'ENDPOINT_GAP':
+                    entry['confidence'] = min(1.0, entry.get('confidence', 0.5) * 1.3)
+                    entry['confirmed_by'] = 'rule+ml'
+                else:
+                    entry['confirmed_by'] = entry['source']
+                c = entry['confidence']
+                entry['severity'] = 'HIGH' if c >= 0.7 else ('MEDIUM' if c >= 0.4 else 'LOW')
+                final.append(entry)
+
+        final.sort(key=lambda x: -x['confidence'])
+        return final
+
+
+# =============================================================================
+# CORE ENGINE — Auto-Fix Suggestions
+# =============================================================================
+
+class AutoFixer:
+    """Suggest snapping coordinates to fix endpoint gaps."""
+
+    def __init__(self, lines: List[LineString], precision: int = 6):
+        self.lines = lines
+        self.precision = precision
+
+    def suggest_fixes(self, issues: List[Dict]) -> List[Dict]:
+        # Overshoots are cut back to the crossing they run past
+        trims = [self._trim_fix(i['geometry_id'], i['endpoint'], self._key(i['location']),
+                                self._key(i['trim_to']), i['gap_to_segment'], i['gap_distance'])
+                 for i in issues if i.get('error_type') == 'OVERSHOOT']
+        # Only endpoint gaps can be snapped (not ML flags or whole subnetworks)
+        snappable = [i for i in issues
+                     if i.get('endpoint') in ('start', 'end') and i.get('error_type') != 'OVERSHOOT'
+                     and i['geometry_id'] - 1 < len(self.lines)]
+        if not snappable:
+            return trims
+        n = len(self.lines)
+        gid = np.asarray([i['geometry_id'] - 1 for i in snappable])
+        starts, ends = line_endpoints(np.asarray(self.lines, dtype=object)[gid])
+        is_start = np.asarray([i['endpoint'] == 'start' for i in snappable])
+        xy = np.where(is_start[:, None], starts, ends)
+
+        # Rule issues already name their nearest segment — project onto it
+        # only; the rest consider every other line, one issue at a time
+        hint = np.asarray([i.get('gap_to_segment') or 0 for i in snappable]) - 1
+        hinted = (hint >= 0) & (hint < n) & (hint != gid)
+        segments = SegmentArrays(self.lines)
+        batches = [(np.flatnonzero(hinted), hint[hinted])]
+        batches += [(np.full(n - 1, k), np.delete(np.arange(n), gid[k])) for k in np.flatnonzero(~hinted)]
+        snaps = {}
+        for pt_idx, line_idx in batches:
+            _, seg, factor = segments.nearest(xy, pt_idx, line_idx)
+            foot = segments.foot_points(line_idx, seg, factor)
+            delta = foot - xy[pt_idx]
+            dist = np.sqrt(delta[:, 0] * delta[:, 0] + delta[:, 1] * delta[:, 1])
+            # A line the endpoint already touches is no snap target
+            moving = np.flatnonzero(dist > 0)
+            for b in moving[first_min(pt_idx[moving], dist[moving], line_idx[moving])]:
+                snaps[int(pt_idx[b])] = (int(line_idx[b]), foot[b].tolist(), float(dist[b]))
+
+        suggestions = []
+        for k in sorted(snaps):
+            j, (fx, fy), d = snaps[k]
+            issue = snappable[k]
+            best_snap = (round(fx, self.precision), round(fy, self.precision))
+            suggestions.append(self._snap_fix(issue['geometry_id'], issue['endpoint'],
+                                              self._key(xy[k]), best_snap, j + 1, d))
+        return trims + suggestions
+
+    def suggest_batch_fixes(self, issues: List[Dict], gap_threshold: float) -> List[Dict]:
+        """
+        Cluster-aware fixes: reported endpoint gaps that lie close together
+        share one node; the remaining flagged endpoints fall back to
+        nearest-line snapping. Endpoints no check reported (T-junctions with
+        gap 0, or gaps when the gap check is off) and overshoot ends, which
+        are trimmed instead, never join a cluster.
+        """
+        n = len(self.lines)
+        trimmed = {(i['geometry_id'], i['endpoint']) for i in issues if i.get('error_type') == 'OVERSHOOT'}
+        flagged = np.zeros(2 * n, dtype=bool)
+        for i in issues:
+            key = (i['geometry_id'], i.get('endpoint'))
+            if (i['error_type'] == 'ENDPOINT_GAP' and key[1] in ('start', 'end') and i.get('gap_distance', 0) > 0
+                    and 0 < key[0] <= n and key not in trimmed):
+                flagged[key[0] - 1 + n * (key[1] == 'end')] = True
+        cluster_fixes = ClusterSnapper(self.lines, self.precision).suggest_fixes(gap_threshold, flagged)
+        clustered = {(f['geometry_id'], f['endpoint']) for f in cluster_fixes}
+        rest = [i for i in issues if (i['geometry_id'], i.get('endpoint')) not in clustered]
+        return cluster_fixes + self.suggest_fixes(rest)
+
+    @staticmethod
+    def _snap_fix(geometry_id: int, endpoint: str, original: Tuple, snap: Tuple,
+                  target: int, dist: float) -> Dict:
+        return {
+            'geometry_id': geometry_id,
+            'fix_type': 'SNAP_ENDPOINT',
+            'endpoint': endpoint,
+            'original_coord': original,
+            'suggested_coord': snap,
+            'snap_to_segment': target,
+            'distance': round(dist, 4),
+            'description': (
+                f"Snap {endpoint} endpoint from "
+                f"({original[0]}, {original[1]}) → ({snap[0]}, {snap[1]}) "
+                f"to close {dist:.4f}-unit gap"
+            ),
+        }
+
+    @staticmethod
+    def _trim_fix(geometry_id: int, endpoint: str, original: Tuple, cut: Tuple,
+                  target: int, tail: float) -> Dict:
+        """Same shape as a snap; ``apply_fixes`` also drops the tail's inner vertices."""
+        return {
+            'geometry_id': geometry_id,
+            'fix_type': 'TRIM_ENDPOINT',
+            'endpoint': endpoint,
+            'original_coord': original,
+            'suggested_coord': cut,
+            'snap_to_segment': target,
+            'distance': round(tail, 4),
+            'description': (
+                f"Trim {endpoint} endpoint from "
+                f"({original[0]}, {original[1]}) back to ({cut[0]}, {cut[1]}) "
+                f"on segment #{target}, removing a {tail:.4f}-unit overshoot"
+            ),
+        }
+
+    # -------------------------------------------------------------------------
+    # Apply & verify — converge without re-running the full pipeline
+    # -------------------------------------------------------------------------
+
+    def _key(self, xy) -> Tuple:
+        return (round(float(xy[0]), self.precision), round(float(xy[1]), self.precision))
+
+    def _dangling_gaps(self, lines: List[LineString], tree, ids: np.ndarray,
+                       degree: Dict[Tuple, int], radius: float, tol: float) -> List[Dict]:
+        """
+        Nearest-other-line gap for every dangling endpoint of ``ids``. Candidates
+        come from ``tree`` (built on the original geometry); ``radius`` already
+        includes the maximum distance any line has moved since.
+        """
+        if len(ids) == 0:
+            return []
+        starts, ends = line_endpoints(np.asarray(lines, dtype=object)[ids])
+        owner, which, xy = [], [], []
+        for k, gid in enumerate(ids):
+            for endpoint, pt in (('start', starts[k]), ('end', ends[k])):
+                if degree.get(self._key(pt), 0) == 1:
+                    owner.append(gid)
+                    which.append(endpoint)
+                    xy.append(pt)
+        if not xy:
+            return []
+        owner = np.asarray(owner)
+        points = shapely.points(np.asarray(xy))
+        pt_idx, line_idx = tree.query(points, predicate='dwithin', distance=radius)
+        other = line_idx != owner[pt_idx]
+        pt_idx, line_idx = pt_idx[other], line_idx[other]
+        dist = shapely.distance(points[pt_idx], np.asarray(lines, dtype=object)[line_idx])
+        closed = dist <= tol
+        # Within tolerance of any other line means the endpoint is connected
+        connected = np.zeros(len(points), dtype=bool)
+        connected[pt_idx[closed]] = True
+        # Nearest candidate per point: sort by (point, distance, line id) and take the first
+        order = np.lexsort((line_idx, dist, pt_idx))
+        pt_idx, line_idx, dist = pt_idx[order], line_idx[order], dist[order]
+        first = np.unique(pt_idx, return_index=True)[1]
+        gaps = []
+        for p, j, d in zip(pt_idx[first], line_idx[first], dist[first]):
+            if connected[p]:
+                continue
+            gaps.append({'index': int(owner[p]), 'endpoint': which[p], 'point': points[p],
+                         'distance': float(d), 'target': int(j)})
+        return gaps
+
+    def apply_and_verify(self, issues: List[Dict], gap_threshold: float,
+                         max_iterations: int = 5, fixes: Optional[List[Dict]] = None) -> Dict:
+        """
+        Apply the suggested snaps, then re-check only the modified endpoints and
+        their spatial neighbours: degrees are updated incrementally and gaps are
+        re-measured through an STRtree. Remaining or newly created gaps get new
+        snaps and the loop repeats until none are left or ``max_iterations``.
+
+        Starts from ``fixes`` when given (e.g. cluster-aware ones), otherwise
+        from ``suggest_fixes(issues)``. Returns the corrected lines, every
+        applied fix and a per-round trace.
+        """
+        tol = 10.0 ** -self.precision
+        lines = list(self.lines)
+        tree = shapely.STRtree(lines)
+        starts, ends = line_endpoints(lines)
+        degree: Dict[Tuple, int] = defaultdict(int)
+        for pt in np.concatenate([starts, ends]):
+            degree[self._key(pt)] += 1
+
+        fixes = self.suggest_fixes(issues) if fixes is None else list(fixes)
+        applied: List[Dict] = []
+        trace: List[Dict] = []
+        drift = 0.0
+        for iteration in range(1, max_iterations + 1):
+            if not fixes:
+                break
+            # Conflicting snaps — several fixes for one endpoint, or two lines
+            # snapping onto each other at different points (they would just
+            # swap places; cluster snaps to one shared node are fine). Keep
+            # the first; issues arrive sorted by confidence.
+            seen, pairs, round_fixes = set(), {}, []
+            for f in fixes:
+                key = (f['geometry_id'], f['endpoint'])
+                mutual = pairs.get((f['snap_to_segment'], f['geometry_id']))
+                if key in seen or (mutual is not None and mutual != tuple(f['suggested_coord'])):
+                    continue
+                seen.add(key)
+                pairs[(f['geometry_id'], f['snap_to_segment'])] = tuple(f['suggested_coord'])
+                round_fixes.append(f)
+            conflicts = len(fixes) - len(round_fixes)
+
+            before: Dict[Tuple, int] = {}
+            for f in round_fixes:
+                for key in (self._key(f['original_coord']), self._key(f['suggested_coord'])):
+                    before.setdefault(key, degree[key])
+                degree[self._key(f['original_coord'])] -= 1
+                degree[self._key(f['suggested_coord'])] += 1
+            lines = apply_fixes(lines, round_fixes)
+            applied.extend(round_fixes)
+            drift += max(f['distance'] for f in round_fixes) + 10.0 ** -4
+
+            moved = np.asarray([f['original_coord'] for f in round_fixes]
+                               + [f['suggested_coord'] for f in round_fixes], dtype=float)
+            near = tree.query(shapely.points(moved), predicate='dwithin', distance=gap_threshold + drift)[1]
+            touched = np.asarray([f['geometry_id'] - 1 for f in round_fixes])
+            affected = np.unique(np.concatenate([near, touched]))
+
+            gaps = self._dangling_gaps(lines, tree, affected, degree, gap_threshold + drift, tol)
+            remaining = [g for g in gaps if g['distance'] < gap_threshold]
+            new_dangles = sum(1 for key, was in before.items() if was > 1 and degree[key] == 1)
+            trace.append({
+                'iteration': iteration,
+                'fixes_applied': len(round_fixes),
+                'conflicting_snaps': conflicts,
+                'endpoints_rechecked': 2 * len(affected),
+                'new_dangles': new_dangles,
+                'remaining_gaps': len(remaining),
+            })
+
+            # Follow-up snaps prefer the target's end node when it is within
+            # reach: projecting onto a line whose own end was just snapped
+            # here would leave a fresh tail and chase it round after round
+            fixes = []
+            for g in remaining:
+                target = lines[g['target']]
+                ends = shapely.points(np.asarray([target.coords[0], target.coords[-1]]))
+                end_dist = shapely.distance(g['point'], ends)
+                if end_dist.min() < gap_threshold:
+                    nearest = ends[int(np.argmin(end_dist))]
+                else:
+                    nearest = target.interpolate(target.project(g['point']))
+                snap = (round(nearest.x, self.precision), round(nearest.y, self.precision))
+                original = self._key((g['point'].x, g['point'].y))
+                if snap != original:
+                    fixes.append(self._snap_fix(g['index'] + 1, g['endpoint'], original, snap,
+                                                g['target'] + 1, g['distance']))
+
+        return {'lines': lines, 'fixes': applied, 'trace': trace, 'converged': not fixes}
+
+
+# =============================================================================
+# CORE ENGINE — Vectorized Endpoint Helpers
+# =============================================================================
+
+def line_endpoints(lines) -> Tuple[np.ndarray, np.ndarray]:
+    """(start_xy, end_xy) arrays for a list/array of lines, from one flat coordinate buffer."""
+    geoms = np.asarray(lines, dtype=object)
+    coords = shapely.get_coordinates(geoms)
+    offsets = np.concatenate(([0], np.cumsum(shapely.get_num_coordinates(geoms))))
+    return coords[offsets[:-1]], coords[offsets[1:] - 1]
+
+
+def endpoint_nodes(xy: np.ndarray, precision: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Merge endpoints that coincide after rounding into nodes with one lexsort —
+    the array form of ``FeatureExtractor._build_endpoint_map``.
+    Returns (node_xy, node id per endpoint, degree per node).
+    """
+    r = np.round(xy, precision)
+    if len(r) == 0:
+        return r, np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    order = np.lexsort((r[:, 1], r[:, 0]))
+    ordered = r[order]
+    is_new = np.ones(len(r), dtype=bool)
+    is_new[1:] = (ordered[1:] != ordered[:-1]).any(axis=1)
+    sorted_ids = np.cumsum(is_new) - 1
+    inverse = np.empty(len(r), dtype=np.int64)
+    inverse[order] = sorted_ids
+    return ordered[is_new], inverse, np.bincount(sorted_ids)
+
+
+# =============================================================================
+# CORE ENGINE — Point-to-Segment Distance Kernel
+# =============================================================================
+
+class SegmentArrays:
+    """
+    Every line exploded into flat segment arrays — start ``p0``, end ``p1``,
+    ``length`` and the along-line ``measure`` at each segment start — so that
+    distances and foot points for a whole batch of candidate (point, line)
+    pairs are a few NumPy passes. The arithmetic follows GEOS operation for
+    operation (``Distance::pointToSegment``, then the ``LengthIndexedLine``
+    project/interpolate walk), so results equal ``shapely.distance`` and
+    ``line_interpolate_point(line_locate_point(...))`` bit for bit.
+    """
+
+    def __init__(self, lines):
+        geoms = np.asarray(lines, dtype=object)
+        coords = shapely.get_coordinates(geoms)
+        n_coords = shapely.get_num_coordinates(geoms)
+        self.count = np.maximum(n_coords - 1, 0)
+        self.first = np.concatenate(([0], np.cumsum(self.count)[:-1])).astype(np.int64)
+        line = np.repeat(np.arange(len(geoms)), self.count)
+        pos = np.arange(len(line)) - self.first[line]
+        vertex = np.concatenate(([0], np.cumsum(n_coords)[:-1]))[line] + pos
+        self.p0, self.p1 = coords[vertex], coords[vertex + 1]
+        d = self.p1 - self.p0
+        self.length = np.sqrt(d[:, 0] * d[:, 0] + d[:, 1] * d[:, 1])
+        # Summed segment by segment within each line, in GEOS's order; lines
+        # sorted by segment count so step k touches only lines that long
+        self.measure = np.zeros(len(line))
+        by_count = np.argsort(-self.count, kind='stable')
+        longer = np.searchsorted(-self.count[by_count], -np.arange(1, self.count.max(initial=0)), side='left')
+        for k, n_lines in enumerate(longer, start=1):
+            seg = self.first[by_count[:n_lines]] + k
+            self.measure[seg] = self.measure[seg - 1] + self.length[seg - 1]
+
+    def _point_segment(self, xy: np.ndarray, seg: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Distance from each point to its segment and the projection factor on it."""
+        a, b = self.p0[seg], self.p1[seg]
+        dx, dy = b[:, 0] - a[:, 0], b[:, 1] - a[:, 1]
+        ax, ay = xy[:, 0] - a[:, 0], xy[:, 1] - a[:, 1]
+        bx, by = xy[:, 0] - b[:, 0], xy[:, 1] - b[:, 1]
+        len2 = dx * dx + dy * dy
+        with np.errstate(divide='ignore', invalid='ignore'):
+            r = (ax * dx + ay * dy) / len2
+            s = ((a[:, 1] - xy[:, 1]) * dx - (a[:, 0] - xy[:, 0]) * dy) / len2
+        dist = np.abs(s) * np.sqrt(len2)
+        to_b = r >= 1
+        dist[to_b] = np.sqrt(bx * bx + by * by)[to_b]
+        # Zero-length segments have r = NaN and measure from their start too
+        to_a = (r <= 0) | ((dx == 0) & (dy == 0))
+        dist[to_a] = np.sqrt(ax * ax + ay * ay)[to_a]
+        return dist, r
+
+    def nearest(self, xy: np.ndarray, pt_idx: np.ndarray, line_idx: np.ndarray,
+                batch: int = 1 << 20) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Distance from ``xy[pt_idx]`` to line ``line_idx`` for every candidate
+        pair, with the nearest segment (the first of equals, as in GEOS) and
+        the projection factor on it. Pairs are expanded to segments ``batch``
+        at a time.
+        """
+        k = len(pt_idx)
+        dist, seg, factor = np.empty(k), np.empty(k, dtype=np.int64), np.empty(k)
+        n_seg = self.count[line_idx]
+        ends = np.cumsum(n_seg)
+        start = 0
+        while start < k:
+            stop = max(start + 1, int(np.searchsorted(ends, ends[start] - n_seg[start] + batch, side='right')))
+            counts = n_seg[start:stop]
+            offsets = np.cumsum(counts) - counts
+            pair = np.repeat(np.arange(stop - start), counts)
+            s = self.first[line_idx[start:stop]][pair] + np.arange(len(pair)) - offsets[pair]
+            d, r = self._point_segment(xy[pt_idx[start:stop]][pair], s)
+            low = np.minimum.reduceat(d, offsets)
+            hit = np.flatnonzero(d == low[pair])
+            best = hit[np.unique(pair[hit], return_index=True)[1]]
+            dist[start:stop], seg[start:stop], factor[start:stop] = low, s[best], r[best]
+            start = stop
+        return dist, seg, factor
+
+    def foot_points(self, line_idx: np.ndarray, seg: np.ndarray, factor: np.ndarray) -> np.ndarray:
+        """Closest point on each line, from ``nearest``'s segment and factor."""
+        base, length = self.measure[seg], self.length[seg]
+        measure = np.where(factor <= 1, base + factor * length, base + length)
+        measure = np.where(factor <= 0, base, measure)
+        # Walk forward to the segment that holds the measure, as interpolate does
+        last = self.first[line_idx] + self.count[line_idx] - 1
+        seg = np.where(measure <= 0, self.first[line_idx], seg)
+        while True:
+            step = (self.measure[seg] + self.length[seg] <= measure) & (seg < last) & (measure > 0)
+            if not step.any():
+                break
+            seg = seg + step
+        past_end = (self.measure[seg] + self.length[seg] <= measure) & (measure > 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            frac = (measure - self.measure[seg]) / self.length[seg]
+        a, b = self.p0[seg], self.p1[seg]
+        foot = (b - a) * frac[:, None] + a
+        at_a, at_b = (frac <= 0) | (measure <= 0), (frac >= 1) | past_end
+        foot[at_a], foot[at_b] = a[at_a], b[at_b]
+        return foot
+
+
+def first_min(group: np.ndarray, value: np.ndarray, tie: np.ndarray) -> np.ndarray:
+    """Index of the smallest ``value`` in each ``group``, ties to the lowest ``tie``; one per group present."""
+    if len(group) == 0:
+        return np.empty(0, dtype=np.int64)
+    low = np.full(int(group.max()) + 1, np.inf)
+    np.minimum.at(low, group, value)
+    at_low = np.flatnonzero(value == low[group])
+    first = np.full(len(low), np.iinfo(np.int64).max)
+    np.minimum.at(first, group[at_low], tie[at_low])
+    at_low = at_low[tie[at_low] == first[group[at_low]]]
+    return at_low[np.unique(group[at_low], return_index=True)[1]]
+
+
+def nearest_other_line(segments: SegmentArrays, candidates: Callable, xy: np.ndarray,
+                       owner: np.ndarray, radius: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Nearest line other than ``owner`` for each point: (distance, line index
+    or -1, segment, projection factor). ``candidates(xy, r)`` returns
+    (point, line) index pairs that include every line within ``r`` — an
+    STRtree envelope query, a grid, anything; extra pairs are fine. A point
+    is settled once its nearest candidate lies within ``r``; the rest retry at
+    4× the radius until it spans the whole network. Ties go to the lowest
+    line index.
+    """
+    n = len(xy)
+    dist, line = np.full(n, np.inf), np.full(n, -1, dtype=np.int64)
+    seg, factor = np.zeros(n, dtype=np.int64), np.zeros(n)
+    if n == 0 or len(segments.p0) == 0:
+        return dist, line, seg, factor
+    lo = np.minimum(np.minimum(segments.p0, segments.p1).min(axis=0), xy.min(axis=0))
+    hi = np.maximum(np.maximum(segments.p0, segments.p1).max(axis=0), xy.max(axis=0))
+    span = float(np.hypot(*(hi - lo)))
+    pending = np.arange(n)
+    radius = max(radius, span * 1e-9, 1e-12)
+    while len(pending):
+        pt_idx, line_idx = candidates(xy[pending], radius)
+        pt_idx = pending[pt_idx]
+        other = line_idx != owner[pt_idx]
+        pt_idx, line_idx = pt_idx[other], line_idx[other]
+        d, s, r = segments.nearest(xy, pt_idx, line_idx)
+        best = first_min(pt_idx, d, line_idx)
+        if radius < span:
+            best = best[d[best] <= radius]
+        found = pt_idx[best]
+        dist[found], line[found], seg[found], factor[found] = d[best], line_idx[best], s[best], r[best]
+        if radius >= span:
+            break
+        pending = np.setdiff1d(pending, found, assume_unique=True)
+        radius *= 4
+    return dist, line, seg, factor
+
+
+def strtree_candidates(tree: shapely.STRtree) -> Callable:
+    """
+    ``nearest_other_line`` candidates from an STRtree of the lines: envelopes
+    meeting a box of ±radius around each point. No exact predicate — the
+    kernel measures every pair anyway.
+    """
+    def candidates(xy: np.ndarray, radius: float) -> Tuple[np.ndarray, np.ndarray]:
+        return tree.query(shapely.box(xy[:, 0] - radius, xy[:, 1] - radius, xy[:, 0] + radius, xy[:, 1] + radius))
+    return candidates
+
+
+# =============================================================================
+# CORE ENGINE — Cluster-Aware Batch Snapping
+# =============================================================================
+
+def union_find(n: int, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Vectorized union-find over edges (a[i], b[i]): roots are hooked under the
+    smaller root, then flattened by pointer jumping. Returns each element's
+    root. Rounds are logarithmic in practice, each one a few array passes.
+    """
+    parent = np.arange(n)
+    while len(a):
+        ra, rb = parent[a], parent[b]
+        differ = ra != rb
+        if not differ.any():
+            break
+        lo, hi = np.minimum(ra[differ], rb[differ]), np.maximum(ra[differ], rb[differ])
+        np.minimum.at(parent, hi, lo)
+        while True:
+            nxt = parent[parent]
+            if np.array_equal(nxt, parent):
+                break
+            parent = nxt
+    return parent
+
+
+class ClusterSnapper:
+    """
+    Snap groups of nearby dangling endpoints to ONE shared node instead of
+    snapping each to whatever line happens to be nearest. Pairs within the gap
+    threshold come from a KD-tree pair query, clusters from union-find. A
+    cluster snaps to an existing junction (degree >= 2) within reach of its
+    centroid, otherwise to the centroid itself. Only endpoints marked in
+    ``flagged`` (starts, then ends) take part, and no member moves further
+    than the gap threshold — chained clusters can be wider than that.
+    """
+
+    def __init__(self, lines: List[LineString], precision: int = 6):
+        self.lines = lines
+        self.precision = precision
+
+    def _endpoints(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        starts, ends = line_endpoints(self.lines)
+        n = len(starts)
+        return np.concatenate([starts, ends]), np.tile(np.arange(n), 2), np.repeat([True, False], n)
+
+    def find_clusters(self, gap_threshold: float, flagged: Optional[np.ndarray] = None) -> Dict:
+        from scipy.spatial import cKDTree
+
+        xy, owner, at_start = self._endpoints()
+        nodes, inverse, counts = endpoint_nodes(xy, self.precision)
+        dangling = counts[inverse] == 1
+        dangling = np.flatnonzero(dangling if flagged is None else dangling & flagged)
+        empty = {'members': dangling[:0], 'labels': dangling[:0], 'targets': np.empty((0, 2)),
+                 'xy': xy, 'owner': owner, 'at_start': at_start}
+        if len(dangling) < 2:
+            return empty
+
+        pairs = cKDTree(xy[dangling]).query_pairs(gap_threshold, output_type='ndarray')
+        # Both ends of one short line must not collapse onto a single node
+        pairs = pairs[owner[dangling[pairs[:, 0]]] != owner[dangling[pairs[:, 1]]]]
+        if len(pairs) == 0:
+            return empty
+
+        roots = union_find(len(dangling), pairs[:, 0], pairs[:, 1])
+        in_pair = np.zeros(len(dangling), dtype=bool)
+        in_pair[pairs.ravel()] = True
+        members = dangling[in_pair]
+        _, labels = np.unique(roots[in_pair], return_inverse=True)
+        labels = labels.ravel()
+
+        n_clusters = labels.max() + 1
+        sizes = np.bincount(labels, minlength=n_clusters)
+        centroids = np.column_stack([
+            np.bincount(labels, weights=xy[members, 0], minlength=n_clusters) / sizes,
+            np.bincount(labels, weights=xy[members, 1], minlength=n_clusters) / sizes,
+        ])
+        targets = centroids
+        junctions = nodes[counts >= 2]
+        if len(junctions):
+            dist, idx = cKDTree(junctions).query(centroids, distance_upper_bound=gap_threshold)
+            near = np.isfinite(dist)
+            targets = centroids.copy()
+            targets[near] = junctions[idx[near]]
+        return {'members': members, 'labels': labels, 'targets': targets,
+                'xy': xy, 'owner': owner, 'at_start': at_start}
+
+    def suggest_fixes(self, gap_threshold: float, flagged: Optional[np.ndarray] = None) -> List[Dict]:
+        c = self.find_clusters(gap_threshold, flagged)
+        members, labels, targets = c['members'], c['labels'], c['targets']
+        if len(members) == 0:
+            return []
+        sizes = np.bincount(labels)
+        # Any other member's line is a valid "snap to" reference for reporting
+        order = np.argsort(labels, kind='stable')
+        first = np.unique(labels[order], return_index=True)[1]
+        second = np.minimum(first + 1, len(order) - 1)
+        fixes = []
+        for m, lab in zip(members, labels):
+            gid = int(c['owner'][m])
+            endpoint = 'start' if c['at_start'][m] else 'end'
+            original = (round(float(c['xy'][m, 0]), self.precision), round(float(c['xy'][m, 1]), self.precision))
+            snap = (round(float(targets[lab, 0]), self.precision), round(float(targets[lab, 1]), self.precision))
+            dist = float(np.hypot(snap[0] - c['xy'][m, 0], snap[1] - c['xy'][m, 1]))
+            if snap == original or dist > gap_threshold:
+                continue
+            ref = members[order[first[lab]]]
+            if ref == m:
+                ref = members[order[second[lab]]]
+            fix = AutoFixer._snap_fix(gid + 1, endpoint, original, snap, int(c['owner'][ref]) + 1, dist)
+            fix['cluster_id'] = int(lab) + 1
+            fix['cluster_size'] = int(sizes[lab])
+            fix['description'] += f" (shared node of {sizes[lab]}-endpoint cluster #{lab + 1})"
+            fixes.append(fix)
+        return fixes
+
+
+# =============================================================================
+# CORE ENGINE — Topology Graph (CSR) & Isolated Subnetworks
+# =============================================================================
+
+class TopologyGraph:
+    """
+    Planar network graph: nodes are merged segment endpoints, edges are the
+    segments. An endpoint lying on another segment's interior (T-junction
+    without a shared endpoint) also joins that segment. Adjacency is kept as
+    CSR arrays (``indptr`` / ``indices`` / ``edge_ids``) so the graph scales
+    to millions of edges without Python-level adjacency dicts.
+    """
+
+    def __init__(self, lines: List[LineString], precision: int = 6,
+                 endpoints: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+                 tree: Optional[shapely.STRtree] = None):
+        geoms = np.asarray(lines, dtype=object)
+        starts, ends = endpoints if endpoints is not None else line_endpoints(geoms)
+        n = len(geoms)
+        self.node_xy, inverse, self.degree = endpoint_nodes(np.concatenate([starts, ends]), precision)
+        self.n_nodes = len(self.node_xy)
+        self.edge_u, self.edge_v = inverse[:n], inverse[n:]
+        self.edge_length = shapely.length(geoms)
+
+        # T-junctions: dangling endpoints touching another segment
+        jn_u = jn_v = np.empty(0, dtype=np.int64)
+        dangling = np.flatnonzero(self.degree[inverse] == 1)
+        if len(dangling) and n > 1:
+            owner = dangling % n
+            pts = shapely.points(np.concatenate([starts, ends])[dangling])
+            tree = tree if tree is not None else shapely.STRtree(geoms)
+            p_idx, l_idx = tree.query(pts, predicate='intersects')
+            other = l_idx != owner[p_idx]
+            jn_u, jn_v = inverse[dangling[p_idx[other]]], self.edge_u[l_idx[other]]
+
+        src = np.concatenate([self.edge_u, self.edge_v, jn_u, jn_v])
+        dst = np.concatenate([self.edge_v, self.edge_u, jn_v, jn_u])
+        # Junction links carry edge id -1: they connect, but are not segments
+        eid = np.concatenate([np.arange(n), np.arange(n), np.full(2 * len(jn_u), -1)])
+        order = np.argsort(src, kind='stable')
+        self.indptr = np.concatenate(([0], np.cumsum(np.bincount(src, minlength=self.n_nodes))))
+        self.indices = dst[order]
+        self.edge_ids = eid[order]
+        self._labels: Optional[np.ndarray] = None
+
+    def csr_matrix(self):
+        from scipy.sparse import csr_matrix
+        data = np.ones(len(self.indices), dtype=np.int8)
+        return csr_matrix((data, self.indices, self.indptr), shape=(self.n_nodes, self.n_nodes))
+
+    def components(self) -> Tuple[int, np.ndarray]:
+        """(number of components, component label per node)."""
+        if self._labels is None:
+            from scipy.sparse.csgraph import connected_components
+            self.n_components, self._labels = connected_components(self.csr_matrix(), directed=False)
+        return self.n_components, self._labels
+
+    def edge_components(self) -> np.ndarray:
+        return self.components()[1][self.edge_u]
+
+    def component_summary(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(segment count, total length) per component."""
+        n_comp, _ = self.components()
+        labels = self.edge_components()
+        return (np.bincount(labels, minlength=n_comp),
+                np.bincount(labels, weights=self.edge_length, minlength=n_comp))
+
+
+@register_detector
+class SubnetworkDetector(Detector):
+    """
+    Flags subnetworks disconnected from the main (longest) component when they
+    are small: at most ``max_segments`` segments, or shorter than
+    ``min_length_ratio`` of the main component.
+    """
+
+    name = 'isolated_subnetwork'
+    requires = ('topology', 'lines')
+    label = 'Isolated subnetworks'
+
+    def __init__(self, max_segments: int = 3, min_length_ratio: float = 0.05):
+        self.max_segments = max_segments
+        self.min_length_ratio = min_length_ratio
+
+    def detect(self, graph: TopologyGraph, lines: List[LineString]) -> List[Dict]:
+        if len(lines) == 0:
+            return []
+        n_comp, _ = graph.components()
+        if n_comp < 2:
+            return []
+        sizes, lengths = graph.component_summary()
+        main = int(np.argmax(lengths))
+        small = (sizes <= self.max_segments) | (lengths < self.min_length_ratio * lengths[main])
+        small[main] = False
+        edge_comp = graph.edge_components()
+        flagged = np.flatnonzero(small[edge_comp])
+        if len(flagged) == 0:
+            return []
+
+        # Distance from each flagged segment to the main network
+        geoms = np.asarray(lines, dtype=object)
+        main_ids = np.flatnonzero(edge_comp == main)
+        (src, nearest), dist = shapely.STRtree(geoms[main_ids]).query_nearest(
+            geoms[flagged], return_distance=True, all_matches=False)
+        seg_dist = np.full(len(flagged), np.inf)
+        seg_dist[src] = dist
+        seg_nearest = np.full(len(flagged), -1)
+        seg_nearest[src] = nearest
+        comp_gap = np.full(n_comp, np.inf)
+        np.minimum.at(comp_gap, edge_comp[flagged], seg_dist)
+        avg_length = float(graph.edge_length.mean())
+
+        mids = shapely.line_interpolate_point(geoms[flagged], 0.5, normalized=True)
+        mid_xy = shapely.get_coordinates(mids)
+        starts, ends = line_endpoints(geoms[flagged])
+        issues = []
+        for k, gid in enumerate(flagged):
+            c = int(edge_comp[gid])
+            gap = float(comp_gap[c])
+            issues.append({
+                'geometry_id': int(gid) + 1,
+                'error_type': 'ISOLATED_SUBNETWORK',
+                'endpoint': 'component',
+                'description': (
+                    f"Segment #{gid + 1} belongs to a {sizes[c]}-segment subnetwork "
+                    f"({lengths[c]:.2f} units) that is {gap:.4f} units from the main network "
+                    f"({sizes[main]} segments). Routes cannot reach it."
+                ),
+                'gap_distance': gap,
+                'gap_to_segment': int(main_ids[seg_nearest[k]]) + 1 if np.isfinite(seg_dist[k]) else -1,
+                'location': (float(mid_xy[k, 0]), float(mid_xy[k, 1])),
+                'start': (float(starts[k, 0]), float(starts[k, 1])),
+                'end': (float(ends[k, 0]), float(ends[k, 1])),
+                # Islands just off the network are likelier digitizing errors
+                'confidence': max(0.4, 1 - gap / (gap + avg_length)) if avg_length > 0 else 0.4,
+                'source': 'topology',
+                'component_id': c + 1,
+                'component_size': int(sizes[c]),
+            })
+        return issues
+
+
+# =============================================================================
+# CORE ENGINE — Duplicate & Overlapping Segments
+# =============================================================================
+
+class Duplicates(NamedTuple):
+    twin: np.ndarray            # per line: lowest index with the same vertices (itself if unique)
+    overlap_pairs: np.ndarray   # (k, 2) lines i < j sharing a stretch, not identical
+    overlap_length: np.ndarray  # length of each pair's shared stretch
+
+
+def canonical_coords(lines, precision: int = 6) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Every line's xy quantized to ``precision`` decimals (int64, flat) and read
+    from whichever end gives the smaller vertex sequence, so a line and its
+    reverse come out identical; plus the per-line offsets into that buffer.
+    """
+    geoms = np.asarray(lines, dtype=object)
+    counts = shapely.get_num_coordinates(geoms)
+    offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+    q = np.rint(shapely.get_coordinates(geoms) * 10.0 ** precision).astype(np.int64)
+    first, last = offsets[:-1], offsets[1:] - 1
+    # Compare vertex k from the front with vertex k from the back until they differ
+    reverse = np.zeros(len(geoms), dtype=bool)
+    pending = np.flatnonzero(counts > 1)
+    k = 0
+    while len(pending):
+        a, b = q[first[pending] + k], q[last[pending] - k]
+        differ = (a[:, 0] != b[:, 0]) | (a[:, 1] != b[:, 1])
+        reverse[pending[differ]] = ((b[:, 0] < a[:, 0]) | ((b[:, 0] == a[:, 0]) & (b[:, 1] < a[:, 1])))[differ]
+        pending = pending[~differ]
+        k += 1
+        pending = pending[first[pending] + k < last[pending] - k]
+    line = np.repeat(np.arange(len(geoms)), counts)
+    pos = np.arange(len(q))
+    return q[np.where(reverse[line], first[line] + last[line] - pos, pos)], offsets
+
+
+def find_duplicates(lines, tree: Optional[shapely.STRtree] = None,
+                    segments: Optional[SegmentArrays] = None, precision: int = 6) -> Duplicates:
+    """
+    Exact duplicates — same quantized vertices in either direction — by
+    hashing each line's canonical coordinate buffer (one pass, linear time),
+    then partial overlaps: index pairs whose interiors share a stretch of line.
+    Only envelope pairs with two collinear, overlapping segments reach the
+    DE-9IM test.
+    """
+    geoms = np.asarray(lines, dtype=object)
+    q, offsets = canonical_coords(geoms, precision)
+    first_seen: Dict[bytes, int] = {}
+    twin = np.fromiter((first_seen.setdefault(q[a:b].tobytes(), i)
+                        for i, (a, b) in enumerate(zip(offsets[:-1].tolist(), offsets[1:].tolist()))),
+                       dtype=np.int64, count=len(geoms))
+
+    tree = tree if tree is not None else shapely.STRtree(geoms)
+    segments = segments if segments is not None else SegmentArrays(geoms)
+    a, b = tree.query(geoms)
+    keep = (a < b) & (twin[a] != twin[b])
+    a, b = a[keep], b[keep]
+
+    def overlap(sa, sb, la, lb):
+        # Both ends of sb (possibly) on sa's line, and the two spans sharing
+        # more than a point along sa's major axis — exact once collinear
+        a0, a1, b0, b1 = segments.p0[sa], segments.p1[sa], segments.p0[sb], segments.p1[sb]
+        collinear = ~orientation(a0, a1, b0)[1] & ~orientation(a0, a1, b1)[1]
+        axis = (np.abs(a1[:, 1] - a0[:, 1]) > np.abs(a1[:, 0] - a0[:, 0])).astype(np.int64)
+        rows = np.arange(len(sa))
+        a0, a1, b0, b1 = a0[rows, axis], a1[rows, axis], b0[rows, axis], b1[rows, axis]
+        return collinear & (np.maximum(np.minimum(a0, a1), np.minimum(b0, b1))
+                            < np.minimum(np.maximum(a0, a1), np.maximum(b0, b1)))
+
+    candidate = any_segment_pair(a, b, segments, overlap)
+    a, b = a[candidate], b[candidate]
+    # Interiors meeting in a line (not just a crossing or a shared endpoint)
+    shared = shapely.relate_pattern(geoms[a], geoms[b], '1********')
+    a, b = a[shared], b[shared]
+    return Duplicates(twin, np.stack([a, b], axis=1),
+                      shapely.length(shapely.intersection(geoms[a], geoms[b])))
+
+
+@register_detector
+class DuplicateDetector(Detector):
+    """
+    Flags segments digitized twice — every copy after the first — and
+    segments that run along part of another. Duplicates add a phantom line at
+    each shared endpoint, so a real gap can hide behind a degree-2 node.
+    """
+
+    name = 'duplicate_segment'
+    requires = ('duplicates', 'geoms')
+    label = 'Duplicate segments'
+
+    def detect(self, duplicates: Duplicates, geoms: np.ndarray) -> List[Dict]:
+        ids = np.arange(len(geoms))
+        copies = np.flatnonzero(duplicates.twin != ids)
+        # One overlap issue per later line of a pair, against its longest overlap
+        pairs, shared = duplicates.overlap_pairs, duplicates.overlap_length
+        order = np.lexsort((-shared, pairs[:, 1])) if len(pairs) else np.empty(0, dtype=np.int64)
+        longest = order[np.unique(pairs[order, 1], return_index=True)[1]]
+        longest = longest[~np.isin(pairs[longest, 1], copies)]
+        flagged = np.concatenate([copies, pairs[longest, 1]])
+        if len(flagged) == 0:
+            return []
+
+        length = shapely.length(geoms)
+        mid_xy = shapely.get_coordinates(shapely.line_interpolate_point(geoms[flagged], 0.5, normalized=True))
+        starts, ends = line_endpoints(geoms[flagged])
+        issues = []
+        for k, gid in enumerate(flagged.tolist()):
+            issue = {
+                'geometry_id': gid + 1,
+                'location': (float(mid_xy[k, 0]), float(mid_xy[k, 1])),
+                'start': (float(starts[k, 0]), float(starts[k, 1])),
+                'end': (float(ends[k, 0]), float(ends[k, 1])),
+                'gap_distance': 0.0,
+                'source': 'rule',
+            }
+            if k < len(copies):
+                twin = int(duplicates.twin[gid])
+                issue.update({
+                    'error_type': 'DUPLICATE_SEGMENT',
+                    'endpoint': 'duplicate',
+                    'description': (
+                        f"Segment #{gid + 1} repeats segment #{twin + 1} vertex for vertex. "
+                        f"The copy doubles the degree of both endpoints and can mask gaps."
+                    ),
+                    'gap_to_segment': twin + 1,
+                    'confidence': 0.95,
+                })
+            else:
+                p = longest[k - len(copies)]
+                other, overlap = int(pairs[p, 0]), float(shared[p])
+                shorter = min(length[gid], length[other])
+                issue.update({
+                    'error_type': 'OVERLAPPING_SEGMENT',
+                    'endpoint': 'overlap',
+                    'description': (
+                        f"Segment #{gid + 1} runs along segment #{other + 1} for {overlap:.4f} units. "
+                        f"Overlapping digitizations break the one-line-per-road topology."
+                    ),
+                    'gap_to_segment': other + 1,
+                    'overlap_length': overlap,
+                    'confidence': max(0.4, min(1.0, overlap / shorter)) if shorter > 0 else 0.4,
+                })
+            issues.append(issue)
+        return issues
+
+
+# =============================================================================
+# CORE ENGINE — Crossings Without a Shared Node
+# =============================================================================
+
+# Shewchuk's error bound for the floating-point orientation determinant
+_ORIENT_ERRBOUND = (3.0 + 16.0 * np.finfo(float).eps) * np.finfo(float).eps / 2
+
+
+def orientation(pa: np.ndarray, pb: np.ndarray, pc: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Sign of the turn pa → pb → pc (1 left, -1 right), and whether that sign is certain."""
+    left = (pa[:, 0] - pc[:, 0]) * (pb[:, 1] - pc[:, 1])
+    right = (pa[:, 1] - pc[:, 1]) * (pb[:, 0] - pc[:, 0])
+    det = left - right
+    return np.sign(det), np.abs(det) > _ORIENT_ERRBOUND * (np.abs(left) + np.abs(right))
+
+
+def any_segment_pair(a: np.ndarray, b: np.ndarray, segments: SegmentArrays,
+                     test: Callable[..., np.ndarray], batch: int = 1 << 20,
+                     max_product: int = 1 << 12) -> np.ndarray:
+    """
+    For each line pair ``(a[i], b[i])``, whether ``test(sa, sb, la, lb)``
+    holds for any of its segment pairs — segment indices into ``segments``
+    and their lines. Segment pairs with disjoint envelopes may be skipped, so
+    ``test`` must only look for contact between the two segments. Pairs of
+    short lines are expanded in full, ``batch`` segment pairs at a time;
+    pairs with more than ``max_product`` segment pairs are screened through
+    an STRtree over their segments' envelopes instead, so long lines cost
+    about their length, not its square.
+    """
+    n_pairs = segments.count[a].astype(np.int64) * segments.count[b]
+    hit = np.zeros(len(a), dtype=bool)
+
+    def run(sa, sb, pair):
+        for start in range(0, len(pair), batch):
+            part = slice(start, start + batch)
+            la, lb = a[pair[part]], b[pair[part]]
+            hit[pair[part][test(sa[part], sb[part], la, lb)]] = True
+
+    small = np.flatnonzero(n_pairs <= max_product)
+    ends = np.cumsum(n_pairs[small])
+    total = int(ends[-1]) if len(ends) else 0
+    for start in range(0, total, batch):
+        g = np.arange(start, min(start + batch, total))
+        idx = np.searchsorted(ends, g, side='right')
+        pair = small[idx]
+        k = g - (ends[idx] - n_pairs[pair])
+        count_b = segments.count[b[pair]]
+        run(segments.first[a[pair]] + k // count_b, segments.first[b[pair]] + k % count_b, pair)
+
+    large = np.flatnonzero(n_pairs > max_product)
+    if len(large):
+        lines = np.unique(np.concatenate([a[large], b[large]]))
+        seg = np.concatenate([np.arange(segments.first[l], segments.first[l] + segments.count[l]) for l in lines])
+        owner = np.repeat(lines, segments.count[lines])
+        p0, p1 = segments.p0[seg], segments.p1[seg]
+        boxes = shapely.box(np.minimum(p0[:, 0], p1[:, 0]), np.minimum(p0[:, 1], p1[:, 1]),
+                            np.maximum(p0[:, 0], p1[:, 0]), np.maximum(p0[:, 1], p1[:, 1]))
+        i, j = shapely.STRtree(boxes).query(boxes)
+        # Keep envelope pairs whose lines are one of the large pairs, in order
+        n = max(int(a.max()), int(b.max())) + 1
+        keys = a[large] * n + b[large]
+        order = np.argsort(keys, kind='stable')
+        found = owner[i] * n + owner[j]
+        at = np.minimum(np.searchsorted(keys[order], found), len(order) - 1)
+        match = keys[order][at] == found
+        run(seg[i[match]], seg[j[match]], large[order[at[match]]])
+        hit[large] = np.isin(keys, keys[hit[large]])  # repeated pairs share the first one's result
+    return hit
+
+
+class Crossings(NamedTuple):
+    pairs: np.ndarray   # (k, 2) lines i < j whose interiors cross
+    points: np.ndarray  # (m, 2) crossing locations
+    pair: np.ndarray    # row of ``pairs`` each point belongs to
+
+
+def find_crossings(lines, tree: Optional[shapely.STRtree] = None,
+                   segments: Optional[SegmentArrays] = None, batch: int = 1 << 20) -> Crossings:
+    """
+    Pairs of lines whose interiors cross at a point: envelope pairs from
+    ``tree``, screened segment against segment with orientation tests, then
+    confirmed with ``shapely.crosses`` — only for the few pairs the screen
+    cannot rule out, since the predicate on every pair costs far more than
+    the search itself. Contacts at a line's own ends (shared nodes,
+    T-junctions) are boundary, not interior, and never make a pair.
+    """
+    geoms = np.asarray(lines, dtype=object)
+    tree = tree if tree is not None else shapely.STRtree(geoms)
+    segments = segments if segments is not None else SegmentArrays(geoms)
+    a, b = tree.query(geoms)
+    keep = a < b
+    a, b = a[keep], b[keep]
+    open_line = ~shapely.is_closed(geoms)
+
+    def contact(sa, sb, la, lb):
+        a0, a1, b0, b1 = segments.p0[sa], segments.p1[sa], segments.p0[sb], segments.p1[sb]
+        o_b0, c_b0 = orientation(a0, a1, b0)
+        o_b1, c_b1 = orientation(a0, a1, b1)
+        o_a0, c_a0 = orientation(b0, b1, a0)
+        o_a1, c_a1 = orientation(b0, b1, a1)
+        apart = (c_b0 & c_b1 & (o_b0 == o_b1)) | (c_a0 & c_a1 & (o_a0 == o_a1))
+        proper = c_b0 & c_b1 & c_a0 & c_a1 & (o_b0 != o_b1) & (o_a0 != o_a1)
+        # A vertex (possibly) on the other segment matters only inside its line
+        inner_a0 = (sa > segments.first[la]) | ~open_line[la]
+        inner_a1 = (sa < segments.first[la] + segments.count[la] - 1) | ~open_line[la]
+        inner_b0 = (sb > segments.first[lb]) | ~open_line[lb]
+        inner_b1 = (sb < segments.first[lb] + segments.count[lb] - 1) | ~open_line[lb]
+        touch = ((~c_a0 & inner_a0) | (~c_a1 & inner_a1) | (~c_b0 & inner_b0) | (~c_b1 & inner_b1))
+        return ~apart & (proper | touch)
+
+    candidate = any_segment_pair(a, b, segments, contact, batch)
+    a, b = a[candidate], b[candidate]
+    crossing = shapely.crosses(geoms[a], geoms[b])
+    a, b = a[crossing], b[crossing]
+    parts, owner = shapely.get_parts(shapely.intersection(geoms[a], geoms[b]), return_index=True)
+    xy = shapely.get_coordinates(parts)
+    # Drop contacts at either line's ends that the same pair also has
+    ends_a, ends_b = line_endpoints(geoms[a]), line_endpoints(geoms[b])
+    at_end = np.zeros(len(xy), dtype=bool)
+    for end_xy in (*ends_a, *ends_b):
+        at_end |= (xy == end_xy[owner]).all(axis=1)
+    point = (shapely.get_type_id(parts) == 0) & ~at_end
+    return Crossings(np.stack([a, b], axis=1), xy[point], owner[point])
+
+
+class Overshoots(NamedTuple):
+    line: np.ndarray      # line index
+    at_end: np.ndarray    # tail past the line's end (else before its start)
+    crossing: np.ndarray  # row of ``Crossings.points`` where the line should stop
+    tail: np.ndarray      # length of the dangling tail past that crossing
+
+
+def find_overshoots(crossings: Crossings, lines, endpoint_map: Tuple, max_tail: float) -> Overshoots:
+    """
+    Dangling ends that run just past a road they cross: for each line, the
+    crossing nearest each end (measured along the line with one
+    ``line_locate_point`` call over every crossing) leaves a tail shorter than
+    ``max_tail`` and than half the line, and that end has no other line.
+    """
+    geoms = np.asarray(lines, dtype=object)
+    n = len(geoms)
+    empty = Overshoots(np.empty(0, dtype=np.int64), np.empty(0, dtype=bool), np.empty(0, dtype=np.int64), np.empty(0))
+    if len(crossings.points) == 0:
+        return empty
+    # Every crossing point once per line of its pair
+    point = np.tile(np.arange(len(crossings.points)), 2)
+    line = np.concatenate([crossings.pairs[crossings.pair, 0], crossings.pairs[crossings.pair, 1]])
+    measure = shapely.line_locate_point(geoms[line], shapely.points(crossings.points[point]))
+    length = shapely.length(geoms[line])
+    _, node, degree = endpoint_map
+    dangling = degree[node] == 1
+
+    line, point = np.concatenate([line, line]), np.concatenate([point, point])
+    at_end = np.repeat([False, True], len(measure))
+    tail = np.concatenate([measure, length - measure])
+    best = first_min(2 * line + at_end, tail, point)
+    line, at_end, point, tail = line[best], at_end[best], point[best], tail[best]
+    half = np.concatenate([length, length])[best] / 2
+    keep = dangling[line + n * at_end] & (tail > 0) & (tail < max_tail) & (tail < half)
+    return Overshoots(line[keep], at_end[keep], point[keep], tail[keep])
+
+
+def _crossing_issue(gid: int, crossed: List[Tuple[int, float, float]], start, end) -> Dict:
+    """UNNODED_CROSSING issue for segment ``gid``; ``crossed`` lists (other segment, x, y) per crossing."""
+    other, x, y = crossed[0]
+    more = f" (and {len(crossed) - 1} more)" if len(crossed) > 1 else ""
+    return {
+        'geometry_id': gid,
+        'error_type': 'UNNODED_CROSSING',
+        'endpoint': 'crossing',
+        'description': (
+            f"Segment #{gid} crosses segment #{other} at ({round(x, 6)}, {round(y, 6)}){more} "
+            f"without a shared node. Routes cannot turn between them there."
+        ),
+        'gap_distance': 0.0,
+        'gap_to_segment': other,
+        'location': (x, y),
+        'start': start,
+        'end': end,
+        # Grade separations (bridges, tunnels) also cross unnoded
+        'confidence': 0.6,
+        'source': 'rule',
+        'crossings': len(crossed),
+        'crossed': crossed,
+    }
+
+
+@register_detector
+class CrossingDetector(Detector):
+    """
+    Flags segments that cross another segment without a shared node: routing
+    cannot turn at the crossing, so the roads are disconnected there just as
+    across an endpoint gap. Each crossing is reported once, on the later
+    segment of the pair.
+    """
+
+    name = 'unnoded_crossing'
+    requires = ('crossings', 'geoms')
+    label = 'Crossings without node'
+
+    def detect(self, crossings: Crossings, geoms: np.ndarray) -> List[Dict]:
+        if len(crossings.points) == 0:
+            return []
+        later = crossings.pairs[crossings.pair, 1]
+        order = np.argsort(later, kind='stable')
+        flagged, first, count = np.unique(later[order], return_index=True, return_counts=True)
+        starts, ends = line_endpoints(geoms[flagged])
+        issues = []
+        for k, gid in enumerate(flagged.tolist()):
+            points = order[first[k]:first[k] + count[k]]
+            crossed = [(int(crossings.pairs[crossings.pair[p], 0]) + 1, float(crossings.points[p, 0]),
+                        float(crossings.points[p, 1])) for p in points.tolist()]
+            issues.append(_crossing_issue(gid + 1, crossed, (float(starts[k, 0]), float(starts[k, 1])),
+                                          (float(ends[k, 0]), float(ends[k, 1]))))
+        return issues
+
+
+@register_detector
+class OvershootDetector(Detector):
+    """
+    Flags lines that run just past a road they cross and end there, leaving
+    a short dangling tail — the mirror image of an endpoint gap. Tails up to
+    the adaptive gap threshold count; the fix trims the line back to the
+    crossing.
+    """
+
+    name = 'overshoot'
+    requires = ('overshoots', 'crossings', 'geoms', 'gap_threshold')
+    label = 'Overshoots'
+
+    def detect(self, overshoots: Overshoots, crossings: Crossings, geoms: np.ndarray,
+               gap_threshold: float) -> List[Dict]:
+        if len(overshoots.line) == 0:
+            return []
+        starts, ends = line_endpoints(geoms[overshoots.line])
+        pairs = crossings.pairs[crossings.pair[overshoots.crossing]]
+        others = np.where(pairs[:, 0] == overshoots.line, pairs[:, 1], pairs[:, 0])
+        issues = []
+        for k, gid in enumerate(overshoots.line.tolist()):
+            endpoint = 'end' if overshoots.at_end[k] else 'start'
+            x, y = (float(v) for v in (ends if overshoots.at_end[k] else starts)[k])
+            cut = crossings.points[overshoots.crossing[k]]
+            other, tail = int(others[k]), float(overshoots.tail[k])
+            issues.append({
+                'geometry_id': gid + 1,
+                'error_type': 'OVERSHOOT',
+                'endpoint': endpoint,
+                'description': (
+                    f"{endpoint.capitalize()} endpoint ({round(x, 6)}, {round(y, 6)}) runs {tail:.4f} units "
+                    f"past segment #{other + 1}, leaving a dangling tail. The line should end where it crosses."
+                ),
+                'gap_distance': tail,
+                'gap_to_segment': other + 1,
+                'location': (x, y),
+                'start': (float(starts[k, 0]), float(starts[k, 1])),
+                'end': (float(ends[k, 0]), float(ends[k, 1])),
+                'trim_to': (float(cut[0]), float(cut[1])),
+                'confidence': min(1.0, 1 - tail / gap_threshold),
+                'source': 'rule',
+            })
+        return issues
+
+
+def apply_fixes(lines: List[LineString], fixes: List[Dict]) -> List[LineString]:
+    """
+    Return a copy of the network with every suggested snap applied. All snaps
+    are written into one flat coordinate buffer of the touched lines, which
+    are then rebuilt in a single ``shapely.linestrings`` call; untouched lines
+    are shared with the input. When several fixes hit the same endpoint the
+    last one wins, as with sequential application. Trims also drop every
+    vertex of the tail beyond their cut point.
+    """
+    corrected_lines = list(lines)
+    fixes = [f for f in fixes if 0 < f['geometry_id'] <= len(lines)]
+    if not fixes:
+        return corrected_lines
+
+    gids = np.fromiter((f['geometry_id'] - 1 for f in fixes), dtype=np.int64, count=len(fixes))
+    at_start = np.fromiter((f['endpoint'] == 'start' for f in fixes), dtype=bool, count=len(fixes))
+    trim = np.fromiter((f['fix_type'] == 'TRIM_ENDPOINT' for f in fixes), dtype=bool, count=len(fixes))
+    targets = np.asarray([f['suggested_coord'] for f in fixes], dtype=float).reshape(-1, 2)
+
+    touched, local = np.unique(gids, return_inverse=True)
+    geoms = np.asarray(lines, dtype=object)[touched]
+    line_z = shapely.has_z(geoms)
+    has_z = bool(line_z.any())
+    coords = shapely.get_coordinates(geoms, include_z=has_z)
+    counts = shapely.get_num_coordinates(geoms)
+    offsets = np.concatenate(([0], np.cumsum(counts)))
+    vertex = np.where(at_start, offsets[local], offsets[local + 1] - 1)
+
+    # Keep the last fix per vertex: unique over the reversed order
+    _, last = np.unique(vertex[::-1], return_index=True)
+    keep = len(vertex) - 1 - last
+    coords[vertex[keep], :2] = targets[keep]
+
+    line = np.repeat(np.arange(len(touched)), counts)
+    if trim.any():
+        # Distance along each line to every vertex, summed as GEOS measures
+        # it, against the cut each trim makes (its point located on the line)
+        segments = SegmentArrays(geoms)
+        last = offsets[1:] - 1
+        along = np.empty(len(coords))
+        along[np.setdiff1d(np.arange(len(coords)), last)] = segments.measure
+        last_seg = segments.first + segments.count - 1
+        along[last] = segments.measure[last_seg] + segments.length[last_seg]
+        cut = shapely.line_locate_point(geoms[local[trim]], shapely.points(targets[trim]))
+        start_cut, end_cut = np.full(len(touched), -np.inf), np.full(len(touched), np.inf)
+        np.maximum.at(start_cut, local[trim & at_start], cut[at_start[trim]])
+        np.minimum.at(end_cut, local[trim & ~at_start], cut[~at_start[trim]])
+        inside = (along > start_cut[line]) & (along < end_cut[line])
+        inside[offsets[:-1]] = inside[last] = True
+        coords, line = coords[inside], line[inside]
+        counts = np.bincount(line, minlength=len(touched))
+
+    rebuilt = shapely.linestrings(coords, indices=line)
+    if has_z:
+        # 2D lines rebuilt alongside 3D ones would gain a NaN z
+        rebuilt[~line_z] = shapely.force_2d(rebuilt[~line_z])
+    for gid, geom in zip(touched, rebuilt):
+        corrected_lines[gid] = geom
+    return corrected_lines
+
+
+def network_fingerprint(lines: List[LineString]) -> str:
+    """Content hash of a network's coordinates (cheap: one pass over a flat buffer)."""
+    geoms = np.asarray(lines, dtype=object)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(shapely.get_num_coordinates(geoms).astype(np.int64).tobytes())
+    h.update(shapely.get_coordinates(geoms, include_z=True).tobytes())
+    return h.hexdigest()
+
+
+def fixes_fingerprint(fixes: List[Dict]) -> str:
+    key = [(f['geometry_id'], f['endpoint'], f['fix_type'], tuple(f['suggested_coord'])) for f in fixes]
+    return hashlib.blake2b(repr(key).encode('utf-8'), digest_size=16).hexdigest()
+
+
+def corrected_network(lines: List[LineString], fixes: List[Dict],
+                      network_key: Optional[str] = None) -> List[LineString]:
+    """``apply_fixes`` memoized per (network, fix-set) in the process-wide cache."""
+    key = (network_key or network_fingerprint(lines), fixes_fingerprint(fixes))
+    return CORRECTED_CACHE.get_or_compute(key, lambda: apply_fixes(lines, fixes))
+
+
+def iter_network_wkt(lines: List[LineString], batch_size: int = 10000) -> Iterator[str]:
+    for start in range(0, len(lines), batch_size):
+        batch = np.asarray(lines[start:start + batch_size], dtype=object)
+        yield "\n".join(shapely.to_wkt(batch, rounding_precision=-1)) + "\n"
+
+
+def iter_network_hexwkb(lines: List[LineString], batch_size: int = 10000) -> Iterator[str]:
+    """Hex WKB, one geometry per line — the layout ``read_wkb`` accepts."""
+    for start in range(0, len(lines), batch_size):
+        batch = np.asarray(lines[start:start + batch_size], dtype=object)
+        yield "\n".join(shapely.to_wkb(batch, hex=True)) + "\n"
+
+
+# format -> (file extension, mime type)
+NETWORK_FORMATS = {
+    'wkt': ('.wkt', 'text/plain'),
+    'wkb': ('.wkb', 'text/plain'),
+    'parquet': ('.parquet', 'application/vnd.apache.parquet'),
+}
+
+
+def write_network(fh: BinaryIO, lines: List[LineString], fmt: str = 'wkt'):
+    """Write a network to a binary stream as WKT, hex WKB or GeoParquet, batch by batch."""
+    if fmt == 'wkt':
+        write_report(fh, iter_network_wkt(lines))
+    elif fmt == 'wkb':
+        write_report(fh, iter_network_hexwkb(lines))
+    elif fmt == 'parquet':
+        write_columnar(fh, iter_network_batches(lines), 'parquet', _geo_metadata('geometry', ['LineString']))
+    else:
+        raise ValueError(f"Unknown network format: {fmt}")
+
+
+# =============================================================================
+# CORE ENGINE — Report Builder
+# =============================================================================
+
+def _report_item(issue: Dict) -> Dict:
+    return {
+        'geometry_id': issue['geometry_id'],
+        'error_type': issue['error_type'],
+        'endpoint': issue.get('endpoint', ''),
+        'severity': issue.get('severity', 'MEDIUM'),
+        'confidence': round(issue.get('confidence', 0.5), 4),
+        'description': issue.get('description', ''),
+        'gap_distance': issue.get('gap_distance', 0),
+        'coordinates': {
+            'start': list(issue.get('start', (0, 0))),
+            'end': list(issue.get('end', (0, 0))),
+        },
+        'confirmed_by': issue.get('confirmed_by', issue.get('source', 'rule')),
+    }
+
+
+def _report_header(n_issues: int) -> Dict:
+    return {
+        'report_version': APP_CONFIG['version'],
+        'team': APP_CONFIG['team'],
+        'error_type_focus': APP_CONFIG['error_type'],
+        'total_gaps_found': n_issues,
+    }
+
+
+def build_error_report(issues: List[Dict], fixes: Optional[List[Dict]] = None) -> Dict:
+    return {
+        **_report_header(len(issues)),
+        'issues': [_report_item(issue) for issue in issues],
+        'auto_fix_suggestions': fixes or [],
+    }
+
+
+def _json_default(obj):
+    # numpy scalars leak in from the feature table
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def iter_report_json(issues: List[Dict], fixes: Optional[List[Dict]] = None) -> Iterator[str]:
+    """Same document as ``build_error_report``, emitted one issue/fix at a time."""
+    header = json.dumps(_report_header(len(issues)), indent=2, default=_json_default)
+    yield header[:-2] + ',\n  "issues": ['
+    for idx, issue in enumerate(issues):
+        yield (',' if idx else '') + '\n    ' + json.dumps(_report_item(issue), default=_json_default)
+    yield ('\n  ' if issues else '') + '],\n  "auto_fix_suggestions": ['
+    for idx, fix in enumerate(fixes or []):
+        yield (',' if idx else '') + '\n    ' + json.dumps(fix, default=_json_default)
+    yield ('\n  ' if fixes else '') + ']\n}\n'
+
+
+def iter_report_jsonl(issues: List[Dict], fixes: Optional[List[Dict]] = None) -> Iterator[str]:
+    """JSON Lines: a header record, then one record per issue and per fix."""
+    yield json.dumps({'record': 'report', **_report_header(len(issues))}, default=_json_default) + '\n'
+    for issue in issues:
+        yield json.dumps({'record': 'issue', **_report_item(issue)}, default=_json_default) + '\n'
+    for fix in fixes or []:
+        yield json.dumps({'record': 'fix', **fix}, default=_json_default) + '\n'
+
+
+CSV_REPORT_COLUMNS = ['Segment', 'Endpoint', 'Gap', 'Severity', 'Confidence', 'Source', 'Description']
+
+
+def iter_report_csv(issues: List[Dict], chunk_rows: int = 5000) -> Iterator[str]:
+    """Gap report CSV in chunks of ``chunk_rows`` rows."""
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator='\n')
+    writer.writerow(CSV_REPORT_COLUMNS)
+    for idx, i in enumerate(issues, 1):
+        writer.writerow([
+            i['geometry_id'], i.get('endpoint', ''), i.get('gap_distance', 0), i.get('severity', ''),
+            i.get('confidence', 0), i.get('confirmed_by', ''), i.get('description', ''),
+        ])
+        if idx % chunk_rows == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
+
+
+def iter_text_report(stats: Dict, issues: List[Dict], fixes: List[Dict]) -> Iterator[str]:
+    """Plain-text report, one line at a time (without line terminators)."""
+    yield "=" * 72
+    yield "ROUTE CONTINUITY GAP DETECTION REPORT"
+    yield f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+    yield f"Team: {APP_CONFIG['team']} | Version: {APP_CONFIG['version']}"
+    yield f"Error Type: {APP_CONFIG['error_label']}"
+    yield "=" * 72
+    yield ""
+    yield "NETWORK SUMMARY"
+    yield "-" * 40
+    yield f"  Total Segments:    {stats['total_segments']}"
+    yield f"  Total Length:      {stats['total_length']:,.2f}"
+    yield f"  Connected Nodes:   {stats['connected_nodes']}"
+    yield f"  Dangling Nodes:    {stats['dangling_nodes']}"
+    if 'subnetworks' in stats:
+        yield f"  Subnetworks:       {stats['subnetworks']}"
+    yield ""
+    yield f"GAPS DETECTED: {len(issues)}"
+    yield "-" * 40
+    if issues:
+        for idx, issue in enumerate(issues, 1):
+            yield f"  [{idx}] Segment #{issue['geometry_id']} ({issue.get('endpoint','')}) — {issue.get('severity','')}"
+            yield f"      Gap: {issue.get('gap_distance',0):.4f} units | Confidence: {issue.get('confidence',0):.0%}"
+            yield f"      {issue.get('description','')}"
+            yield ""
+    else:
+        yield "  No gaps detected. Route continuity is intact."
+        yield ""
+    if fixes:
+        yield f"FIX SUGGESTIONS: {len(fixes)}"
+        yield "-" * 40
+        for idx, fix in enumerate(fixes, 1):
+            yield f"  [{idx}] {fix['description']}"
+            yield ""
+    yield "=" * 72
+
+
+def generate_text_report(stats: Dict, issues: List[Dict], fixes: List[Dict]) -> bytes:
+    return "\n".join(iter_text_report(stats, issues, fixes)).encode('utf-8')
+
+
+def write_report(fh, chunks: Iterable[str], encoding: str = 'utf-8') -> int:
+    """Write report chunks to a text or binary stream; returns characters written."""
+    binary = not isinstance(fh, io.TextIOBase)
+    n = 0
+    for chunk in chunks:
+        fh.write(chunk.encode(encoding) if binary else chunk)
+        n += len(chunk)
+    return n
+
+
+# format -> (file extension, chunk generator over a run_pipeline() result)
+REPORT_WRITERS = {
+    'json': ('.json', lambda r: iter_report_json(r['issues'], r['fixes'])),
+    'jsonl': ('.jsonl', lambda r: iter_report_jsonl(r['issues'], r['fixes'])),
+    'csv': ('.csv', lambda r: iter_report_csv(r['issues'])),
+    'txt': ('.txt', lambda r: (line + '\n' for line in iter_text_report(r['stats'], r['issues'], r['fixes']))),
+}
+
+
+def spool_report(chunks: Iterable[str], max_memory: int = 8 << 20) -> BinaryIO:
+    """Buffer streamed chunks in memory up to ``max_memory`` bytes, then on disk."""
+    spool = tempfile.SpooledTemporaryFile(max_size=max_memory)
+    write_report(spool, chunks)
+    spool.seek(0)
+    return spool
+
+
+# =============================================================================
+# CORE ENGINE — Columnar Export (GeoParquet / Arrow IPC)
+# =============================================================================
+
+COLUMNAR_FORMATS = {'parquet': '.parquet', 'arrow': '.arrow'}
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+    except ImportError as exc:
+        raise ImportError("Columnar export needs the optional 'pyarrow' package") from exc
+    return pyarrow
+
+
+def _geo_metadata(column: str, geometry_types: List[str]) -> Dict[bytes, bytes]:
+    """GeoParquet 1.0 file metadata declaring one WKB geometry column."""
+    meta = {
+        'version': '1.0.0',
+        'primary_column': column,
+        'columns': {column: {'encoding': 'WKB', 'geometry_types': geometry_types}},
+    }
+    return {b'geo': json.dumps(meta).encode('utf-8')}
+
+
+def iter_feature_batches(features: pd.DataFrame, batch_size: int = 65536) -> Iterator:
+    pa = _require_pyarrow()
+    # Always yield at least one (possibly empty) batch so the file gets a schema
+    for start in range(0, max(len(features), 1), batch_size):
+        yield pa.RecordBatch.from_pandas(features.iloc[start:start + batch_size], preserve_index=False)
+
+
+def iter_issue_batches(issues: List[Dict], batch_size: int = 65536) -> Iterator:
+    """Issues as flat columns plus a WKB point ``geometry`` at each issue location."""
+    pa = _require_pyarrow()
+    for start in range(0, max(len(issues), 1), batch_size):
+        chunk = issues[start:start + batch_size]
+        loc = np.asarray([i.get('location', i.get('start', (0, 0))) for i in chunk], dtype=float).reshape(-1, 2)
+        yield pa.RecordBatch.from_pydict({
+            'geometry_id': pa.array([i['geometry_id'] for i in chunk], pa.int32()),
+            'error_type': pa.array([i['error_type'] for i in chunk], pa.string()),
+            'endpoint': pa.array([i.get('endpoint', '') for i in chunk], pa.string()),
+            'severity': pa.array([i.get('severity', 'MEDIUM') for i in chunk], pa.string()),
+            'confidence': pa.array([i.get('confidence', 0.5) for i in chunk], pa.float64()),
+            'gap_distance': pa.array([i.get('gap_distance', 0) for i in chunk], pa.float64()),
+            'gap_to_segment': pa.array([i.get('gap_to_segment') for i in chunk], pa.int32()),
+            'confirmed_by': pa.array([i.get('confirmed_by', i.get('source', 'rule')) for i in chunk], pa.string()),
+            'description': pa.array([i.get('description', '') for i in chunk], pa.string()),
+            'x': loc[:, 0], 'y': loc[:, 1],
+            'geometry': pa.array(shapely.to_wkb(shapely.points(loc)), pa.binary()),
+        })
+
+
+def iter_network_batches(lines: List[LineString], batch_size: int = 65536) -> Iterator:
+    """Network as ``segment_id`` + WKB ``geometry``, encoded one batch at a time."""
+    pa = _require_pyarrow()
+    for start in range(0, max(len(lines), 1), batch_size):
+        geoms = np.asarray(lines[start:start + batch_size], dtype=object)
+        yield pa.RecordBatch.from_pydict({
+            'segment_id': pa.array(np.arange(start + 1, start + 1 + len(geoms)), pa.int32()),
+            'geometry': pa.array(shapely.to_wkb(geoms), pa.binary()),
+        })
+
+
+def write_columnar(sink, batches: Iterable, fmt: str = 'parquet',
+                   metadata: Optional[Dict[bytes, bytes]] = None) -> int:
+    """
+    Stream record batches into a Parquet or Arrow IPC file (path or binary
+    file object). Only one batch is materialized at a time. Returns rows written.
+    """
+    pa = _require_pyarrow()
+    if fmt not in COLUMNAR_FORMATS:
+        raise ValueError(f"Unknown columnar format: {fmt}")
+    writer = None
+    rows = 0
+    try:
+        for batch in batches:
+            if writer is None:
+                schema = batch.schema.with_metadata({**(batch.schema.metadata or {}), **(metadata or {})})
+                if fmt == 'parquet':
+                    import pyarrow.parquet as pq
+                    writer = pq.ParquetWriter(sink, schema, compression='zstd')
+                else:
+                    writer = pa.ipc.new_file(sink, schema)
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def columnar_tables(features: pd.DataFrame, issues: List[Dict], corrected_lines: List[LineString]) -> Dict:
+    """name -> (batch iterator, metadata) for the three exported tables."""
+    return {
+        'features': (iter_feature_batches(features), None),
+        'issues': (iter_issue_batches(issues), _geo_metadata('geometry', ['Point'])),
+        'corrected_network': (iter_network_batches(corrected_lines), _geo_metadata('geometry', ['LineString'])),
+    }
+
+
+def export_columnar(out_dir: str, features: pd.DataFrame, issues: List[Dict],
+                    corrected_lines: List[LineString], fmt: str = 'parquet') -> List[str]:
+    """Write features / issues / corrected network tables into ``out_dir``."""
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for name, (batches, meta) in columnar_tables(features, issues, corrected_lines).items():
+        path = os.path.join(out_dir, name + COLUMNAR_FORMATS[fmt])
+        with open(path, 'wb') as fh:
+            write_columnar(fh, batches, fmt, meta)
+        paths.append(path)
+    return paths
+
+
+def write_columnar_bundle(sink: BinaryIO, features: pd.DataFrame, issues: List[Dict],
+                          corrected_lines: List[LineString], fmt: str = 'parquet'):
+    """All three tables in one stored (uncompressed) zip — members are written as streams."""
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_STORED) as zf:
+        for name, (batches, meta) in columnar_tables(features, issues, corrected_lines).items():
+            with zf.open(name + COLUMNAR_FORMATS[fmt], 'w', force_zip64=True) as member:
+                write_columnar(member, batches, fmt, meta)
+
+
+# =============================================================================
+# WKT PARSER
+# =============================================================================
+
+_LINESTRING_RE = re.compile(r'LINESTRING\s*\([^)]+\)', re.IGNORECASE)
+_LINESTRING_TAG_RE = re.compile(r'LINESTRING', re.IGNORECASE)
+
+# suffix -> opener taking a binary stream; .zip is handled separately (multi-member)
+COMPRESSED_OPENERS = {
+    '.gz': lambda f: gzip.GzipFile(fileobj=f),
+    '.bz2': bz2.BZ2File,
+    '.xz': lzma.LZMAFile,
+}
+WKT_SUFFIXES = ('.wkt', '.txt')
+UPLOAD_TYPES = ['wkt', 'txt', 'gz', 'bz2', 'xz', 'zip', 'wkb', 'gpkg', 'parquet', 'geoparquet', 'fgb']
+# What a malformed or unsupported input raises from any reader (readers
+# re-raise their libraries' own errors as ValueError)
+READ_ERRORS = (OSError, EOFError, zipfile.BadZipFile, lzma.LZMAError, UnicodeDecodeError,
+               ValueError, ImportError, sqlite3.Error)
+
+
+def _loads_linestrings(candidates: List[str]) -> List[LineString]:
+    """Bulk-parse matched LINESTRING snippets, keeping valid non-empty lines."""
+    if not candidates:
+        return []
+    geoms = shapely.from_wkt(np.asarray(candidates, dtype=object), on_invalid='ignore')
+    keep = (shapely.get_type_id(geoms) == 1) & ~shapely.is_empty(geoms)
+    keep[keep] = shapely.is_valid(geoms[keep])
+    return list(geoms[keep])
+
+
+def iter_wkt_batches(chunks: Iterable[str]) -> Iterator[List[LineString]]:
+    """
+    Parse LINESTRINGs from text arriving in pieces, one batch per chunk. Only
+    the unfinished tail of each chunk is carried over, so memory stays
+    bounded by the chunk size.
+    """
+    tail = ''
+    for chunk in chunks:
+        buf = tail + chunk
+        last_end = 0
+        candidates = []
+        for m in _LINESTRING_RE.finditer(buf):
+            candidates.append(m.group(0))
+            last_end = m.end()
+        yield _loads_linestrings(candidates)
+        rest = buf[last_end:]
+        # Keep from the last (possibly incomplete) LINESTRING tag, or enough
+        # characters to complete a tag split across the chunk boundary
+        tags = list(_LINESTRING_TAG_RE.finditer(rest))
+        tail = rest[tags[-1].start():] if tags else rest[-(len('LINESTRING') - 1):]
+    yield _loads_linestrings([m.group(0) for m in _LINESTRING_RE.finditer(tail)])
+
+
+def parse_wkt_stream(chunks: Iterable[str]) -> List[LineString]:
+    return [line for batch in iter_wkt_batches(chunks) for line in batch]
+
+
+def parse_wkt(wkt_text: str) -> List[LineString]:
+    return parse_wkt_stream([wkt_text])
+
+
+def _strip_compression(name: str) -> Tuple[str, Optional[str]]:
+    lower = name.lower()
+    for suffix in list(COMPRESSED_OPENERS) + ['.zip']:
+        if lower.endswith(suffix):
+            return name[:-len(suffix)], suffix
+    return name, None
+
+
+def _zip_members(zf: zipfile.ZipFile) -> List[zipfile.ZipInfo]:
+    return [m for m in zf.infolist() if not m.is_dir() and not m.filename.startswith('__MACOSX/')]
 
-        for gid, items in by_id.items():
-            sources = set(i['source'] for i in items)
-            both = 'rule' in sources and 'ml' in sources
-            for item in items:
-                key = (item['geometry_id'], item.get('endpoint', ''))
-                if key in seen_keys:
-                    continue
-                seen_keys.add(key)
-                entry = dict(item)
-                if both:
-                    entry['confidence'] = min(1.0, entry.get('confidence', 0.5) * 1.3)
-                    entry['confirmed_by'] = 'rule+ml'
-                else:
-                    entry['confirmed_by'] = entry['source']
-                c = entry['confidence']
-                entry['severity'] = 'HIGH' if c >= 0.7 else ('MEDIUM' if c >= 0.4 else 'LOW')
-                final.append(entry)
 
-        final.sort(key=lambda x: -x['confidence'])
-        return final
+def _is_binary_name(name: str) -> bool:
+    return _strip_compression(name)[0].lower().endswith(BINARY_SUFFIXES)
 
 
-# =============================================================================
-# CORE ENGINE — Auto-Fix Suggestions
-# =============================================================================
+def _zip_member_names(zf: zipfile.ZipFile, inner: str) -> Tuple[List[zipfile.ZipInfo], List[str]]:
+    """Members and the names they are read by: their own if known, else the archive's ``inner`` name."""
+    members = _zip_members(zf)
+    return members, [m.filename if _is_binary_name(m.filename) or m.filename.lower().endswith(WKT_SUFFIXES)
+                     else inner for m in members]
 
-class AutoFixer:
-    """Suggest snapping coordinates to fix endpoint gaps."""
 
-    def __init__(self, lines: List[LineString], precision: int = 6):
-        self.lines = lines
-        self.precision = precision
+def is_wkt_source(path: str) -> bool:
+    """Whether ``path`` is WKT text (plain or compressed) — for a zip, whether no member is binary."""
+    inner, suffix = _strip_compression(path)
+    if suffix != '.zip' or inner.lower().endswith(WKT_SUFFIXES):
+        return inner.lower().endswith(WKT_SUFFIXES)
+    try:
+        with zipfile.ZipFile(path) as zf:
+            return not any(_is_binary_name(n) for n in _zip_member_names(zf, inner)[1])
+    except (OSError, zipfile.BadZipFile):
+        return False  # left to the in-memory reader to report
+
+
+def iter_wkt_chunks(name: str, stream: BinaryIO, chunk_size: int = 1 << 20) -> Iterator[str]:
+    """
+    Yield decoded text chunks from a plain, gzip, bz2, xz or zip input, chosen
+    by file name. Decompression is streamed — the full text is never built.
+    Zip archives yield every WKT member in turn (nested compression allowed);
+    binary geometry members are refused here — ``read_geometry_source``
+    reads those.
+    """
+    inner, suffix = _strip_compression(name)
+    if suffix == '.zip':
+        with zipfile.ZipFile(stream) as zf:
+            members = _zip_members(zf)
+            binary = [m.filename for m in members if _is_binary_name(m.filename)]
+            if binary:
+                raise ValueError(f"{binary[0]}: binary geometry member in a WKT archive")
+            wkt_members = [m for m in members
+                           if _strip_compression(m.filename)[0].lower().endswith(WKT_SUFFIXES)]
+            for member in wkt_members or members:
+                with zf.open(member) as fh:
+                    yield from iter_wkt_chunks(member.filename, fh, chunk_size)
+                # Members are separate files: never join a geometry across them
+                yield '\n'
+        return
+    if suffix is not None:
+        with COMPRESSED_OPENERS[suffix](stream) as fh:
+            yield from iter_wkt_chunks(inner, fh, chunk_size)
+        return
+    text = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+    try:
+        while True:
+            chunk = text.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        # Leave the caller's stream open — they own it
+        text.detach()
 
-    def suggest_fixes(self, issues: List[Dict]) -> List[Dict]:
-        suggestions = []
-        for issue in issues:
-            if issue.get('endpoint') == 'ml_flagged':
-                continue
-            gid = issue['geometry_id'] - 1
-            if gid >= len(self.lines):
-                continue
-            line = self.lines[gid]
-            coords = list(line.coords)
-            is_start = issue.get('endpoint') == 'start'
-            coord_idx = 0 if is_start else -1
-            pt = Point(coords[coord_idx])
-
-            best_dist = float('inf')
-            best_snap = None
-            best_target = None
-            for j, other in enumerate(self.lines):
-                if j == gid:
-                    continue
-                nearest = other.interpolate(other.project(pt))
-                d = pt.distance(nearest)
-                if 0 < d < best_dist:
-                    best_dist = d
-                    best_snap = (round(nearest.x, self.precision), round(nearest.y, self.precision))
-                    best_target = j + 1
-
-            if best_snap:
-                original = (round(coords[coord_idx][0], self.precision),
-                            round(coords[coord_idx][1], self.precision))
-                suggestions.append({
-                    'geometry_id': issue['geometry_id'],
-                    'fix_type': 'SNAP_ENDPOINT',
-                    'endpoint': issue.get('endpoint', 'unknown'),
-                    'original_coord': original,
-                    'suggested_coord': best_snap,
-                    'snap_to_segment': best_target,
-                    'distance': round(best_dist, 4),
-                    'description': (
-                        f"Snap {issue.get('endpoint','')} endpoint from "
-                        f"({original[0]}, {original[1]}) → ({best_snap[0]}, {best_snap[1]}) "
-                        f"to close {best_dist:.4f}-unit gap"
-                    ),
-                })
-        return suggestions
+
+def read_wkt_source(name: str, stream: BinaryIO) -> List[LineString]:
+    """Parse a WKT file or compressed/archived bundle straight from a binary stream."""
+    return parse_wkt_stream(iter_wkt_chunks(name, stream))
 
 
 # =============================================================================
-# CORE ENGINE — Report Builder
+# BINARY GEOMETRY READERS — WKB, GeoPackage, GeoParquet, FlatGeobuf
 # =============================================================================
 
-def build_error_report(issues: List[Dict], fixes: Optional[List[Dict]] = None) -> Dict:
-    report_items = []
-    for issue in issues:
-        report_items.append({
-            'geometry_id': issue['geometry_id'],
-            'error_type': issue['error_type'],
-            'endpoint': issue.get('endpoint', ''),
-            'severity': issue.get('severity', 'MEDIUM'),
-            'confidence': round(issue.get('confidence', 0.5), 4),
-            'description': issue.get('description', ''),
-            'gap_distance': issue.get('gap_distance', 0),
-            'coordinates': {
-                'start': list(issue.get('start', (0, 0))),
-                'end': list(issue.get('end', (0, 0))),
-            },
-            'confirmed_by': issue.get('confirmed_by', issue.get('source', 'rule')),
-        })
-    return {
-        'report_version': APP_CONFIG['version'],
-        'team': APP_CONFIG['team'],
-        'error_type_focus': APP_CONFIG['error_type'],
-        'total_gaps_found': len(report_items),
-        'issues': report_items,
-        'auto_fix_suggestions': fixes or [],
-    }
+_HEX_WKB_RE = re.compile(rb'[0-9A-Fa-f\s]+')
+# GeoPackage envelope indicator (flags bits 1-3) -> envelope size in bytes
+_GPKG_ENVELOPE_BYTES = {0: 0, 1: 32, 2: 48, 3: 48, 4: 64}
+BINARY_SUFFIXES = ('.wkb', '.gpkg', '.parquet', '.geoparquet', '.fgb')
+
+
+def lines_from_geometries(geoms: np.ndarray) -> List[LineString]:
+    """Turn a vectorized geometry array into the pipeline's line list.
+    MultiLineStrings are exploded into their parts; everything else is dropped
+    with the same validity rules as the WKT parser."""
+    geoms = np.asarray(geoms, dtype=object)
+    geoms = geoms[~shapely.is_missing(geoms)]
+    if len(geoms) == 0:
+        return []
+    type_ids = shapely.get_type_id(geoms)
+    # 1 = LineString, 5 = MultiLineString
+    parts = shapely.get_parts(geoms[(type_ids == 1) | (type_ids == 5)])
+    keep = ~shapely.is_empty(parts)
+    keep[keep] = shapely.is_valid(parts[keep])
+    return list(parts[keep])
+
+
+def read_wkb(stream: BinaryIO) -> np.ndarray:
+    """Hex WKB (one geometry per line) or a single binary WKB geometry."""
+    data = stream.read()
+    if _HEX_WKB_RE.fullmatch(data):
+        records = np.asarray(data.decode('ascii').split(), dtype=object)
+    else:
+        records = np.asarray([data], dtype=object)
+    return shapely.from_wkb(records, on_invalid='ignore')
 
 
-def generate_text_report(stats: Dict, issues: List[Dict], fixes: List[Dict]) -> bytes:
+def _strip_gpkg_headers(blobs: List[bytes]) -> List[bytes]:
+    """Drop the GeoPackage binary header (magic, flags, srs id, envelope) from each blob."""
     out = []
-    out.append("=" * 72)
-    out.append("ROUTE CONTINUITY GAP DETECTION REPORT")
-    out.append(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    out.append(f"Team: {APP_CONFIG['team']} | Version: {APP_CONFIG['version']}")
-    out.append(f"Error Type: {APP_CONFIG['error_label']}")
-    out.append("=" * 72)
-    out.append("")
-    out.append("NETWORK SUMMARY")
-    out.append("-" * 40)
-    out.append(f"  Total Segments:    {stats['total_segments']}")
-    out.append(f"  Total Length:      {stats['total_length']:,.2f}")
-    out.append(f"  Connected Nodes:   {stats['connected_nodes']}")
-    out.append(f"  Dangling Nodes:    {stats['dangling_nodes']}")
-    out.append("")
-    out.append(f"GAPS DETECTED: {len(issues)}")
-    out.append("-" * 40)
-    if issues:
-        for idx, issue in enumerate(issues, 1):
-            out.append(f"  [{idx}] Segment #{issue['geometry_id']} ({issue.get('endpoint','')}) — {issue.get('severity','')}")
-            out.append(f"      Gap: {issue.get('gap_distance',0):.4f} units | Confidence: {issue.get('confidence',0):.0%}")
-            out.append(f"      {issue.get('description','')}")
-            out.append("")
+    for blob in blobs:
+        if blob is None:
+            continue
+        blob = bytes(blob)
+        if blob[:2] != b'GP':
+            raise ValueError("Not a GeoPackage geometry blob")
+        envelope = _GPKG_ENVELOPE_BYTES.get((blob[3] >> 1) & 0x07)
+        if envelope is None:
+            raise ValueError("Invalid GeoPackage envelope indicator")
+        out.append(blob[8 + envelope:])
+    return out
+
+
+def read_geopackage(stream: BinaryIO, table: Optional[str] = None,
+                    batch_size: int = 65536) -> np.ndarray:
+    """
+    Read every geometry column registered in ``gpkg_geometry_columns`` via
+    stdlib sqlite3 — from memory where ``deserialize`` exists (Python 3.11+),
+    else from a temporary copy.
+    """
+    if hasattr(sqlite3.Connection, 'deserialize'):
+        conn = sqlite3.connect(':memory:')
+        try:
+            conn.deserialize(stream.read())
+            return _gpkg_geometries(conn, table, batch_size)
+        finally:
+            conn.close()
+    with tempfile.TemporaryDirectory(prefix='gapdetector-') as scratch:
+        path = os.path.join(scratch, 'input.gpkg')
+        with open(path, 'wb') as fh:
+            shutil.copyfileobj(stream, fh)
+        conn = sqlite3.connect(path)
+        try:
+            return _gpkg_geometries(conn, table, batch_size)
+        finally:
+            conn.close()
+
+
+def _gpkg_geometries(conn: sqlite3.Connection, table: Optional[str], batch_size: int) -> np.ndarray:
+    targets = conn.execute(
+        "SELECT table_name, column_name FROM gpkg_geometry_columns"
+        + (" WHERE table_name = ?" if table else ""), (table,) if table else ()
+    ).fetchall()
+    if not targets:
+        raise ValueError("GeoPackage has no geometry tables")
+    chunks = []
+    for tbl, col in targets:
+        cur = conn.execute('SELECT "{}" FROM "{}"'.format(col.replace('"', '""'), tbl.replace('"', '""')))
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            wkb = _strip_gpkg_headers([r[0] for r in rows])
+            chunks.append(shapely.from_wkb(np.asarray(wkb, dtype=object), on_invalid='ignore'))
+    return np.concatenate(chunks) if chunks else np.empty(0, dtype=object)
+
+
+def read_geoparquet(stream: BinaryIO) -> np.ndarray:
+    """Read the primary WKB geometry column of a GeoParquet file, one row group at a time."""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise ImportError("GeoParquet input needs the optional 'pyarrow' package") from exc
+    pf = pq.ParquetFile(stream)
+    geo_meta = (pf.schema_arrow.metadata or {}).get(b'geo')
+    if geo_meta:
+        meta = json.loads(geo_meta)
+        column = meta['primary_column']
+        encoding = meta['columns'][column].get('encoding', 'WKB')
+        if encoding.upper() != 'WKB':
+            raise ValueError(f"Unsupported GeoParquet geometry encoding: {encoding}")
     else:
-        out.append("  No gaps detected. Route continuity is intact.")
-        out.append("")
-    if fixes:
-        out.append(f"FIX SUGGESTIONS: {len(fixes)}")
-        out.append("-" * 40)
-        for idx, fix in enumerate(fixes, 1):
-            out.append(f"  [{idx}] {fix['description']}")
-            out.append("")
-    out.append("=" * 72)
-    return "\n".join(out).encode('utf-8')
+        column = 'geometry'
+    chunks = [
+        shapely.from_wkb(batch.column(0).to_numpy(zero_copy_only=False), on_invalid='ignore')
+        for batch in pf.iter_batches(columns=[column])
+    ]
+    return np.concatenate(chunks) if chunks else np.empty(0, dtype=object)
+
+
+def read_flatgeobuf(stream: BinaryIO) -> np.ndarray:
+    """Read a FlatGeobuf file through GDAL's driver (optional 'pyogrio' package)."""
+    try:
+        from pyogrio.raw import read as ogr_read
+        from pyogrio.errors import DataLayerError, DataSourceError
+    except ImportError as exc:
+        raise ImportError("FlatGeobuf input needs the optional 'pyogrio' package") from exc
+    try:
+        _, _, wkb, _ = ogr_read(stream, columns=[], return_fids=False)
+    except (DataSourceError, DataLayerError) as exc:
+        raise ValueError(f"unreadable FlatGeobuf: {exc}") from exc
+    return shapely.from_wkb(wkb, on_invalid='ignore')
+
+
+BINARY_READERS = {
+    '.wkb': read_wkb,
+    '.gpkg': read_geopackage,
+    '.parquet': read_geoparquet,
+    '.geoparquet': read_geoparquet,
+    '.fgb': read_flatgeobuf,
+}
+
+
+def read_geometry_source(name: str, stream: BinaryIO) -> List[LineString]:
+    """Parse any supported input — WKT (plain or compressed) or a binary geometry format."""
+    inner, suffix = _strip_compression(name)
+    if suffix == '.zip' and not inner.lower().endswith(WKT_SUFFIXES):
+        # Any binary member: read every member by its own name (zip of .wkb,
+        # .gpkg, …); members without a known extension by the archive's
+        with zipfile.ZipFile(stream) as zf:
+            members, names = _zip_member_names(zf, inner)
+            if any(_is_binary_name(n) for n in names):
+                return [line for m, n in zip(members, names)
+                        for line in read_geometry_source(n, io.BytesIO(zf.read(m)))]
+        stream.seek(0)
+    reader = next((r for ext, r in BINARY_READERS.items() if inner.lower().endswith(ext)), None)
+    if reader is None:
+        return read_wkt_source(name, stream)
+    if suffix is None:
+        return lines_from_geometries(reader(stream))
+    if reader is not read_wkb or suffix not in COMPRESSED_OPENERS:
+        raise ValueError(f"{suffix} compression is only supported for WKT and WKB inputs")
+    with COMPRESSED_OPENERS[suffix](stream) as fh:
+        return lines_from_geometries(reader(fh))
 
 
 # =============================================================================
-# WKT PARSER
+# CORE ENGINE — Out-of-Core Mode (memory-mapped geometry, tiled passes)
 # =============================================================================
 
-def parse_wkt(wkt_text: str) -> List[LineString]:
-    cleaned = re.sub(r'\s+', ' ', wkt_text)
-    matches = re.findall(r'LINESTRING\s*\([^)]+\)', cleaned, re.IGNORECASE)
-    lines = []
-    for m in matches:
+class MappedNetwork:
+    """
+    LINESTRINGs stored column-wise on disk and memory-mapped: ``coords``
+    (float64, N×2) and ``offsets`` (int64, n+1), where line ``i`` owns
+    ``coords[offsets[i]:offsets[i + 1]]``. Only the pages a pass touches are
+    resident, so the network can be far larger than RAM.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.offsets = np.memmap(os.path.join(directory, 'offsets.i8'), dtype=np.int64, mode='r')
+        n_coords = int(self.offsets[-1])
+        self.coords = (np.memmap(os.path.join(directory, 'coords.f8'), dtype=np.float64, mode='r',
+                                 shape=(n_coords, 2)) if n_coords else np.empty((0, 2)))
+
+    @classmethod
+    def build(cls, batches: Iterable[List[LineString]], directory: str) -> 'MappedNetwork':
+        """Append parsed batches to the on-disk arrays; one batch in memory at a time."""
+        total = 0
+        with open(os.path.join(directory, 'coords.f8'), 'wb') as cf, \
+                open(os.path.join(directory, 'offsets.i8'), 'wb') as of:
+            np.zeros(1, dtype=np.int64).tofile(of)
+            for batch in batches:
+                if not batch:
+                    continue
+                xy, idx = shapely.get_coordinates(np.asarray(batch, dtype=object), return_index=True)
+                xy.tofile(cf)
+                (total + np.cumsum(np.bincount(idx, minlength=len(batch)))).astype(np.int64).tofile(of)
+                total += len(xy)
+        return cls(directory)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def geometries(self, start: int, stop: int) -> np.ndarray:
+        off = np.asarray(self.offsets[start:stop + 1])
+        xy = np.asarray(self.coords[off[0]:off[-1]])
+        return shapely.linestrings(xy, indices=np.repeat(np.arange(stop - start), np.diff(off)))
+
+    def take(self, ids: np.ndarray) -> np.ndarray:
+        """Lines by (sorted) index — gathers only their coordinate runs."""
+        lo, hi = np.asarray(self.offsets[ids]), np.asarray(self.offsets[ids + 1])
+        counts = hi - lo
+        coord_idx = np.arange(counts.sum()) + np.repeat(lo - (np.cumsum(counts) - counts), counts)
+        return shapely.linestrings(np.asarray(self.coords[coord_idx]),
+                                   indices=np.repeat(np.arange(len(ids)), counts))
+
+    def endpoint_xy(self, endpoint_ids: np.ndarray) -> np.ndarray:
+        """Endpoint ``2i`` is line i's start, ``2i + 1`` its end."""
+        line = endpoint_ids // 2
+        at_end = (endpoint_ids % 2).astype(bool)
+        return np.asarray(self.coords[np.where(at_end, np.asarray(self.offsets[line + 1]) - 1,
+                                               np.asarray(self.offsets[line]))])
+
+
+def _write_partitions(files: List, part: np.ndarray, records: np.ndarray):
+    """Append each record row to the file of its partition."""
+    order = np.argsort(part, kind='stable')
+    bounds = np.searchsorted(part[order], np.arange(len(files) + 1))
+    for k in np.flatnonzero(np.diff(bounds)):
+        records[order[bounds[k]:bounds[k + 1]]].tofile(files[k])
+
+
+class OutOfCoreAnalyzer:
+    """
+    Endpoint-gap analysis of a ``MappedNetwork`` within a memory budget. Each
+    pass streams line chunks sized from ``memory_mb``: endpoint degrees are
+    counted in coordinate-hash partitions and nearest-segment gaps tile by
+    tile, with per-endpoint results in memory-mapped arrays. Gaps are searched
+    up to the scale cap of the adaptive threshold; farther endpoints read as
+    ``inf`` (no flag is possible there). The ML model and whole-network checks
+    need the in-memory pipeline and are skipped.
+    """
+
+    def __init__(self, network: MappedNetwork, precision: int = 6, memory_mb: int = 256):
+        self.net = network
+        self.precision = precision
+        self.memory = memory_mb << 20
+        n = len(network)
+        avg_vertices = len(network.coords) / n if n else 2
+        # Coordinates, shapely objects and a feature row per line, with headroom
+        self.chunk_lines = int(max(1024, self.memory // (avg_vertices * 64 + 1024)))
+
+    def _chunks(self) -> Iterator[Tuple[int, int]]:
+        n = len(self.net)
+        for start in range(0, n, self.chunk_lines):
+            yield start, min(start + self.chunk_lines, n)
+
+    def _array(self, name: str, dtype, shape, fill) -> np.ndarray:
+        arr = np.lib.format.open_memmap(os.path.join(self.net.directory, name), mode='w+',
+                                        dtype=dtype, shape=shape)
+        arr[:] = fill
+        return arr
+
+    def _partition_files(self, prefix: str, n_parts: int) -> List[str]:
+        return [os.path.join(self.net.directory, f'{prefix}-{k}.bin') for k in range(n_parts)]
+
+    def summarize(self):
+        """Pass 1: segment lengths, extent and endpoints hash-partitioned by coordinate."""
+        n = len(self.net)
+        self.length = self._array('length.npy', np.float64, (n,), 0.0)
+        self.bounds = np.array([np.inf, np.inf, -np.inf, -np.inf])
+        self.feature_length_sum = 0.0  # of 4-decimal lengths, as in the feature table
+        self.stats = NetworkStats()
+        # 24 bytes per endpoint record; one partition must fit the budget
+        self._node_parts = self._partition_files('nodes', max(1, int(np.ceil(2 * n * 24 * 2 / self.memory))))
+        files = [open(p, 'wb') for p in self._node_parts]
         try:
-            geom = wkt.loads(m)
-            if isinstance(geom, LineString) and geom.is_valid and not geom.is_empty:
-                lines.append(geom)
-        except Exception:
-            continue
-    return lines
+            for start, stop in self._chunks():
+                geoms = self.net.geometries(start, stop)
+                self.length[start:stop] = shapely.length(geoms)
+                self.feature_length_sum += float(np.round(self.length[start:stop], 4).sum())
+                self.stats.add_lengths(self.length[start:stop])
+                b = shapely.total_bounds(geoms)
+                self.bounds = np.concatenate([np.minimum(self.bounds[:2], b[:2]), np.maximum(self.bounds[2:], b[2:])])
+                eids = np.arange(2 * start, 2 * stop)
+                # Same node identity as endpoint_nodes(): equal rounded floats (−0.0 folded into 0.0)
+                key = (np.round(self.net.endpoint_xy(eids), self.precision) + 0.0).view(np.int64)
+                h = key[:, 0].view(np.uint64) ^ (key[:, 1].view(np.uint64) * np.uint64(0x9E3779B97F4A7C15))
+                _write_partitions(files, (h % np.uint64(len(files))).astype(np.int64),
+                                  np.column_stack([key, eids]))
+        finally:
+            for f in files:
+                f.close()
+
+    def count_degrees(self):
+        """Pass 2: endpoint degree per partition; nothing spans partitions."""
+        self.degree = self._array('degree.npy', np.int32, (2 * len(self.net),), 0)
+        for path in self._node_parts:
+            rec = np.fromfile(path, dtype=np.int64).reshape(-1, 3)
+            os.remove(path)
+            if not len(rec):
+                continue
+            rec = rec[np.lexsort((rec[:, 1], rec[:, 0]))]
+            new = np.ones(len(rec), dtype=bool)
+            new[1:] = (rec[1:, :2] != rec[:-1, :2]).any(axis=1)
+            group = np.cumsum(new) - 1
+            counts = np.bincount(group)
+            self.degree[rec[:, 2]] = counts[group]
+            self.stats.add_degrees(counts)
+
+    def nearest_gaps(self, radius: float):
+        """
+        Pass 3: nearest other segment (within ``radius``) of every dangling
+        endpoint. Lines are bucketed into every grid tile their radius-expanded
+        bbox touches, so each tile is answered from its own small STRtree.
+        """
+        n = len(self.net)
+        self.min_gap = self._array('min_gap.npy', np.float64, (2 * n,), 0.0)
+        self.nearest = self._array('nearest.npy', np.int64, (2 * n,), -1)
+        self.snap = self._array('snap.npy', np.float64, (2 * n, 2), np.nan)
+        minx, miny, maxx, maxy = self.bounds
+        width, height = max(maxx - minx, radius), max(maxy - miny, radius)
+        # About a quarter chunk of lines per tile, never narrower than the search
+        tile = max(4 * radius, float(np.sqrt(width * height * (self.chunk_lines / 4) / max(n, 1))))
+        nx = int(width // tile) + 1
+        ny = int(height // tile) + 1
+        n_parts = max(1, int(np.ceil(n * 16 * 4 / self.memory)))
+        line_parts = self._partition_files('tile-lines', n_parts)
+        point_parts = self._partition_files('tile-points', n_parts)
+        lf = [open(p, 'wb') for p in line_parts]
+        pf = [open(p, 'wb') for p in point_parts]
+        try:
+            for start, stop in self._chunks():
+                b = shapely.bounds(self.net.geometries(start, stop))
+                ix0 = np.clip((b[:, 0] - radius - minx) // tile, 0, nx - 1).astype(np.int64)
+                iy0 = np.clip((b[:, 1] - radius - miny) // tile, 0, ny - 1).astype(np.int64)
+                span_x = np.clip((b[:, 2] + radius - minx) // tile, 0, nx - 1).astype(np.int64) - ix0 + 1
+                span_y = np.clip((b[:, 3] + radius - miny) // tile, 0, ny - 1).astype(np.int64) - iy0 + 1
+                cnt = span_x * span_y
+                k = np.arange(cnt.sum()) - np.repeat(np.cumsum(cnt) - cnt, cnt)
+                tiles = ((np.repeat(iy0, cnt) + k // np.repeat(span_x, cnt)) * nx
+                         + np.repeat(ix0, cnt) + k % np.repeat(span_x, cnt))
+                _write_partitions(lf, tiles % n_parts,
+                                  np.column_stack([tiles, np.repeat(np.arange(start, stop), cnt)]))
+
+                eids = np.flatnonzero(self.degree[2 * start:2 * stop] == 1) + 2 * start
+                xy = self.net.endpoint_xy(eids)
+                tiles = (((xy[:, 1] - miny) // tile).astype(np.int64) * nx
+                         + ((xy[:, 0] - minx) // tile).astype(np.int64))
+                _write_partitions(pf, tiles % n_parts, np.column_stack([tiles, eids]))
+        finally:
+            for f in lf + pf:
+                f.close()
+
+        for lpath, ppath in zip(line_parts, point_parts):
+            lines_rec = np.fromfile(lpath, dtype=np.int64).reshape(-1, 2)
+            points_rec = np.fromfile(ppath, dtype=np.int64).reshape(-1, 2)
+            os.remove(lpath)
+            os.remove(ppath)
+            lines_rec = lines_rec[np.argsort(lines_rec[:, 0], kind='stable')]
+            points_rec = points_rec[np.argsort(points_rec[:, 0], kind='stable')]
+            tiles, first = np.unique(points_rec[:, 0], return_index=True)
+            lo = np.searchsorted(lines_rec[:, 0], tiles, 'left')
+            hi = np.searchsorted(lines_rec[:, 0], tiles, 'right')
+            for t, eids in enumerate(np.split(points_rec[:, 1], first[1:])):
+                self._tile_nearest(np.unique(lines_rec[lo[t]:hi[t], 1]), eids, radius)
+
+    def _tile_nearest(self, line_ids: np.ndarray, eids: np.ndarray, radius: float):
+        self.min_gap[eids] = np.inf
+        geoms = self.net.take(line_ids)
+        owner = eids // 2
+        pts = shapely.points(np.round(self.net.endpoint_xy(eids), self.precision))
+        p, l = shapely.STRtree(geoms).query(pts, predicate='dwithin', distance=radius)
+        keep = line_ids[l] != owner[p]
+        p, l = p[keep], l[keep]
+        if not len(p):
+            return
+        d = shapely.distance(pts[p], geoms[l])
+        # Per endpoint: nearest first, lowest segment id on ties (as FeatureExtractor)
+        order = np.lexsort((line_ids[l], d, p))
+        best = order[np.r_[True, p[order][1:] != p[order][:-1]]]
+        hit = eids[p[best]]
+        self.min_gap[hit] = d[best]
+        self.nearest[hit] = line_ids[l[best]] + 1
+        target = geoms[l[best]]
+        snapped = shapely.line_interpolate_point(target, shapely.line_locate_point(target, pts[p[best]]))
+        self.snap[hit] = shapely.get_coordinates(snapped)
+
+    def iter_features(self) -> Iterator[pd.DataFrame]:
+        """Feature table (FeatureExtractor columns) one chunk at a time."""
+        for start, stop in self._chunks():
+            off = np.asarray(self.net.offsets[start:stop + 1])
+            n_vertices = np.diff(off)
+            length = np.asarray(self.length[start:stop])
+            xy = np.round(self.net.endpoint_xy(np.arange(2 * start, 2 * stop)), self.precision)
+            gap = np.asarray(self.min_gap[2 * start:2 * stop])
+            nearest = np.asarray(self.nearest[2 * start:2 * stop])
+            degree = np.asarray(self.degree[2 * start:2 * stop])
+            density = np.divide(n_vertices, length, out=np.zeros(len(length)), where=length > 0)
+            yield feature_frame({
+                'geometry_id': np.arange(start + 1, stop + 1),
+                'length': np.round(length, 4),
+                'n_vertices': n_vertices,
+                'vertex_density': np.round(density, 6),
+                'start_x': xy[0::2, 0], 'start_y': xy[0::2, 1],
+                'end_x': xy[1::2, 0], 'end_y': xy[1::2, 1],
+                'start_degree': degree[0::2],
+                'end_degree': degree[1::2],
+                'connectivity_score': np.round(np.minimum(gap[0::2], gap[1::2]), 4),
+                'min_gap_start': np.round(gap[0::2], 4),
+                'min_gap_end': np.round(gap[1::2], 4),
+                'nearest_seg_start': nearest[0::2],
+                'nearest_seg_end': nearest[1::2],
+            })
+
+    def gap_threshold(self, avg_length: float, radius: float) -> float:
+        # One sketch per chunk, merged — the same reduction a distributed run would do.
+        # Endpoints with nothing inside the search radius count at the radius
+        # (the scale cap), which leaves min(percentile, cap) unchanged.
+        sketch = QuantileSketch(GapDetector.sketch_k)
+        for start, stop in self._chunks():
+            degree = np.asarray(self.degree[2 * start:2 * stop])
+            gaps = np.asarray(self.min_gap[2 * start:2 * stop])[degree == 1]
+            sketch.merge(GapDetector.sketch_gaps(np.minimum(np.round(gaps, 4), radius)))
+        return GapDetector.threshold_from_sketch(sketch, avg_length)
+
+    def analyze(self) -> Dict:
+        """All passes; returns the ``run_pipeline()`` keys except ``features``."""
+        n = len(self.net)
+        with METRICS.time('ooc_summarize'):
+            self.summarize()
+        with METRICS.time('ooc_degrees'):
+            self.count_degrees()
+        avg_length = self.feature_length_sum / n if n else 0.0
+        radius = GapDetector.scale_threshold(avg_length)
+        with METRICS.time('ooc_nearest'):
+            self.nearest_gaps(radius)
+        gap_threshold = self.gap_threshold(avg_length, radius)
+
+        issues: List[Dict] = []
+        with METRICS.time('ooc_detect'):
+            for frame in self.iter_features():
+                near = (((frame['start_degree'] == 1) & (frame['min_gap_start'] > 0)
+                         & (frame['min_gap_start'] < gap_threshold))
+                        | ((frame['end_degree'] == 1) & (frame['min_gap_end'] > 0)
+                           & (frame['min_gap_end'] < gap_threshold)))
+                issues.extend(GapDetector().detect(frame[near], gap_threshold))
+        issues = DecisionEngine.combine(issues, [])
+
+        fixes = []
+        for issue in issues:
+            eid = 2 * (issue['geometry_id'] - 1) + (issue['endpoint'] == 'end')
+            if self.nearest[eid] < 0:
+                continue
+            original = tuple(float(v) for v in np.round(self.net.endpoint_xy(np.array([eid]))[0], self.precision))
+            snap = tuple(float(v) for v in np.round(self.snap[eid], self.precision))
+            fixes.append(AutoFixer._snap_fix(issue['geometry_id'], issue['endpoint'], original, snap,
+                                             int(self.nearest[eid]), float(self.min_gap[eid])))
+
+        METRICS.record_run(n, issues)
+        return {'issues': issues, 'fixes': fixes, 'stats': self.stats.summary(), 'gap_threshold': gap_threshold}
 
 
 # =============================================================================
@@ -961,6 +3465,42 @@ def create_map(lines: List[LineString], issues: List[Dict]) -> folium.Map:
                     f"connectivity compared to the rest of the network. "
                     f"Its endpoint distances and topology deviate from the norm."
                 )
+            elif issue.get('error_type') == 'ISOLATED_SUBNETWORK':
+                why_text = (
+                    f"This segment is part of a {issue.get('component_size', '?')}-segment subnetwork "
+                    f"that shares no node with the main network (nearest: segment #{gap_to}, "
+                    f"{gap_dist:.4f} units away). Routes cannot enter or leave it."
+                )
+            elif issue.get('error_type') == 'DUPLICATE_SEGMENT':
+                why_text = (
+                    f"This segment repeats segment #{gap_to} vertex for vertex. A second copy of a "
+                    f"road counts as an extra connection at both of its endpoints, which can hide "
+                    f"a real gap behind what looks like a junction."
+                )
+            elif issue.get('error_type') == 'OVERLAPPING_SEGMENT':
+                why_text = (
+                    f"This segment runs along segment #{gap_to} for "
+                    f"{issue.get('overlap_length', 0):.4f} units. The shared stretch is digitized "
+                    f"twice, so routing sees two parallel roads where there is one."
+                )
+            elif issue.get('error_type') == 'OVERSHOOT':
+                why_text = (
+                    f"This segment's {endpoint_label} endpoint runs {gap_dist:.4f} units past segment "
+                    f"#{gap_to} and stops there. The tail beyond the crossing is a dead end that no road "
+                    f"continues — the line should end on segment #{gap_to} instead."
+                )
+            elif issue.get('error_type') == 'UNNODED_CROSSING':
+                why_text = (
+                    f"This segment crosses segment #{gap_to} here, but neither has a vertex at the "
+                    f"crossing. Without a shared node, routing cannot turn from one road onto the "
+                    f"other — unless this is a bridge or tunnel, split both segments at this point."
+                )
+            elif issue.get('error_type') == 'SHORT_SEGMENT':
+                why_text = (
+                    f"This segment is only {gap_dist:.4f} units long — far shorter than the "
+                    f"rest of the network. Slivers like this are usually digitizing leftovers "
+                    f"and collapse into a single point once nearby endpoints are snapped."
+                )
             else:
                 why_text = (
                     f"This segment's {endpoint_label} endpoint is only {gap_dist:.4f} units "
@@ -973,7 +3513,16 @@ def create_map(lines: List[LineString], issues: List[Dict]) -> folium.Map:
                 'rule': 'Rule-based gap detection',
                 'ml': 'Isolation Forest ML model',
                 'rule+ml': 'Both rule engine AND ML model agree',
+                'topology': 'Connected-component analysis',
             }.get(src, src)
+            title = {
+                'ISOLATED_SUBNETWORK': '🧩 Isolated Subnetwork',
+                'SHORT_SEGMENT': '📐 Short Segment',
+                'DUPLICATE_SEGMENT': '👯 Duplicate Segment',
+                'OVERLAPPING_SEGMENT': '🪢 Overlapping Segment',
+                'UNNODED_CROSSING': '✖️ Crossing Without Node',
+                'OVERSHOOT': '✂️ Overshoot',
+            }.get(issue.get('error_type'), '🔗 Route Gap Detected')
 
             folium.CircleMarker(location=loc, radius=16, color=color, fill=True,
                 fillColor=color, fillOpacity=0.2, weight=0).add_to(marker_group)
@@ -981,7 +3530,7 @@ def create_map(lines: List[LineString], issues: List[Dict]) -> folium.Map:
                 fill=True, fillColor=color, fillOpacity=0.95,
                 popup=folium.Popup(
                     f"""<div style="font-family:'DM Sans',sans-serif;min-width:260px;padding:4px;">
-                    <h4 style="color:{color};margin:0 0 8px;font-weight:700;">🔗 Route Gap Detected</h4>
+                    <h4 style="color:{color};margin:0 0 8px;font-weight:700;">{title}</h4>
                     <div style="background:#f8fafc;border-radius:8px;padding:8px;">
                         <p style="margin:4px 0;color:#334155;font-size:0.85rem;"><b>Segment:</b> #{issue['geometry_id']}</p>
                         <p style="margin:4px 0;color:#334155;font-size:0.85rem;"><b>Endpoint:</b> {endpoint_label}</p>
@@ -995,7 +3544,7 @@ def create_map(lines: List[LineString], issues: List[Dict]) -> folium.Map:
                         <p style="margin:0;color:#92400e;font-size:0.8rem;font-weight:600;">⚠️ Why is this an error?</p>
                         <p style="margin:4px 0 0;color:#78350f;font-size:0.78rem;line-height:1.4;">{why_text}</p>
                     </div></div>""", max_width=320),
-                tooltip=f"#{issue['geometry_id']} Gap ({sev}) — click for details"
+                tooltip=f"#{issue['geometry_id']} {title[2:]} ({sev}) — click for details"
             ).add_to(marker_group)
         marker_group.add_to(m)
 
@@ -1085,32 +3634,602 @@ def create_map(lines: List[LineString], issues: List[Dict]) -> folium.Map:
     return m
 
 
+# =============================================================================
+# OBSERVABILITY — OpenMetrics Export
+# =============================================================================
+
+# name -> (type, help, histogram buckets)
+METRIC_DEFINITIONS: Dict[str, Tuple[str, str, Tuple[float, ...]]] = {
+    'gapdetector_runs': ('counter', 'Completed pipeline runs.', ()),
+    'gapdetector_segments_processed': ('counter', 'LINESTRING segments fed through the pipeline.', ()),
+    'gapdetector_issues': ('counter', 'Issues reported, by severity and source.', ()),
+    'gapdetector_stage_duration_seconds': (
+        'histogram', 'Wall-clock latency of each pipeline stage.',
+        (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0),
+    ),
+    'gapdetector_cache_requests': ('counter', 'Cache lookups, by cache and hit/miss result.', ()),
+}
+
+OPENMETRICS_CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+
+class MetricsRegistry:
+    """
+    Process-wide counters and histograms rendered as OpenMetrics text.
+    Disabled by default — every recording call returns straight away, so the
+    instrumented pipeline costs one attribute check per call site.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Tuple], float] = defaultdict(float)
+        self._hist_counts: Dict[Tuple[str, Tuple], List[int]] = {}
+        self._hist_sums: Dict[Tuple[str, Tuple], float] = defaultdict(float)
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] += value
+
+    def observe(self, name: str, value: float, **labels):
+        if not self.enabled:
+            return
+        buckets = METRIC_DEFINITIONS[name][2]
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            counts = self._hist_counts.setdefault(key, [0] * (len(buckets) + 1))
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            self._hist_sums[key] += value
+
+    def time(self, stage: str):
+        """Context manager recording a stage latency (a shared no-op when disabled)."""
+        if not self.enabled:
+            return nullcontext()
+        return self._timed(stage)
+
+    @contextmanager
+    def _timed(self, stage: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe('gapdetector_stage_duration_seconds', time.perf_counter() - t0, stage=stage)
+
+    def record_cache(self, cache: str, hit: bool):
+        self.inc('gapdetector_cache_requests', cache=cache, result='hit' if hit else 'miss')
+
+    def record_run(self, n_segments: int, issues: List[Dict]):
+        if not self.enabled:
+            return
+        self.inc('gapdetector_runs')
+        self.inc('gapdetector_segments_processed', n_segments)
+        for issue in issues:
+            self.inc('gapdetector_issues', severity=issue.get('severity', 'MEDIUM'),
+                     source=issue.get('confirmed_by', issue.get('source', 'rule')))
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._hist_counts.clear()
+            self._hist_sums.clear()
+
+    @staticmethod
+    def _fmt_labels(labels: Tuple, extra: Tuple = ()) -> str:
+        items = list(labels) + list(extra)
+        if not items:
+            return ''
+        body = ','.join(
+            '{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+            for k, v in items
+        )
+        return '{' + body + '}'
+
+    def render(self) -> str:
+        """Render all families in OpenMetrics text exposition format."""
+        with self._lock:
+            counters = dict(self._counters)
+            hist_counts = {k: list(v) for k, v in self._hist_counts.items()}
+            hist_sums = dict(self._hist_sums)
+
+        out = []
+        for name, (mtype, help_text, buckets) in METRIC_DEFINITIONS.items():
+            out.append(f"# TYPE {name} {mtype}")
+            out.append(f"# HELP {name} {help_text}")
+            if mtype == 'counter':
+                for (n, labels), value in sorted(counters.items()):
+                    if n == name:
+                        out.append(f"{name}_total{self._fmt_labels(labels)} {value:g}")
+            else:
+                for (n, labels), counts in sorted(hist_counts.items()):
+                    if n != name:
+                        continue
+                    cumulative = 0
+                    for bound, c in zip(list(buckets) + [float('inf')], counts):
+                        cumulative += c
+                        le = '+Inf' if bound == float('inf') else f"{bound:g}"
+                        out.append(f"{name}_bucket{self._fmt_labels(labels, (('le', le),))} {cumulative}")
+                    out.append(f"{name}_count{self._fmt_labels(labels)} {cumulative}")
+                    out.append(f"{name}_sum{self._fmt_labels(labels)} {hist_sums[(n, labels)]:g}")
+        out.append("# EOF")
+        return "\n".join(out) + "\n"
+
+    def write(self, path: str):
+        """Write the current snapshot atomically (safe for node_exporter textfile collectors)."""
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as fh:
+            fh.write(self.render())
+        os.replace(tmp, path)
+
+    def serve(self, port: int, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+        """Serve ``/metrics`` on a daemon thread; idempotent per process."""
+        if self._server is not None:
+            return self._server
+        registry = self
+
+        class _MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', OPENMETRICS_CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.enabled = True
+        self._server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name='metrics-http', daemon=True).start()
+        return self._server
+
+
+METRICS = MetricsRegistry(enabled=os.environ.get(APP_CONFIG['metrics_env'], '') not in ('', '0', 'false'))
+
+
+# =============================================================================
+# CACHING — Process-wide Result Cache
+# =============================================================================
+
+def approx_nbytes(value, _seen: Optional[set] = None) -> int:
+    """
+    Rough memory held by ``value``: array buffers, 16 bytes per geometry
+    coordinate, DataFrame columns, and containers or plain objects by their
+    contents — large ones from an evenly spaced sample. Objects reached twice
+    count once.
+    """
+    seen = _seen if _seen is not None else set()
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    if isinstance(value, np.ndarray):
+        if value.dtype != object:
+            return value.nbytes
+        try:
+            return value.nbytes + int(shapely.get_num_coordinates(value).sum()) * 16 + 64 * value.size
+        except TypeError:
+            return value.nbytes + approx_nbytes(value.ravel().tolist(), seen)
+    if isinstance(value, shapely.Geometry):
+        return 64 + 16 * int(shapely.get_num_coordinates(value))
+    if hasattr(value, 'memory_usage') and hasattr(value, 'columns'):  # DataFrame
+        return int(value.memory_usage(index=True).sum())
+    if isinstance(value, (str, bytes, int, float, bool, type(None))):
+        return sys.getsizeof(value)
+    if isinstance(value, dict):
+        items = list(value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        items = list(value) if not isinstance(value, (list, tuple)) else value
+    else:
+        return sys.getsizeof(value) + (approx_nbytes(vars(value), seen) if hasattr(value, '__dict__') else 0)
+    if not items:
+        return sys.getsizeof(value)
+    sample = items[::max(1, len(items) // 64)]
+    return sys.getsizeof(value) + sum(approx_nbytes(item, seen) for item in sample) * len(items) // len(sample)
+
+
+class ResultCache:
+    """
+    Small thread-safe LRU keyed by content fingerprints; hit rates go to
+    METRICS. With ``max_bytes`` the entries' ``approx_nbytes`` sizes are
+    bounded too, and a value larger than that is returned without caching.
+    """
+
+    def __init__(self, name: str, max_entries: int = 8, max_bytes: Optional[int] = None):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple, object]" = OrderedDict()
+        self._sizes: Dict[Tuple, int] = {}
+
+    def get_or_compute(self, key: Tuple, compute):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                METRICS.record_cache(self.name, hit=True)
+                return self._entries[key]
+        METRICS.record_cache(self.name, hit=False)
+        value = compute()
+        size = approx_nbytes(value) if self.max_bytes is not None else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            return value
+        with self._lock:
+            self.nbytes += size - self._sizes.get(key, 0)
+            self._entries[key] = value
+            self._sizes[key] = size
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries or (
+                    self.max_bytes is not None and self.nbytes > self.max_bytes):
+                old, _ = self._entries.popitem(last=False)
+                self.nbytes -= self._sizes.pop(old)
+        return value
+
+    def __contains__(self, key: Tuple) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.nbytes = 0
+
+
+CORRECTED_CACHE = ResultCache('corrected_network')
+# Intermediate pipeline artifacts, keyed by node and input/parameter hash
+PIPELINE_CACHE = ResultCache('pipeline', max_entries=64, max_bytes=APP_CONFIG['pipeline_cache_mb'] << 20)
+
+
+# =============================================================================
+# BACKGROUND JOBS
+# =============================================================================
+
+class JobCancelled(Exception):
+    """Raised inside a job's worker thread at its next progress report after ``cancel()``."""
+
+
+class JobQueueFull(RuntimeError):
+    pass
+
+
+class Job:
+    """One submitted analysis: status, per-stage progress, partial results, cancel flag."""
+
+    def __init__(self, job_id: str, label: str, owner: Optional[str] = None):
+        self.id = job_id
+        self.label = label
+        self.owner = owner
+        self.status = 'queued'  # queued | running | done | failed | cancelled
+        self.stage = ''
+        self.stage_fraction = 0.0
+        self.stages_done = 0
+        self.stages_total = 0
+        self.partial: Dict[str, object] = {}
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.future = None
+        self.submitted = time.time()
+        self.finished: Optional[float] = None
+        self._cancel = threading.Event()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ('done', 'failed', 'cancelled')
+
+    @property
+    def progress(self) -> float:
+        if self.status == 'done':
+            return 1.0
+        return min(1.0, (self.stages_done + self.stage_fraction) / max(self.stages_total, 1))
+
+    def update(self, stage: str, fraction: float = 0.0, partial=None):
+        if self._cancel.is_set():
+            raise JobCancelled(self.id)
+        if fraction >= 1.0:
+            self.stages_done += 1
+            self.stage_fraction = 0.0
+            if partial is not None:
+                self.partial[stage] = partial
+        else:
+            self.stage, self.stage_fraction = stage, fraction
+
+    def cancel(self):
+        self._cancel.set()
+        if self.future is not None and self.future.cancel():
+            self.status = 'cancelled'
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        if self.future is not None:
+            futures_wait([self.future], timeout)
+        return self.done
+
+
+class JobManager:
+    """
+    Bounded worker pool shared by every session of the server process. At most
+    ``max_workers`` analyses run at once and ``max_pending`` may be queued or
+    running, so one huge upload cannot starve the others. Finished jobs are
+    kept (up to ``keep``) for their sessions to collect.
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 8, keep: int = 32):
+        self.max_pending = max_pending
+        self.keep = keep
+        self.current: contextvars.ContextVar = contextvars.ContextVar('gapdetector_job', default=None)
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix='gapdetector-job')
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, label: str, fn: Callable, *args, owner: Optional[str] = None, **kwargs) -> Job:
+        with self._lock:
+            active = [j for j in self._jobs.values() if not j.done]
+            if len(active) >= self.max_pending:
+                raise JobQueueFull(f"{len(active)} analyses already queued or running")
+            job = Job(os.urandom(6).hex(), label, owner)
+            self._jobs[job.id] = job
+            finished = [j.id for j in self._jobs.values() if j.done]
+            for job_id in finished[:max(0, len(self._jobs) - self.keep)]:
+                del self._jobs[job_id]
+        job.future = self._pool.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job: Job, fn: Callable, args, kwargs):
+        if job._cancel.is_set():
+            job.status = 'cancelled'
+            return
+        job.status = 'running'
+        token = self.current.set(job)
+        try:
+            job.result = fn(*args, **kwargs)
+            job.status = 'done'
+        except JobCancelled:
+            job.status = 'cancelled'
+        except Exception as exc:
+            job.error = exc
+            job.status = 'failed'
+        finally:
+            self.current.reset(token)
+            job.finished = time.time()
+
+    def get(self, job_id: Optional[str]) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id) if job_id else None
+
+    def cancel_owner(self, owner: str):
+        """Cancel a session's unfinished jobs, e.g. when it submits a new analysis."""
+        with self._lock:
+            jobs = [j for j in self._jobs.values() if j.owner == owner and not j.done]
+        for job in jobs:
+            job.cancel()
+
+
+JOBS = JobManager(APP_CONFIG['job_workers'], APP_CONFIG['job_max_pending'])
+
+
+def report_progress(stage: str, fraction: float = 0.0, partial=None):
+    """
+    Progress hook for pipeline stages and long loops; a no-op outside
+    background jobs. ``fraction=1.0`` marks the stage done (``partial``
+    becomes visible to the UI). Raises ``JobCancelled`` once cancelled.
+    """
+    job = JOBS.current.get()
+    if job is not None:
+        job.update(stage, fraction, partial)
+
+
+def report_stages(total: int):
+    """Tell the running job how many stages to expect."""
+    job = JOBS.current.get()
+    if job is not None:
+        job.stages_total = total
+
+
 # =============================================================================
 # COMPUTE STATS
 # =============================================================================
 
-def compute_stats(lines: List[LineString]) -> Dict:
-    lengths = [l.length for l in lines]
-    ep_count: Dict[Tuple, int] = defaultdict(int)
-    prec = APP_CONFIG['precision']
-    for line in lines:
-        c = list(line.coords)
-        s = (round(c[0][0], prec), round(c[0][1], prec))
-        e = (round(c[-1][0], prec), round(c[-1][1], prec))
-        ep_count[s] += 1
-        ep_count[e] += 1
+def compute_stats(lines: List[LineString], node_degree: Optional[np.ndarray] = None) -> Dict:
+    """Network summary; pass ``node_degree`` (from ``endpoint_nodes``) to reuse a built endpoint map."""
+    if node_degree is None:
+        starts, ends = line_endpoints(lines)
+        node_degree = endpoint_nodes(np.concatenate([starts, ends]), APP_CONFIG['precision'])[2]
+    return NetworkStats().add_lines(lines).add_degrees(node_degree).summary()
+
+
+# =============================================================================
+# PIPELINE — Headless Analysis
+# =============================================================================
+
+# parse happens before the DAG (``read_geometry_source``); nodes below take
+# the parsed ``lines`` as their source
+pipeline_node('geoms', ('lines',))(lambda lines: np.asarray(lines, dtype=object))
+pipeline_node('endpoints', ('geoms',))(line_endpoints)
+pipeline_node('endpoint_map', ('endpoints',), ('precision',))(
+    lambda endpoints, precision: endpoint_nodes(np.concatenate(endpoints), precision))
+pipeline_node('spatial_index', ('geoms',))(shapely.STRtree)
+pipeline_node('segments', ('geoms',))(SegmentArrays)
+pipeline_node('duplicates', ('geoms', 'spatial_index', 'segments'), ('precision',))(find_duplicates)
+pipeline_node('crossings', ('geoms', 'spatial_index', 'segments'))(find_crossings)
+# Later copies of duplicated segments, left out of gap analysis on request
+pipeline_node('dropped', ('duplicates',))(lambda duplicates: duplicates.twin != np.arange(len(duplicates.twin)))
+
+
+def _feature_inputs(*extra: str) -> Callable[[Dict], Tuple[str, ...]]:
+    return lambda params: ('lines', 'spatial_index', 'segments', *extra) + (
+        ('dropped',) if params['drop_duplicates'] else ())
+
+
+# Gap columns at dangling endpoints only — what gap detection reads; the
+# full table is completed from it only when a consumer (the ML model) asks
+pipeline_node('gap_features', _feature_inputs(), ('precision',))(
+    lambda lines, tree, segments, dropped=None, precision=6:
+        FeatureExtractor(lines, precision, tree=tree, segments=segments, exclude=dropped).extract_all('dangling'))
+pipeline_node('features', _feature_inputs('gap_features'), ('precision',))(
+    lambda lines, tree, segments, gap_features, dropped=None, precision=6:
+        FeatureExtractor(lines, precision, tree=tree, segments=segments, exclude=dropped).complete(gap_features))
+pipeline_node('gap_threshold', ('gap_features',))(lambda features: GapDetector().adaptive_threshold(features))
+pipeline_node('overshoots', ('crossings', 'geoms', 'endpoint_map', 'gap_threshold'))(find_overshoots)
+pipeline_node('topology', ('lines', 'endpoints', 'spatial_index'), ('precision',))(
+    lambda lines, endpoints, tree, precision: TopologyGraph(lines, precision, endpoints=endpoints, tree=tree))
+pipeline_node('ml_scores', ('features',), ('contamination',))(
+    lambda features, contamination: AnomalyDetector(contamination=contamination).detect(features))
+pipeline_node('scored_features', ('ml_scores',))(lambda ml_scores: ml_scores[0])
+
+
+def _uncut_crossings(issue: Dict, cuts: set) -> Optional[Dict]:
+    """A crossing issue without the crossings in ``cuts``; None when none remain."""
+    gid = issue['geometry_id']
+    crossed = [c for c in issue['crossed'] if (*sorted((gid, c[0])), (c[1], c[2])) not in cuts]
+    if len(crossed) == len(issue['crossed']):
+        return issue
+    return _crossing_issue(gid, crossed, issue['start'], issue['end']) if crossed else None
+
+
+@pipeline_node('issues', lambda params: tuple(f'detect_{name}' for name in params['detectors']))
+def _combine_issues(*detected: List[Dict]) -> List[Dict]:
+    issues = [issue for batch in detected for issue in batch]
+    # An endpoint past the line it crosses is an overshoot, not a gap to that line
+    trimmed = {(i['geometry_id'], i['endpoint']) for i in issues if i['error_type'] == 'OVERSHOOT'}
+    issues = [i for i in issues
+              if i['error_type'] != 'ENDPOINT_GAP' or (i['geometry_id'], i['endpoint']) not in trimmed]
+    # Likewise the crossing an overshoot would be trimmed back to is reported as the overshoot
+    cuts = {(*sorted((i['geometry_id'], i['gap_to_segment'])), i['trim_to'])
+            for i in issues if i['error_type'] == 'OVERSHOOT'}
+    if cuts:
+        issues = [_uncut_crossings(i, cuts) if i['error_type'] == 'UNNODED_CROSSING' else i for i in issues]
+        issues = [i for i in issues if i is not None]
+    # ... and its dangling end is what the ML model flags, so unless the segment
+    # still has a gap the ML flag would report the same endpoint twice
+    gapped = {i['geometry_id'] for i in issues if i['error_type'] == 'ENDPOINT_GAP' and i['source'] != 'ml'}
+    overshot = {gid for gid, _ in trimmed} - gapped
+    issues = [i for i in issues if i['source'] != 'ml' or i['geometry_id'] not in overshot]
+    return DecisionEngine.combine([i for i in issues if i['source'] != 'ml'],
+                                  [i for i in issues if i['source'] == 'ml'])
+
+
+@pipeline_node('fixes', ('lines', 'issues', 'gap_threshold'), ('precision', 'cluster_snap'))
+def _suggest_fixes(lines, issues, gap_threshold, precision, cluster_snap) -> List[Dict]:
+    fixer = AutoFixer(lines, precision)
+    if cluster_snap:
+        return fixer.suggest_batch_fixes(issues, gap_threshold)
+    return fixer.suggest_fixes(issues)
+
+
+# The component graph is built only when its check runs; stats then omit 'subnetworks'
+@pipeline_node('stats', lambda params: ('lines', 'endpoint_map') + (
+    ('topology',) if 'isolated_subnetwork' in params['detectors'] else ()))
+def _network_stats(lines, endpoint_map, topology=None) -> Dict:
+    stats = compute_stats(lines, endpoint_map[2])
+    if topology is not None:
+        stats['subnetworks'] = topology.components()[0]
+    return stats
+
+
+pipeline_node('report', ('issues', 'fixes'))(build_error_report)
+
+
+def run_pipeline(lines: List[LineString], contamination: float = 0.15,
+                 metrics: Optional[MetricsRegistry] = None, cluster_snap: bool = True,
+                 detectors: Optional[Iterable[str]] = None, drop_duplicates: bool = False) -> Dict:
+    """Evaluate the pipeline DAG on parsed lines — the results ``main()`` renders."""
+    metrics = metrics if metrics is not None else METRICS
+    ctx = PipelineContext(lines, {'contamination': contamination, 'cluster_snap': cluster_snap,
+                                  'detectors': detectors, 'drop_duplicates': drop_duplicates}, metrics)
+
+    ml_enabled = 'ml_anomaly' in ctx.params['detectors']
+    targets = ['issues', 'fixes', 'stats', 'gap_threshold', 'scored_features' if ml_enabled else 'gap_features']
+    report_stages(len(ctx.plan(targets)))
+    all_issues = ctx.get('issues')
+    metrics.record_run(len(lines), all_issues)
     return {
-        'total_segments': len(lines),
-        'total_length': round(sum(lengths), 2),
-        'avg_length': round(np.mean(lengths), 2),
-        'min_length': round(min(lengths), 4),
-        'max_length': round(max(lengths), 2),
-        'total_endpoints': len(ep_count),
-        'connected_nodes': sum(1 for c in ep_count.values() if c > 1),
-        'dangling_nodes': sum(1 for c in ep_count.values() if c == 1),
+        'features': ctx.get('scored_features') if ml_enabled else ctx.get('gap_features'),
+        'rule_issues': [i for i in all_issues if i['source'] != 'ml'],
+        'ml_issues': [i for i in all_issues if i['source'] == 'ml'],
+        'issues': all_issues,
+        'fixes': ctx.get('fixes'),
+        'stats': ctx.get('stats'),
+        'network_key': ctx.key('lines'),
+        'gap_threshold': ctx.get('gap_threshold'),
     }
 
 
+# =============================================================================
+# ISSUE BROWSER — Server-side Filter, Sort & Pagination
+# =============================================================================
+
+SEVERITY_RANK = {'HIGH': 0, 'MEDIUM': 1, 'LOW': 2}
+
+
+class IssueTable:
+    """
+    Columnar view of an issue list for the paginated browser. Filters and
+    sorts run over NumPy columns and return issue positions, so only the
+    rows of the visible page are ever formatted, styled or sent to the browser.
+    """
+
+    SORT_KEYS = ('Detection order', 'Gap', 'Severity', 'Confidence', 'Segment')
+
+    def __init__(self, issues: List[Dict]):
+        n = len(issues)
+        self.issues = issues
+        self.segment = np.fromiter((i['geometry_id'] for i in issues), np.int64, n)
+        self.gap = np.fromiter((i.get('gap_distance') or 0.0 for i in issues), np.float64, n)
+        self.confidence = np.fromiter((i.get('confidence') or 0.0 for i in issues), np.float64, n)
+        self.severity = np.fromiter((SEVERITY_RANK.get(i.get('severity', 'MEDIUM'), 1) for i in issues), np.int8, n)
+        self.source = np.array([i.get('source', '') for i in issues], dtype=object)
+
+    def __len__(self) -> int:
+        return len(self.issues)
+
+    @property
+    def sources(self) -> List[str]:
+        return sorted(set(self.source))
+
+    def query(self, severities: Optional[Iterable[str]] = None, sources: Optional[Iterable[str]] = None,
+              gap_range: Optional[Tuple[float, float]] = None, segments: Optional[Iterable[int]] = None,
+              sort_by: str = 'Detection order', descending: bool = False) -> np.ndarray:
+        """Positions of the matching issues in display order."""
+        mask = np.ones(len(self), dtype=bool)
+        if severities is not None:
+            mask &= np.isin(self.severity, [SEVERITY_RANK[s] for s in severities])
+        if sources is not None:
+            mask &= np.isin(self.source, list(sources))
+        if gap_range is not None:
+            mask &= (self.gap >= gap_range[0]) & (self.gap <= gap_range[1])
+        if segments is not None:
+            mask &= np.isin(self.segment, list(segments))
+        idx = np.flatnonzero(mask)
+        column = {'Gap': self.gap, 'Severity': self.severity, 'Confidence': self.confidence,
+                  'Segment': self.segment}.get(sort_by)
+        if column is None:
+            return idx[::-1] if descending else idx
+        keys = column[idx].astype(np.float64)
+        return idx[np.argsort(-keys if descending else keys, kind='stable')]
+
+
+def parse_segment_ids(text: str) -> Optional[List[int]]:
+    """``"12, 40-45"`` -> ids; None for blank input. Raises ValueError on anything else."""
+    ids = []
+    for part in filter(None, (p.strip() for p in text.split(','))):
+        lo, sep, hi = part.partition('-')
+        ids.extend(range(int(lo), int(hi) + 1) if sep else [int(lo)])
+    return ids or None
+
+
 # =============================================================================
 # UI COMPONENTS
 # =============================================================================
@@ -1151,10 +4270,38 @@ def render_issue_table(issues: List[Dict]):
             </div>
         """, unsafe_allow_html=True)
         return
+    cached = st.session_state.get('issue_table')
+    table = cached if cached is not None and cached.issues is issues else IssueTable(issues)
+    st.session_state['issue_table'] = table
+
+    f1, f2, f3, f4 = st.columns([1.2, 1.2, 1.6, 1])
+    severities = f1.multiselect("Severity", list(SEVERITY_RANK), default=list(SEVERITY_RANK), key="issues_severity")
+    # Option-dependent keys: a new result with other sources or gaps starts unfiltered
+    sources = f2.multiselect("Source", table.sources, default=table.sources,
+                             key=f"issues_source_{'_'.join(table.sources)}")
+    lo, hi = float(table.gap.min()), float(table.gap.max())
+    gap_range = f3.slider("Gap (units)", lo, hi, (lo, hi), key=f"issues_gap_{lo}_{hi}") if hi > lo else None
+    search = f4.text_input("Segment #", placeholder="12, 40-45", key="issues_segment")
+    try:
+        segments = parse_segment_ids(search)
+    except ValueError:
+        st.warning("Segment # takes ids and ranges, e.g. `12, 40-45`.")
+        segments = None
+    s1, s2 = st.columns([3, 1])
+    sort_by = s1.selectbox("Sort by", IssueTable.SORT_KEYS, key="issues_sort")
+    descending = s2.toggle("Descending", value=sort_by in ('Gap', 'Confidence'), key=f"issues_desc_{sort_by}")
+
+    filters = (tuple(severities), tuple(sources), gap_range, search, sort_by, descending)
+    order = table.query(severities, sources, gap_range, segments, sort_by, descending)
+    page = _render_pager(len(order), len(table), 'issues', filters)
+
     rows = []
-    for i in issues:
+    for k in order[page]:
+        i = issues[k]
         rows.append({
+            '#': int(k) + 1,
             'Seg #': i['geometry_id'],
+            'Type': i.get('error_type', ''),
             'Endpoint': i.get('endpoint', ''),
             'Gap (units)': f"{i.get('gap_distance', 0):.4f}",
             'Severity': i.get('severity', 'MEDIUM'),
@@ -1162,9 +4309,10 @@ def render_issue_table(issues: List[Dict]):
             'Source': i.get('confirmed_by', i.get('source', '')),
             'Description': i.get('description', ''),
         })
-    df = pd.DataFrame(rows)
-    df.index = df.index + 1
-    df.index.name = '#'
+    if not rows:
+        st.info("No issues match these filters.")
+        return
+    df = pd.DataFrame(rows).set_index('#')
 
     def style_sev(val):
         if val == 'HIGH': return 'background:#fef2f2;color:#991b1b;font-weight:600;'
@@ -1180,6 +4328,73 @@ def render_issue_table(issues: List[Dict]):
     st.markdown("""</div>""", unsafe_allow_html=True)
 
 
+def _render_pager(matching: int, total: int, key: str, filters: tuple, sizes=(25, 50, 100, 250)) -> slice:
+    """Page-size and page controls; returns the slice of the ``matching`` rows on the current page."""
+    if st.session_state.get(f'{key}_filters') != filters:
+        st.session_state[f'{key}_filters'] = filters
+        st.session_state[f'{key}_page'] = 1
+    p1, p2, p3 = st.columns([1, 1, 2])
+    size = p1.selectbox("Rows per page", sizes, index=1, key=f"{key}_page_size")
+    n_pages = max(1, -(-matching // size))
+    if st.session_state.get(f'{key}_page', 1) > n_pages:
+        st.session_state[f'{key}_page'] = n_pages
+    page = p2.number_input("Page", min_value=1, max_value=n_pages, step=1, key=f"{key}_page")
+    start = (page - 1) * size
+    stop = min(start + size, matching)
+    p3.markdown(f"<p style='color:#64748b;font-size:0.85rem;margin-top:2rem;'>Showing {start + 1 if matching else 0:,}–{stop:,} "
+                f"of {matching:,} matching • {total:,} total • page {page} of {n_pages}</p>", unsafe_allow_html=True)
+    return slice(start, stop)
+
+
+def render_feature_table(features: pd.DataFrame):
+    """Paginated per-segment feature view; only the visible page is styled."""
+    display_cols = ['geometry_id', 'length', 'n_vertices', 'vertex_density',
+                    'start_degree', 'end_degree', 'connectivity_score',
+                    'min_gap_start', 'min_gap_end']
+    if 'ml_anomaly' in features.columns:
+        display_cols += ['ml_anomaly', 'ml_score']
+
+    f1, f2, f3, f4 = st.columns([1.4, 1, 1, 1])
+    sort_by = f1.selectbox("Sort by", display_cols, key="features_sort")
+    descending = f2.toggle("Descending", key="features_desc")
+    anomalies_only = f3.toggle("ML anomalies only", key="features_anomalies") if 'ml_anomaly' in features.columns else False
+    search = f4.text_input("Segment #", placeholder="12, 40-45", key="features_segment")
+    try:
+        segments = parse_segment_ids(search)
+    except ValueError:
+        st.warning("Segment # takes ids and ranges, e.g. `12, 40-45`.")
+        segments = None
+
+    mask = np.ones(len(features), dtype=bool)
+    if anomalies_only:
+        mask &= features['ml_anomaly'].to_numpy() == 1
+    if segments is not None:
+        mask &= np.isin(features['geometry_id'].to_numpy(), segments)
+    idx = np.flatnonzero(mask)
+    keys = features[sort_by].to_numpy()[idx]
+    idx = idx[np.argsort(keys, kind='stable')]
+    if descending:
+        idx = idx[::-1]
+    page = _render_pager(len(idx), len(features), 'features', (sort_by, descending, anomalies_only, search))
+
+    feat_display = features.iloc[idx[page]][display_cols]
+    feat_display.index = feat_display.index + 1
+
+    def highlight_anomaly(val):
+        if val == 1:
+            return 'background:#fef2f2;color:#991b1b;font-weight:600;'
+        return ''
+
+    if 'ml_anomaly' in feat_display.columns:
+        st.dataframe(feat_display.style.map(highlight_anomaly, subset=['ml_anomaly']),
+                     use_container_width=True, height=400)
+    else:
+        st.dataframe(feat_display, use_container_width=True, height=400)
+    if features['min_gap_start'].isna().any() or features['min_gap_end'].isna().any():
+        st.caption("Gaps are measured at dangling endpoints only; connected endpoints show blanks "
+                   "unless the ML check, which reads every gap, is enabled.")
+
+
 def render_stats(stats: Dict, issues: List[Dict]):
     st.markdown("""
         <div class="stats-grid">
@@ -1187,6 +4402,7 @@ def render_stats(stats: Dict, issues: List[Dict]):
                 <h4>📏 Network Metrics</h4>
                 <div class="stat-item"><span class="stat-label">Total Length</span><span class="stat-value">{:,.2f}</span></div>
                 <div class="stat-item"><span class="stat-label">Avg Segment</span><span class="stat-value">{:.2f}</span></div>
+                <div class="stat-item"><span class="stat-label">Median Segment</span><span class="stat-value">{}</span></div>
                 <div class="stat-item"><span class="stat-label">Shortest</span><span class="stat-value">{:.4f}</span></div>
                 <div class="stat-item"><span class="stat-label">Longest</span><span class="stat-value">{:.2f}</span></div>
             </div>
@@ -1196,11 +4412,13 @@ def render_stats(stats: Dict, issues: List[Dict]):
                 <div class="stat-item"><span class="stat-label">Connected</span><span class="stat-value">{}</span></div>
                 <div class="stat-item"><span class="stat-label">Dangling</span><span class="stat-value">{}</span></div>
                 <div class="stat-item"><span class="stat-label">Segments</span><span class="stat-value">{}</span></div>
+                <div class="stat-item"><span class="stat-label">Subnetworks</span><span class="stat-value">{}</span></div>
             </div>
         </div>
     """.format(
-        stats['total_length'], stats['avg_length'], stats['min_length'], stats['max_length'],
-        stats['total_endpoints'], stats['connected_nodes'], stats['dangling_nodes'], stats['total_segments']
+        stats['total_length'], stats['avg_length'], stats.get('median_length', '—'),
+        stats['min_length'], stats['max_length'], stats['total_endpoints'], stats['connected_nodes'], stats['dangling_nodes'], stats['total_segments'],
+        stats.get('subnetworks', '—')
     ), unsafe_allow_html=True)
 
     if stats['total_segments'] > 0:
@@ -1335,19 +4553,13 @@ def render_examples():
 
             # Show persisted results from session state
             if st.session_state.get(f'example_result_{ex["key"]}') == ex['key']:
-                _run_example(ex['wkt'], ex['key'])
+                _run_example(ex['key'])
 
 
-def _run_example(wkt_data: str, label: str):
-    """Analyse an example dataset inline — results persist via session state."""
-    lines = parse_wkt(wkt_data)
-    if not lines:
-        st.error("Could not parse example.")
-        return
-    extractor = FeatureExtractor(lines, APP_CONFIG['precision'])
-    features = extractor.extract_all()
-    detector = GapDetector()
-    issues = detector.detect(features)
+def _run_example(label: str):
+    """Show a built-in example's precomputed analysis inline — results persist via session state."""
+    example = _builtin_datasets()[label]
+    lines, issues = example.lines, example.gap_issues
 
     if issues:
         st.error(f"🔗 **{len(issues)} gap(s) detected!**")
@@ -1359,7 +4571,7 @@ def _run_example(wkt_data: str, label: str):
         st.success("✅ **No gaps detected.** All endpoints connect properly.")
 
     map_obj = create_map(lines, issues)
-    st_folium(map_obj, height=350, use_container_width=True, returned_objects=[])
+    streamlit_folium.st_folium(map_obj, height=350, use_container_width=True, returned_objects=[])
     if st.button("✕ Clear Result", key=f"clear_{label}"):
         del st.session_state[f'example_result_{label}']
         st.rerun()
@@ -1528,7 +4740,7 @@ def render_info_sections():
                 LINESTRING(x1 y1, x2 y2, x3 y3, ...)<br>
                 LINESTRING(x1 y1, x2 y2, ...)
             </div>
-            <p style="color:#475569;font-size:0.9rem;margin:0.75rem 0 0;">Each line is a valid WKT LINESTRING. Coordinates in any projected CRS.</p>
+            <p style="color:#475569;font-size:0.9rem;margin:0.75rem 0 0;">Each line is a valid WKT LINESTRING. Coordinates in any projected CRS. <code>.gz</code>, <code>.bz2</code>, <code>.xz</code> and multi-file <code>.zip</code> bundles are read directly.</p>
         </div>
     """, unsafe_allow_html=True)
 
@@ -1718,7 +4930,7 @@ def render_onboarding():
             st.rerun()
 
 
-def render_sidebar() -> Tuple[Optional[str], float]:
+def render_sidebar() -> Tuple[Optional[Union[str, Tuple[str, bytes]]], float]:
     with st.sidebar:
         st.markdown(f"""
             <div style="text-align:center;padding:1rem 0;">
@@ -1731,8 +4943,10 @@ def render_sidebar() -> Tuple[Optional[str], float]:
         st.divider()
         st.markdown("### 📁 Data Input")
         uploader_key = st.session_state.get('uploader_key', 0)
-        uploaded = st.file_uploader("Upload .wkt / .txt", type=['wkt', 'txt'],
-            help="LINESTRING geometries", key=f"file_uploader_{uploader_key}")
+        uploaded = st.file_uploader("Upload .wkt / .txt", type=UPLOAD_TYPES,
+            help="LINESTRING geometries as WKT (.gz/.bz2/.xz/.zip bundles are decompressed on the fly), "
+                 "WKB, GeoPackage, GeoParquet or FlatGeobuf",
+            key=f"file_uploader_{uploader_key}")
         use_demo = st.button("🎯 Load Demo Data", type="primary", use_container_width=True)
         if uploaded is not None or st.session_state.get('data_source'):
             if st.button("🔄 Clear Loaded Data", use_container_width=True):
@@ -1761,6 +4975,14 @@ def render_sidebar() -> Tuple[Optional[str], float]:
         </div>
         """, unsafe_allow_html=True)
 
+        st.toggle("🧲 Cluster-aware snapping", value=True, key="cluster_snap",
+            help="Snap groups of nearby dangling endpoints to one shared node instead of each to its nearest line")
+        st.toggle("🧹 Ignore duplicate copies", value=False, key="drop_duplicates",
+            help="Leave repeated segments out of gap detection so they cannot mask gaps (they are still reported)")
+        st.multiselect("🧪 Checks", list(DETECTORS), default=list(DETECTORS), key="detectors",
+            format_func=lambda name: DETECTORS[name].label,
+            help="Detectors to run — all share one feature table and spatial index")
+
         st.divider()
         st.markdown("### 🔗 Error Type Focus")
         st.markdown("""
@@ -1781,15 +5003,16 @@ def render_sidebar() -> Tuple[Optional[str], float]:
 
     wkt_data = None
     if use_demo:
-        wkt_data = DEMO_WKT_DATA
+        wkt_data = demo_wkt()
         st.session_state['data_source'] = 'demo'
         st.session_state['uploaded_wkt'] = None
     elif uploaded is not None:
-        wkt_data = uploaded.read().decode('utf-8')
+        # Keep the raw (possibly compressed) bytes; decoding happens while parsing
+        wkt_data = (uploaded.name, uploaded.getvalue())
         st.session_state['data_source'] = 'upload'
         st.session_state['uploaded_wkt'] = wkt_data
     elif st.session_state.get('data_source') == 'demo':
-        wkt_data = DEMO_WKT_DATA
+        wkt_data = demo_wkt()
     elif st.session_state.get('data_source') == 'upload' and st.session_state.get('uploaded_wkt'):
         wkt_data = st.session_state['uploaded_wkt']
 
@@ -1800,6 +5023,123 @@ def render_sidebar() -> Tuple[Optional[str], float]:
 # MAIN
 # =============================================================================
 
+@_deferred_st('cache_resource')
+def _shared_metrics() -> MetricsRegistry:
+    """One registry per server process — Streamlit re-executes this module on every rerun."""
+    registry = MetricsRegistry(enabled=METRICS.enabled)
+    port = os.environ.get(APP_CONFIG['metrics_port_env'])
+    if port:
+        registry.serve(int(port))
+    return registry
+
+
+@_deferred_st('cache_resource')
+def _shared_cache(name: str, max_entries: int = 8, max_bytes: Optional[int] = None) -> ResultCache:
+    """Result caches shared read-only by every session of this server process."""
+    return ResultCache(name, max_entries, max_bytes)
+
+
+@_deferred_st('cache_resource')
+def _shared_jobs() -> JobManager:
+    """One bounded worker pool for every session of this server process."""
+    return JobManager(APP_CONFIG['job_workers'], APP_CONFIG['job_max_pending'])
+
+
+class BuiltinDataset(NamedTuple):
+    lines: List[LineString]
+    gap_issues: List[Dict]  # endpoint-gap check alone, as shown in the Examples tab
+    result: Dict            # run_pipeline() at the sidebar defaults
+    key: tuple              # _analysis_key() the result answers
+
+
+@_deferred_st('cache_resource', show_spinner=False)
+def _builtin_datasets() -> Dict[str, BuiltinDataset]:
+    """
+    Parse and analyse the demo network and ``BUILTIN_EXAMPLES`` once per server
+    process, the first time a session loads the demo or runs an example (never
+    on the welcome page). Every session reads the same objects, so later demo
+    and example clicks skip parsing and the pipeline; treat them as read-only.
+    """
+    detectors = list(DETECTORS)
+    contamination = PIPELINE_DEFAULTS['contamination']
+    datasets = {}
+    for name, wkt in {'demo': demo_wkt(), **BUILTIN_EXAMPLES}.items():
+        lines = parse_wkt(wkt)
+        result = run_pipeline(lines, contamination, cluster_snap=True, detectors=detectors)
+        # Shares the features node run_pipeline just cached
+        gap_issues = run_detectors(PipelineContext(lines), ['endpoint_gap'])
+        datasets[name] = BuiltinDataset(lines, gap_issues, result,
+                                        _analysis_key(lines, contamination, True, detectors, False))
+    return datasets
+
+
+def _analysis_key(lines: List[LineString], contamination: float, cluster_snap: bool,
+                  detectors: Optional[List[str]], drop_duplicates: bool = False) -> tuple:
+    return (network_fingerprint(lines), contamination, cluster_snap,
+            tuple(detectors) if detectors is not None else None, drop_duplicates)
+
+
+@_deferred_st('fragment', run_every=0.5)
+def _render_job_progress(job_id: str):
+    """Poll a running analysis; a full rerun picks up the result once it finishes."""
+    job = JOBS.get(job_id)
+    if job is None or job.done:
+        st.rerun()
+    stage = job.stage.replace('_', ' ') if job.status == 'running' else 'waiting for a free worker'
+    st.progress(job.progress, text=f"🔍 Analyzing {job.label} — {stage}…")
+    found = {name[len('detect_'):]: len(value) for name, value in list(job.partial.items())
+             if name.startswith('detect_')}
+    if found:
+        st.caption(" • ".join(f"{DETECTORS[name].label}: {n}" for name, n in found.items() if name in DETECTORS))
+    if st.button("✖ Cancel analysis", key=f"cancel_{job_id}"):
+        job.cancel()
+        st.rerun()
+
+
+def _analysis_result(lines: List[LineString], contamination: float, cluster_snap: bool,
+                     detectors: Optional[List[str]], drop_duplicates: bool = False) -> Optional[Dict]:
+    """
+    Result of the session's background analysis for these inputs, submitting
+    it when needed. Returns None (after rendering progress or status) while it
+    is not available yet.
+    """
+    key = _analysis_key(lines, contamination, cluster_snap, detectors, drop_duplicates)
+    # Uploads never match a built-in, so only the demo pays for building them
+    if st.session_state.get('data_source') == 'demo':
+        builtin = next((d.result for d in _builtin_datasets().values() if d.key == key), None)
+        if builtin is not None:
+            return builtin
+    owner = st.session_state.setdefault('session_id', os.urandom(6).hex())
+    job = JOBS.get(st.session_state.get('analysis_job_id'))
+    if job is None or st.session_state.get('analysis_job_key') != key:
+        JOBS.cancel_owner(owner)
+        try:
+            job = JOBS.submit(f"{len(lines)} segments", run_pipeline, lines, contamination,
+                              cluster_snap=cluster_snap, detectors=detectors,
+                              drop_duplicates=drop_duplicates, owner=owner)
+        except JobQueueFull:
+            st.warning("⏳ The server is busy with other analyses — please try again in a moment.")
+            return None
+        st.session_state['analysis_job_id'] = job.id
+        st.session_state['analysis_job_key'] = key
+
+    # Small inputs finish within the grace period and render straight away
+    with st.spinner(f"🔍 Analyzing {len(lines)} segments for endpoint gaps..."):
+        job.wait(APP_CONFIG['job_grace_seconds'])
+    if job.status == 'done':
+        return job.result
+    if job.status == 'failed':
+        st.error(f"Analysis failed: {job.error}")
+    elif job.status == 'cancelled':
+        st.info("Analysis cancelled.")
+        if st.button("▶️ Run again", key="rerun_analysis"):
+            st.session_state.pop('analysis_job_id', None)
+            st.rerun()
+    else:
+        _render_job_progress(job.id)
+    return None
+
+
 def main():
     st.set_page_config(
         page_title=APP_CONFIG['title'],
@@ -1809,6 +5149,12 @@ def main():
     )
     st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
 
+    global METRICS, CORRECTED_CACHE, PIPELINE_CACHE, JOBS
+    METRICS = _shared_metrics()
+    JOBS = _shared_jobs()
+    CORRECTED_CACHE = _shared_cache('corrected_network')
+    PIPELINE_CACHE = _shared_cache('pipeline', 64, APP_CONFIG['pipeline_cache_mb'] << 20)
+
     if 'data_source' not in st.session_state:
         st.session_state['data_source'] = None
 
@@ -1817,7 +5163,18 @@ def main():
 
     if wkt_data:
         # 1. Parse
-        lines = parse_wkt(wkt_data)
+        with METRICS.time('parse'):
+            if isinstance(wkt_data, tuple):
+                name, payload = wkt_data
+                try:
+                    lines = read_geometry_source(name, io.BytesIO(payload))
+                except READ_ERRORS as exc:
+                    st.error(f"Could not read {name}: {exc}")
+                    return
+            elif wkt_data == demo_wkt():
+                lines = _builtin_datasets()['demo'].lines
+            else:
+                lines = parse_wkt(wkt_data)
         if not lines:
             st.error("No valid LINESTRING geometries found in the uploaded file.")
             return
@@ -1833,29 +5190,14 @@ def main():
                 <span style="background:linear-gradient(135deg,#10b981,#059669);color:white;padding:0.35rem 1.2rem;border-radius:100px;font-size:0.82rem;font-weight:600;letter-spacing:0.02em;">
                 📄 Uploaded File — {len(lines)} Segments Parsed</span></div>""", unsafe_allow_html=True)
 
-        with st.spinner(f"🔍 Analyzing {len(lines)} segments for endpoint gaps..."):
-            # 2. Feature Extraction
-            extractor = FeatureExtractor(lines, APP_CONFIG['precision'])
-            features = extractor.extract_all()
-
-            # 3. Gap Detection (rule-based)
-            gap_detector = GapDetector()
-            rule_issues = gap_detector.detect(features)
-
-            # 4. ML Anomaly Detection
-            ml_detector = AnomalyDetector(contamination=contamination)
-            features, ml_issues = ml_detector.detect(features)
-
-            # 5. Decision Logic
-            all_issues = DecisionEngine.combine(rule_issues, ml_issues)
-
-            # 6. Auto-fix suggestions
-            fixer = AutoFixer(lines, APP_CONFIG['precision'])
-            fixes = fixer.suggest_fixes(all_issues)
-
-            # 7. Stats & Report
-            stats = compute_stats(lines)
-            report = build_error_report(all_issues, fixes)
+        result = _analysis_result(lines, contamination, st.session_state.get('cluster_snap', True),
+                                  st.session_state.get('detectors'), st.session_state.get('drop_duplicates', False))
+        if result is None:
+            return
+        features = result['features']
+        all_issues = result['issues']
+        fixes = result['fixes']
+        stats = result['stats']
 
         render_metrics(stats, all_issues)
 
@@ -1877,7 +5219,7 @@ def main():
                 </p>
             """, unsafe_allow_html=True)
             st.markdown('<div class="map-container">', unsafe_allow_html=True)
-            st_folium(create_map(lines, all_issues), height=550, use_container_width=True, returned_objects=[])
+            streamlit_folium.st_folium(create_map(lines, all_issues), height=550, use_container_width=True, returned_objects=[])
             st.markdown('</div>', unsafe_allow_html=True)
 
             # Map layer legend / explanation
@@ -1909,22 +5251,32 @@ def main():
             render_issue_table(all_issues)
             if all_issues:
                 st.markdown("<br>", unsafe_allow_html=True)
-                col1, col2, col3 = st.columns(3)
+                col1, col2, col3, col4 = st.columns(4)
+                # Payloads are produced only when a button is clicked, then
+                # streamed through a spool file instead of one big string
                 with col1:
-                    csv = pd.DataFrame([{
-                        'Segment': i['geometry_id'], 'Endpoint': i.get('endpoint',''),
-                        'Gap': i.get('gap_distance',0), 'Severity': i.get('severity',''),
-                        'Confidence': i.get('confidence',0), 'Source': i.get('confirmed_by',''),
-                        'Description': i.get('description','')
-                    } for i in all_issues]).to_csv(index=False)
-                    st.download_button("📥 CSV", csv, "gap_report.csv", "text/csv", use_container_width=True)
+                    st.download_button("📥 CSV", lambda: spool_report(iter_report_csv(all_issues)),
+                        "gap_report.csv", "text/csv", use_container_width=True)
                 with col2:
-                    st.download_button("📥 JSON", json.dumps(report, indent=2),
+                    st.download_button("📥 JSON", lambda: spool_report(iter_report_json(all_issues, fixes)),
                         "error_report.json", "application/json", use_container_width=True)
                 with col3:
                     st.download_button("📥 Report (.txt)",
-                        generate_text_report(stats, all_issues, fixes),
+                        lambda: spool_report(line + "\n" for line in iter_text_report(stats, all_issues, fixes)),
                         "gap_report.txt", "text/plain", use_container_width=True)
+                with col4:
+                    if importlib.util.find_spec('pyarrow') is not None:
+                        def _parquet_bundle():
+                            spool = tempfile.SpooledTemporaryFile(max_size=8 << 20)
+                            write_columnar_bundle(spool, features, all_issues,
+                                                  corrected_network(lines, fixes, result['network_key']))
+                            spool.seek(0)
+                            return spool
+                        st.download_button("📥 Parquet (.zip)", _parquet_bundle, "gap_results_parquet.zip",
+                            "application/zip", use_container_width=True,
+                            help="features, issues and corrected network as GeoParquet (WKB geometry)")
+                    else:
+                        st.caption("Install `pyarrow` for Parquet export")
 
         with tab3:
             st.markdown("""<div class="section-header"><span class="icon">🔧</span><h3>Auto-Fix — Snap Endpoints</h3></div>""", unsafe_allow_html=True)
@@ -1934,30 +5286,57 @@ def main():
                 </p>""", unsafe_allow_html=True)
                 fix_df = pd.DataFrame([{
                     'Seg #': f['geometry_id'],
+                    'Action': 'Trim' if f['fix_type'] == 'TRIM_ENDPOINT' else 'Snap',
                     'Endpoint': f['endpoint'],
                     'Original': f"({f['original_coord'][0]}, {f['original_coord'][1]})",
                     'Fix To': f"({f['suggested_coord'][0]}, {f['suggested_coord'][1]})",
                     'Snap To Seg': f"#{f['snap_to_segment']}",
                     'Gap': f"{f['distance']:.4f}",
+                    'Cluster': f"#{f['cluster_id']} ({f['cluster_size']})" if 'cluster_id' in f else '',
                 } for f in fixes])
                 fix_df.index = fix_df.index + 1
                 st.dataframe(fix_df, use_container_width=True, height=300)
 
                 st.markdown("---")
-                corrected_lines = list(lines)
-                for fix in fixes:
-                    gid = fix['geometry_id'] - 1
-                    if gid >= len(corrected_lines):
-                        continue
-                    coords = list(corrected_lines[gid].coords)
-                    if fix['endpoint'] == 'start':
-                        coords[0] = fix['suggested_coord']
+                formats = ['wkt', 'wkb'] + (['parquet'] if importlib.util.find_spec('pyarrow') else [])
+                fmt = st.radio("Output format", formats, horizontal=True, key="corrected_fmt",
+                               format_func={'wkt': 'WKT', 'wkb': 'Hex WKB', 'parquet': 'GeoParquet'}.get)
+                ext, mime = NETWORK_FORMATS[fmt]
+
+                def _corrected_payload():
+                    spool = tempfile.SpooledTemporaryFile(max_size=8 << 20)
+                    write_network(spool, corrected_network(lines, fixes, result['network_key']), fmt)
+                    spool.seek(0)
+                    return spool
+
+                st.download_button(f"📥 Download Corrected {ext}", _corrected_payload,
+                    f"corrected_network{ext}", mime, use_container_width=True)
+
+                # Apply & verify: iterate snaps until every fixable gap is closed
+                verify_key = f"verified_{result['network_key']}_{fixes_fingerprint(fixes)}"
+                if st.button("🔁 Apply & Verify Fixes", key="apply_verify", use_container_width=True,
+                             help="Apply snaps, re-check only the touched endpoints and repeat until converged"):
+                    st.session_state[verify_key] = AutoFixer(lines, APP_CONFIG['precision']).apply_and_verify(
+                        all_issues, result['gap_threshold'], fixes=fixes)
+                verified = st.session_state.get(verify_key)
+                if verified:
+                    if verified['converged']:
+                        st.success(f"✅ Converged after {len(verified['trace'])} round(s) — "
+                                   f"{len(verified['fixes'])} fixes applied, no fixable gaps remain.")
                     else:
-                        coords[-1] = fix['suggested_coord']
-                    corrected_lines[gid] = LineString(coords)
-                corrected_wkt = "\n".join(l.wkt for l in corrected_lines)
-                st.download_button("📥 Download Corrected .wkt", corrected_wkt,
-                    "corrected_network.wkt", "text/plain", use_container_width=True)
+                        st.warning(f"⚠️ Stopped after {len(verified['trace'])} rounds with "
+                                   f"{verified['trace'][-1]['remaining_gaps']} gap(s) left.")
+                    trace_df = pd.DataFrame(verified['trace']).set_index('iteration')
+                    st.dataframe(trace_df, use_container_width=True)
+
+                    def _verified_payload():
+                        spool = tempfile.SpooledTemporaryFile(max_size=8 << 20)
+                        write_network(spool, verified['lines'], fmt)
+                        spool.seek(0)
+                        return spool
+
+                    st.download_button(f"📥 Download Verified {ext}", _verified_payload,
+                        f"verified_network{ext}", mime, use_container_width=True)
             else:
                 st.markdown("""
                     <div style="text-align:center;padding:2.5rem;background:linear-gradient(135deg,rgba(16,185,129,0.1),rgba(5,150,105,0.1));border-radius:16px;">
@@ -1985,24 +5364,7 @@ def main():
                     st.markdown("""<p style="color:#64748b;font-size:0.85rem;margin-bottom:0.75rem;">
                         Per-segment features used by the rule engine and ML model. Scroll right to see all columns.
                     </p>""", unsafe_allow_html=True)
-                    display_cols = ['geometry_id', 'length', 'n_vertices', 'vertex_density',
-                                    'start_degree', 'end_degree', 'connectivity_score',
-                                    'min_gap_start', 'min_gap_end']
-                    if 'ml_anomaly' in features.columns:
-                        display_cols += ['ml_anomaly', 'ml_score']
-                    feat_display = features[display_cols].copy()
-                    feat_display.index = feat_display.index + 1
-
-                    def highlight_anomaly(val):
-                        if val == 1:
-                            return 'background:#fef2f2;color:#991b1b;font-weight:600;'
-                        return ''
-
-                    if 'ml_anomaly' in feat_display.columns:
-                        st.dataframe(feat_display.style.map(highlight_anomaly, subset=['ml_anomaly']),
-                                     use_container_width=True, height=400)
-                    else:
-                        st.dataframe(feat_display, use_container_width=True, height=400)
+                    render_feature_table(features)
 
         with tab7:
             st.markdown("""<div class="section-header"><span class="icon">⚙️</span><h3>How It Works</h3></div>""", unsafe_allow_html=True)
@@ -2015,5 +5377,423 @@ def main():
         render_welcome()
 
 
+# =============================================================================
+# HEADLESS CLI
+# =============================================================================
+
+# =============================================================================
+# HTTP VALIDATION SERVICE
+# =============================================================================
+
+# Content-Type -> file name the readers dispatch on (``?name=`` overrides)
+SERVICE_CONTENT_TYPES = {
+    'text/plain': 'body.wkt',
+    'application/wkt': 'body.wkt',
+    'application/wkb': 'body.wkb',
+    'application/gzip': 'body.wkt.gz',
+    'application/zip': 'body.zip',
+    'application/geopackage+sqlite3': 'body.gpkg',
+    'application/vnd.apache.parquet': 'body.parquet',
+    'application/flatgeobuf': 'body.fgb',
+}
+
+
+class ServiceError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class ValidationService:
+    """
+    Stdlib HTTP front end running the same pipeline as the UI:
+
+    * ``POST /validate`` — geometry in the body (WKT, WKB, GeoPackage, …; type
+      from ``?name=`` or Content-Type), or an empty body with ``?path=`` naming
+      a file under ``data_root``. Optional ``contamination``, ``cluster_snap``,
+      ``drop_duplicates`` and ``detectors`` query parameters. Returns the ``build_error_report`` JSON.
+    * ``GET /health``
+
+    Connections are HTTP/1.1 keep-alive, each served on its own thread; the
+    analyses themselves run on the shared bounded ``JOBS`` pool. At most
+    ``max_active`` requests (default: the pool's ``max_pending``) may be
+    reading, parsing or waiting at once — further ones get 503 before their
+    body is read, so memory stays bounded. Bodies over ``max_body_mb`` are
+    refused with 413 and analyses running past ``analysis_timeout`` seconds
+    are cancelled with 504.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 8765, data_root: Optional[str] = None,
+                 max_body_mb: float = 256, timeout: float = 30, analysis_timeout: float = 600,
+                 max_active: Optional[int] = None):
+        self.host = host
+        self.port = port
+        self.data_root = os.path.realpath(data_root) if data_root else None
+        self.max_body = int(max_body_mb * (1 << 20))
+        self.timeout = timeout
+        self.analysis_timeout = analysis_timeout
+        self._active = threading.BoundedSemaphore(max_active or JOBS.max_pending)
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2] if self._server else (self.host, self.port)
+        return f"http://{host}:{port}"
+
+    def _resolve(self, rel_path: str) -> str:
+        if self.data_root is None:
+            raise ServiceError(403, "file references are disabled (no data root configured)")
+        path = os.path.realpath(os.path.join(self.data_root, rel_path))
+        if os.path.commonpath([path, self.data_root]) != self.data_root:
+            raise ServiceError(403, "path is outside the data root")
+        if not os.path.isfile(path):
+            raise ServiceError(404, f"no such file: {rel_path}")
+        return path
+
+    @staticmethod
+    def _options(query: Dict[str, List[str]]) -> Dict:
+        """Pipeline keyword arguments from the query string (400 on bad values)."""
+        detectors = query['detectors'][0].split(',') if 'detectors' in query else None
+        unknown = set(detectors or ()) - set(DETECTORS)
+        if unknown:
+            raise ServiceError(400, f"unknown detector(s): {', '.join(sorted(unknown))}")
+        try:
+            contamination = float(query.get('contamination', ['0.15'])[0])
+        except ValueError:
+            raise ServiceError(400, "contamination must be a number")
+        if not 0 < contamination <= 0.5:  # also rejects nan
+            raise ServiceError(400, "contamination must be in (0, 0.5]")
+        return {
+            'contamination': contamination,
+            'cluster_snap': query.get('cluster_snap', ['1'])[0] not in ('0', 'false', 'no'),
+            'drop_duplicates': query.get('drop_duplicates', ['0'])[0] not in ('0', 'false', 'no'),
+            'detectors': detectors,
+        }
+
+    def validate(self, name: str, stream: BinaryIO, query: Dict[str, List[str]]) -> Dict:
+        options = self._options(query)
+        try:
+            lines = read_geometry_source(name, stream)
+        except READ_ERRORS as exc:
+            raise ServiceError(400, f"could not read {name}: {exc}")
+        if not lines:
+            raise ServiceError(422, "no valid LINESTRING geometries")
+        try:
+            job = JOBS.submit(f"{len(lines)} segments (http)", run_pipeline, lines, **options)
+        except JobQueueFull as exc:
+            raise ServiceError(503, f"busy: {exc}")
+        if not job.wait(self.analysis_timeout):
+            job.cancel()
+            raise ServiceError(504, f"analysis exceeded {self.analysis_timeout:g}s and was cancelled")
+        if job.status != 'done':
+            raise ServiceError(500, f"analysis {job.status}: {job.error}")
+        return job.result
+
+    def _handler(self) -> type:
+        service = self
+
+        class _ValidationHandler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # keep-alive: every response carries Content-Length
+            timeout = service.timeout      # idle keep-alive connections are dropped after this
+
+            def _send(self, status: int, body: bytes, content_type: str = 'application/json'):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                if self.close_connection:
+                    self.send_header('Connection', 'close')
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_json(self, status: int, payload):
+                self._send(status, json.dumps(payload, default=_json_default).encode('utf-8'))
+
+            def do_GET(self):
+                if self.path.split('?', 1)[0] != '/health':
+                    self._send_json(404, {'error': 'not found'})
+                    return
+                self._send_json(200, {'status': 'ok', 'version': APP_CONFIG['version'],
+                                      'detectors': list(DETECTORS)})
+
+            def do_POST(self):
+                from urllib.parse import urlsplit, parse_qs
+                url = urlsplit(self.path)
+                query = parse_qs(url.query)
+                length = self.headers.get('Content-Length')
+                try:
+                    if self.headers.get('Transfer-Encoding'):
+                        raise ServiceError(411, 'chunked bodies are not supported; send Content-Length')
+                    if not (length or '0').isdigit():
+                        raise ServiceError(400, 'invalid Content-Length')
+                    if int(length or 0) > service.max_body:
+                        raise ServiceError(413, f"body exceeds {service.max_body} bytes")
+                    service._options(query)
+                    if not service._active.acquire(blocking=False):
+                        raise ServiceError(503, 'busy: too many requests in flight')
+                except ServiceError as exc:
+                    # The body stays unread, so this connection cannot carry another request
+                    self.close_connection = True
+                    self._send_json(exc.status, {'error': str(exc)})
+                    return
+                try:
+                    body = self.rfile.read(int(length or 0))
+                    if url.path != '/validate':
+                        raise ServiceError(404, 'not found')
+                    if 'path' in query:
+                        path = service._resolve(query['path'][0])
+                        with open(path, 'rb') as fh:
+                            result = service.validate(path, fh, query)
+                    else:
+                        if not body:
+                            raise ServiceError(400, 'empty body (send geometry or ?path=)')
+                        content_type = (self.headers.get('Content-Type') or 'text/plain').split(';')[0].strip()
+                        name = query.get('name', [SERVICE_CONTENT_TYPES.get(content_type, 'body.wkt')])[0]
+                        result = service.validate(name, io.BytesIO(body), query)
+                    body = ''.join(iter_report_json(result['issues'], result['fixes'])).encode('utf-8')
+                except ServiceError as exc:
+                    self._send_json(exc.status, {'error': str(exc)})
+                    return
+                except Exception as exc:
+                    self._send_json(500, {'error': f"internal error: {type(exc).__name__}: {exc}"})
+                    return
+                finally:
+                    service._active.release()
+                self._send(200, body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return _ValidationHandler
+
+    def bind(self) -> ThreadingHTTPServer:
+        self._server = ThreadingHTTPServer((self.host, self.port), self._handler())
+        self._server.daemon_threads = True
+        return self._server
+
+    def start(self) -> ThreadingHTTPServer:
+        """Serve on a daemon thread (tests, embedding); ``port=0`` picks a free port."""
+        server = self.bind()
+        threading.Thread(target=server.serve_forever, name='validation-http', daemon=True).start()
+        return server
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def _serve(args) -> int:
+    global JOBS
+    JOBS = JobManager(args.workers, args.max_pending)
+    if args.metrics_port:
+        METRICS.serve(args.metrics_port)
+    service = ValidationService(args.host, args.port, args.data_root, args.max_body_mb,
+                                analysis_timeout=args.analysis_timeout)
+    server = service.bind()
+    print(f"Validation service on {service.url} (POST /validate, GET /health)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+def _check_out_of_core(path: str, args) -> int:
+    """``check`` for one WKT input too large to hold in memory."""
+    # OutOfCoreAnalyzer runs the endpoint-gap check alone
+    if args.detectors is not None and 'endpoint_gap' not in args.detectors:
+        print(f"{path}: out-of-core mode only checks endpoint_gap, which --detectors excludes", file=sys.stderr)
+        return 1
+    ignored = sorted(set(args.detectors or ()) - {'endpoint_gap'})
+    if ignored:
+        print(f"  --detectors {','.join(ignored)} need the in-memory pipeline; skipped", file=sys.stderr)
+    if args.drop_duplicates:
+        print("  --drop-duplicates needs the in-memory pipeline; ignored", file=sys.stderr)
+    with tempfile.TemporaryDirectory(prefix='gapdetector-', dir=args.work_dir) as scratch:
+        try:
+            with METRICS.time('parse'):
+                with open(path, 'rb') as fh:
+                    network = MappedNetwork.build(iter_wkt_batches(iter_wkt_chunks(path, fh)), scratch)
+        except READ_ERRORS as exc:
+            print(f"{path}: {exc}", file=sys.stderr)
+            return 1
+        if not len(network):
+            print(f"{path}: no valid LINESTRING geometries", file=sys.stderr)
+            return 1
+        analyzer = OutOfCoreAnalyzer(network, APP_CONFIG['precision'], args.memory_budget)
+        result = analyzer.analyze()
+        high = sum(1 for i in result['issues'] if i.get('severity') == 'HIGH')
+        print(f"{path}: {len(network)} segments, {len(result['issues'])} issues ({high} high) [out-of-core]")
+        if args.report_dir:
+            os.makedirs(args.report_dir, exist_ok=True)
+            ext, writer = REPORT_WRITERS[args.report_format]
+            out = os.path.join(args.report_dir, os.path.basename(path) + '.report' + ext)
+            with open(out, 'w', encoding='utf-8', newline='') as fh:
+                write_report(fh, writer(result))
+        if args.export_dir:
+            pa = _require_pyarrow()
+            out_dir = os.path.join(args.export_dir, os.path.basename(path))
+            os.makedirs(out_dir, exist_ok=True)
+            features = (pa.RecordBatch.from_pandas(f, preserve_index=False) for f in analyzer.iter_features())
+            for name, (batches, meta) in {'features': (features, None),
+                                          'issues': (iter_issue_batches(result['issues']),
+                                                     _geo_metadata('geometry', ['Point']))}.items():
+                with open(os.path.join(out_dir, name + COLUMNAR_FORMATS[args.export_format]), 'wb') as fh:
+                    write_columnar(fh, batches, args.export_format, meta)
+        if args.fix_and_verify:
+            print("  --fix-and-verify needs the in-memory pipeline; skipped", file=sys.stderr)
+    return 0
+
+
+# Dependencies that ``import app`` must leave to first use
+LAZY_IMPORTS = ('streamlit', 'pandas', 'sklearn', 'folium', 'streamlit_folium', 'scipy', 'pyarrow')
+
+
+def _bench_import(args) -> int:
+    """Time a cold ``import app`` in fresh interpreters against the budget."""
+    probe = ("import sys, time; t = time.perf_counter(); import app; "
+             "print(time.perf_counter() - t); print(' '.join(m for m in %r if m in sys.modules))" % (LAZY_IMPORTS,))
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    timings, eager = [], set()
+    for _ in range(args.repeat):
+        out = subprocess.run([sys.executable, '-c', probe], cwd=cwd, capture_output=True, text=True, check=True)
+        seconds, loaded = (out.stdout.splitlines() + [''])[:2]
+        timings.append(float(seconds) * 1000)
+        eager.update(loaded.split())
+    # One extra run under -X importtime for the slowest modules app imports directly
+    trace = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'], cwd=cwd,
+                           capture_output=True, text=True, check=True).stderr
+    top = []
+    for row in trace.splitlines():
+        parts = row.split('|')
+        if len(parts) == 3 and re.match(r'^   \S', parts[2]) and parts[1].strip().isdigit():
+            top.append((int(parts[1]), parts[2].strip()))
+    median = float(np.median(timings))
+    print(f"import app: median {median:.0f} ms, min {min(timings):.0f} ms over {args.repeat} run(s) "
+          f"(budget {args.budget_ms} ms)")
+    for us, name in sorted(top, reverse=True)[:args.top]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+    if eager:
+        print(f"  loaded eagerly: {', '.join(sorted(eager))}", file=sys.stderr)
+    return int(median > args.budget_ms or bool(eager))
+
+
+def cli(argv: Optional[List[str]] = None) -> int:
+    """Batch entry point: ``python app.py check roads.wkt --metrics-file gaps.prom``."""
+    parser = argparse.ArgumentParser(prog='app.py', description=APP_CONFIG['title'])
+    sub = parser.add_subparsers(dest='command', required=True)
+    check = sub.add_parser('check', help='Validate WKT files without the UI')
+    check.add_argument('inputs', nargs='+', help='WKT (optionally .gz/.bz2/.xz/.zip), WKB, GeoPackage, GeoParquet or FlatGeobuf files')
+    check.add_argument('--contamination', type=float, default=0.15, help='Isolation Forest contamination')
+    check.add_argument('--no-cluster-snap', action='store_true',
+                       help='Snap each endpoint to its nearest line instead of shared cluster nodes')
+    check.add_argument('--drop-duplicates', action='store_true',
+                       help='Leave duplicate segment copies out of gap detection (still reported)')
+    check.add_argument('--detectors', type=lambda v: v.split(','), metavar='NAME[,NAME…]',
+                       help=f"Checks to run (default: all of {', '.join(DETECTORS)})")
+    check.add_argument('--report-dir', help='Write a report per input here')
+    check.add_argument('--report-format', choices=sorted(REPORT_WRITERS), default='json',
+                       help='Report format for --report-dir')
+    check.add_argument('--export-dir', help='Write features/issues/corrected network tables under <dir>/<input>/')
+    check.add_argument('--export-format', choices=sorted(COLUMNAR_FORMATS), default='parquet',
+                       help='Columnar format for --export-dir')
+    check.add_argument('--fix-and-verify', type=int, metavar='MAX_ITER',
+                       help='Apply snaps and verify until converged; writes <input>.verified.wkt to --report-dir')
+    check.add_argument('--out-of-core', action='store_true',
+                       help='Force the memory-mapped mode (automatic above --ooc-threshold MB of WKT)')
+    check.add_argument('--ooc-threshold', type=float, metavar='MB',
+                       default=float(os.environ.get(APP_CONFIG['ooc_threshold_env'], APP_CONFIG['ooc_threshold_mb'])),
+                       help='Input size that switches WKT files to out-of-core mode')
+    check.add_argument('--memory-budget', type=int, metavar='MB', default=APP_CONFIG['ooc_memory_mb'],
+                       help='Working-memory budget per out-of-core pass')
+    check.add_argument('--work-dir', help='Scratch directory for out-of-core arrays (default: system temp)')
+    check.add_argument('--metrics-file', help='Write OpenMetrics text here after the run')
+    check.add_argument('--metrics-port', type=int, help='Serve /metrics on this port while running')
+    serve = sub.add_parser('serve', help='Run the HTTP validation service')
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8765)
+    serve.add_argument('--data-root', help='Directory that ?path= file references may read from')
+    serve.add_argument('--max-body-mb', type=float, default=256, help='Largest accepted request body')
+    serve.add_argument('--analysis-timeout', type=float, default=600,
+                       help='Seconds before a running analysis is cancelled (504)')
+    serve.add_argument('--workers', type=int, default=APP_CONFIG['job_workers'], help='Concurrent analyses')
+    serve.add_argument('--max-pending', type=int, default=APP_CONFIG['job_max_pending'],
+                       help='Analyses queued or running before requests get 503')
+    serve.add_argument('--metrics-port', type=int, help='Serve /metrics on this port too')
+    bench = sub.add_parser('bench-import', help='Check cold import time against a budget')
+    bench.add_argument('--budget-ms', type=float, default=APP_CONFIG['import_budget_ms'])
+    bench.add_argument('--repeat', type=int, default=5)
+    bench.add_argument('--top', type=int, default=8, help='Slowest top-level imports to list')
+    args = parser.parse_args(argv)
+    if args.command == 'serve':
+        return _serve(args)
+    if args.command == 'bench-import':
+        return _bench_import(args)
+    unknown = set(args.detectors or ()) - set(DETECTORS)
+    if unknown:
+        parser.error(f"unknown detector(s): {', '.join(sorted(unknown))}")
+
+    if args.metrics_file or args.metrics_port:
+        METRICS.enabled = True
+    if args.metrics_port:
+        METRICS.serve(args.metrics_port)
+
+    status = 0
+    for path in args.inputs:
+        if is_wkt_source(path) and (args.out_of_core or os.path.getsize(path) > args.ooc_threshold * (1 << 20)):
+            status |= _check_out_of_core(path, args)
+            continue
+        try:
+            with METRICS.time('parse'):
+                with open(path, 'rb') as fh:
+                    lines = read_geometry_source(path, fh)
+        except READ_ERRORS as exc:
+            print(f"{path}: {exc}", file=sys.stderr)
+            status = 1
+            continue
+        if not lines:
+            print(f"{path}: no valid LINESTRING geometries", file=sys.stderr)
+            status = 1
+            continue
+        result = run_pipeline(lines, args.contamination, cluster_snap=not args.no_cluster_snap,
+                              detectors=args.detectors, drop_duplicates=args.drop_duplicates)
+        high = sum(1 for i in result['issues'] if i.get('severity') == 'HIGH')
+        subnetworks = result['stats'].get('subnetworks')
+        print(f"{path}: {len(lines)} segments, {len(result['issues'])} issues ({high} high)"
+              + (f", {subnetworks} subnetwork(s)" if subnetworks is not None else ""))
+        if args.report_dir:
+            os.makedirs(args.report_dir, exist_ok=True)
+            ext, writer = REPORT_WRITERS[args.report_format]
+            out = os.path.join(args.report_dir, os.path.basename(path) + '.report' + ext)
+            with open(out, 'w', encoding='utf-8', newline='') as fh:
+                write_report(fh, writer(result))
+        if args.fix_and_verify:
+            verified = AutoFixer(lines, APP_CONFIG['precision']).apply_and_verify(
+                result['issues'], result['gap_threshold'], args.fix_and_verify, fixes=result['fixes'])
+            for t in verified['trace']:
+                print(f"  round {t['iteration']}: {t['fixes_applied']} fixes, {t['conflicting_snaps']} conflicts, "
+                      f"{t['new_dangles']} new dangles, {t['remaining_gaps']} gaps left")
+            print(f"  {'converged' if verified['converged'] else 'not converged'}")
+            if args.report_dir:
+                out = os.path.join(args.report_dir, os.path.basename(path) + '.verified.wkt')
+                with open(out, 'wb') as fh:
+                    write_network(fh, verified['lines'], 'wkt')
+        if args.export_dir:
+            export_columnar(os.path.join(args.export_dir, os.path.basename(path)), result['features'],
+                            result['issues'], corrected_network(lines, result['fixes'], result['network_key']),
+                            args.export_format)
+
+    if args.metrics_file:
+        METRICS.write(args.metrics_file)
+    return status
+
+
 if __name__ == "__main__":
-    main()
+    # Under `streamlit run` Streamlit is already loaded; headless runs never import it
+    if 'streamlit' in sys.modules and importlib.import_module('streamlit.runtime').exists():
+        main()
+    else:
+        sys.exit(cli())
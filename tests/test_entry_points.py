@@ -0,0 +1,82 @@
+import gzip
+import http.client
+import json
+
+import pytest
+
+import app
+
+GOOD_WKT = b"LINESTRING (0 0, 1 0)\nLINESTRING (1.05 0, 2 0)\nLINESTRING (5 5, 6 6)\n"
+
+MALFORMED = {
+    'roads.gpkg': b'not a geopackage',
+    'roads.zip': b'PK\x03\x04 truncated archive',
+    'roads.wkt.gz': gzip.compress(GOOD_WKT)[:20],
+    'roads.wkt.xz': b'\xfd7zXZ\x00 broken',
+    'roads.gpkg.gz': gzip.compress(b'x'),
+}
+
+
+@pytest.fixture(scope='module')
+def service():
+    svc = app.ValidationService(port=0)
+    server = svc.start()
+    yield server.server_address[:2]
+    svc.stop()
+
+
+def _post(address, query, body):
+    conn = http.client.HTTPConnection(*address, timeout=60)
+    conn.request('POST', '/validate' + query, body=body, headers={'Content-Type': 'text/plain'})
+    response = conn.getresponse()
+    return response.status, json.loads(response.read())
+
+
+@pytest.mark.parametrize('name', sorted(MALFORMED))
+def test_service_rejects_malformed_input_with_400(service, name):
+    status, payload = _post(service, f'?name={name}', MALFORMED[name])
+    assert status == 400
+    assert payload['error'].startswith(f'could not read {name}')
+
+
+def test_service_rejects_malformed_flatgeobuf_with_400(service):
+    pytest.importorskip('pyogrio')
+    status, _ = _post(service, '?name=roads.fgb', b'not a flatgeobuf')
+    assert status == 400
+
+
+@pytest.mark.parametrize('body', [b'hello world', b'LINESTRING (0 0)', b'POINT (1 2)'])
+def test_service_answers_422_without_linestrings(service, body):
+    assert _post(service, '', body)[0] == 422
+
+
+@pytest.mark.parametrize('query', ['?contamination=nan', '?contamination=0.9', '?contamination=-1',
+                                   '?contamination=abc', '?detectors=endpoint_gap,nope'])
+def test_service_rejects_bad_parameters_with_400(service, query):
+    assert _post(service, query, GOOD_WKT)[0] == 400
+
+
+def test_service_keeps_serving_after_bad_requests(service):
+    for name, body in MALFORMED.items():
+        _post(service, f'?name={name}', body)
+    status, report = _post(service, '', GOOD_WKT)
+    assert status == 200
+    assert report['issues']
+
+
+def test_cli_reports_each_malformed_input_and_checks_the_rest(tmp_path, capsys):
+    paths = []
+    for name, data in MALFORMED.items():
+        path = tmp_path / name
+        path.write_bytes(data)
+        paths.append(str(path))
+    good = tmp_path / 'good.wkt'
+    good.write_bytes(GOOD_WKT)
+    empty = tmp_path / 'empty.wkt'
+    empty.write_bytes(b'nothing to see')
+
+    assert app.cli(['check', *paths, str(empty), str(good)]) == 1
+    out, err = capsys.readouterr()
+    for path in paths + [str(empty)]:
+        assert path in err
+    assert f'{good}: 3 segments' in out
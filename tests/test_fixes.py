@@ -0,0 +1,84 @@
+import shapely
+
+import app
+
+
+def _fix(fix_type, gid, endpoint, coord):
+    return {'geometry_id': gid, 'endpoint': endpoint, 'fix_type': fix_type, 'suggested_coord': coord}
+
+
+def test_snap_and_trim_to_the_same_point_are_cached_apart():
+    # Trimming the end of line 1 to (2, 0) drops the tail vertices; snapping moves only the last one
+    lines = [shapely.LineString([(0, 0), (2, 0), (3, 0), (3, 1)]), shapely.LineString([(2, -1), (2, 1)])]
+    snap = [_fix('SNAP_ENDPOINT', 1, 'end', (2.0, 0.0))]
+    trim = [_fix('TRIM_ENDPOINT', 1, 'end', (2.0, 0.0))]
+    assert app.fixes_fingerprint(snap) != app.fixes_fingerprint(trim)
+    app.CORRECTED_CACHE.clear()
+    snapped = app.corrected_network(lines, snap)
+    trimmed = app.corrected_network(lines, trim)
+    assert snapped[0].equals(shapely.LineString([(0, 0), (2, 0), (3, 0), (2, 0)]))
+    assert trimmed[0].equals(shapely.LineString([(0, 0), (2, 0)]))
+
+
+def test_fixing_2d_and_3d_lines_together_keeps_each_dimension():
+    lines = [shapely.LineString([(0, 0), (1, 0)]), shapely.LineString([(0, 1, 5), (1, 1, 6)])]
+    fixed = app.apply_fixes(lines, [_fix('SNAP_ENDPOINT', 1, 'end', (2.0, 0.0)),
+                                    _fix('SNAP_ENDPOINT', 2, 'end', (2.0, 1.0))])
+    assert fixed[0].wkt == 'LINESTRING (0 0, 2 0)'
+    assert fixed[1].wkt == 'LINESTRING Z (0 1 5, 2 1 6)'
+
+
+def _rebuild_sequentially(lines, fixes):
+    """Reference: one fix at a time, each line rebuilt from its coordinates."""
+    import numpy as np
+    out = list(lines)
+    for f in fixes:
+        gid, at_end = f['geometry_id'] - 1, f['endpoint'] == 'end'
+        line = out[gid]
+        coords = shapely.get_coordinates(line, include_z=line.has_z)
+        if f['fix_type'] == 'TRIM_ENDPOINT':
+            cut = line.project(shapely.Point(f['suggested_coord']))
+            d = np.diff(coords[:, :2], axis=0)
+            along = np.concatenate(([0.0], np.cumsum(np.sqrt(d[:, 0] * d[:, 0] + d[:, 1] * d[:, 1]))))
+            keep = along < cut if at_end else along > cut
+            keep[0] = keep[-1] = True
+            coords = coords[keep]
+        coords[-1 if at_end else 0, :2] = f['suggested_coord']
+        out[gid] = shapely.LineString(coords)
+    return out
+
+
+def test_apply_fixes_matches_sequential_rebuilds():
+    import numpy as np
+    rng = np.random.default_rng(0)
+    lines = []
+    for i in range(40):
+        xy = np.cumsum(rng.normal(0, 1, (int(rng.integers(2, 9)), 2)), axis=0) + rng.uniform(0, 50, 2)
+        lines.append(shapely.LineString(np.column_stack([xy, rng.uniform(0, 5, len(xy))]) if i % 3 == 0 else xy))
+    fixes = []
+    for gid in rng.choice(len(lines), 30, replace=False).tolist():
+        line = lines[gid]
+        if rng.random() < 0.5:
+            # Trim one or both ends back to points on the line, sometimes snapped afterwards
+            for endpoint, lo, hi in (('start', 0.05, 0.45), ('end', 0.55, 0.95)):
+                if rng.random() < 0.7:
+                    cut = line.interpolate(rng.uniform(lo, hi), normalized=True)
+                    fixes.append(_fix('TRIM_ENDPOINT', gid + 1, endpoint, (cut.x, cut.y)))
+                    if rng.random() < 0.2:
+                        fixes.append(_fix('SNAP_ENDPOINT', gid + 1, endpoint, (cut.x + 0.1, cut.y)))
+        else:
+            for _ in range(int(rng.integers(1, 3))):  # a repeated endpoint: the last snap wins
+                endpoint = 'start' if rng.random() < 0.5 else 'end'
+                x, y = line.coords[0 if endpoint == 'start' else -1][:2]
+                fixes.append(_fix('SNAP_ENDPOINT', gid + 1, endpoint, (x + rng.normal(), y + rng.normal())))
+    fixes.append(_fix('SNAP_ENDPOINT', len(lines) + 5, 'end', (0.0, 0.0)))  # unknown segment: ignored
+
+    expected = _rebuild_sequentially(lines, fixes[:-1])
+    fixed = app.apply_fixes(lines, fixes)
+    assert len(fixed) == len(lines)
+    for got, want in zip(fixed, expected):
+        assert got.has_z == want.has_z
+        assert np.array_equal(shapely.get_coordinates(got, include_z=got.has_z),
+                              shapely.get_coordinates(want, include_z=want.has_z))
+    untouched = set(range(len(lines))) - {f['geometry_id'] - 1 for f in fixes}
+    assert all(fixed[i] is lines[i] for i in untouched)
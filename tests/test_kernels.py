@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+import shapely
+
+import app
+
+
+def _random_lines(rng, n=60, max_vertices=8, scale=10.0):
+    lines = []
+    for _ in range(n):
+        k = int(rng.integers(2, max_vertices + 1))
+        xy = rng.uniform(0, scale, 2) + np.cumsum(rng.normal(0, 1, (k, 2)), axis=0)
+        if rng.random() < 0.2:
+            xy[1] = xy[0]  # zero-length segment
+        if rng.random() < 0.1 and k > 3:
+            xy[-1] = xy[0]  # closed line
+        lines.append(shapely.LineString(xy))
+    return np.asarray(lines, dtype=object)
+
+
+def test_segment_distances_and_foot_points_match_shapely():
+    rng = np.random.default_rng(0)
+    lines = _random_lines(rng)
+    xy = rng.uniform(-2, 12, (80, 2))
+    pt_idx, line_idx = (g.ravel() for g in np.meshgrid(np.arange(len(xy)), np.arange(len(lines)), indexing='ij'))
+    segments = app.SegmentArrays(lines)
+
+    dist, seg, factor = segments.nearest(xy, pt_idx, line_idx, batch=1000)
+    points = shapely.points(xy[pt_idx])
+    assert np.array_equal(dist, shapely.distance(points, lines[line_idx]))
+
+    foot = segments.foot_points(line_idx, seg, factor)
+    located = shapely.line_interpolate_point(lines[line_idx], shapely.line_locate_point(lines[line_idx], points))
+    assert np.array_equal(foot, shapely.get_coordinates(located))
+
+
+def test_segment_measures_match_shapely_lengths():
+    lines = _random_lines(np.random.default_rng(1))
+    segments = app.SegmentArrays(lines)
+    last = segments.first + segments.count - 1
+    assert np.array_equal(segments.measure[last] + segments.length[last], shapely.length(lines))
+
+
+def test_nearest_other_line_matches_brute_force():
+    rng = np.random.default_rng(2)
+    lines = _random_lines(rng, n=40)
+    owner = rng.integers(0, len(lines), 50)
+    xy = shapely.get_coordinates(shapely.line_interpolate_point(lines[owner], rng.random(50), normalized=True))
+    segments = app.SegmentArrays(lines)
+
+    dist, line, _, _ = app.nearest_other_line(segments, app.strtree_candidates(shapely.STRtree(lines)),
+                                              xy, owner, radius=0.5)
+    all_dist = shapely.distance(shapely.points(xy)[:, None], lines[None, :])
+    all_dist[np.arange(len(xy)), owner] = np.inf
+    assert np.array_equal(dist, all_dist.min(axis=1))
+    assert np.array_equal(line, all_dist.argmin(axis=1))  # ties to the lowest line index
+
+
+def test_union_find_matches_connected_components():
+    scipy_sparse = pytest.importorskip('scipy.sparse')
+    from scipy.sparse.csgraph import connected_components
+    rng = np.random.default_rng(3)
+    n = 500
+    a, b = rng.integers(0, n, 400), rng.integers(0, n, 400)
+    roots = app.union_find(n, a, b)
+    graph = scipy_sparse.coo_matrix((np.ones(len(a)), (a, b)), shape=(n, n))
+    n_comp, labels = connected_components(graph, directed=False)
+    assert len(np.unique(roots)) == n_comp
+    # Same partition: each root maps to exactly one label and back
+    pairs = np.unique(np.stack([roots, labels], axis=1), axis=0)
+    assert len(pairs) == n_comp
+    assert np.all(roots <= np.arange(n))  # roots are the smallest member
+
+
+def test_topology_components_match_union_find_over_edges():
+    wkt = "\n".join(["LINESTRING (0 0, 1 0)", "LINESTRING (1 0, 2 0)", "LINESTRING (2 0, 2 1)",
+                     "LINESTRING (5 5, 6 5)", "LINESTRING (5.5 5, 5.5 6)",  # T-junction on the segment interior
+                     "LINESTRING (9 9, 9 10)"])
+    graph = app.TopologyGraph(app.parse_wkt(wkt))
+    n_comp, _ = graph.components()
+    assert n_comp == 3
+    assert len(np.unique(graph.edge_components())) == 3
+    assert graph.edge_components()[3] == graph.edge_components()[4]
+
+
+@pytest.mark.parametrize('n', [1, 2, 7, 100, 255])
+def test_quantile_sketch_exact_mode_matches_percentile(n):
+    values = np.random.default_rng(n).lognormal(size=n)
+    sketch = app.QuantileSketch(k=256).update(values[: n // 2]).merge(app.QuantileSketch(k=256).update(values[n // 2:]))
+    assert sketch.exact
+    for q in (0.0, 0.1, 0.25, 0.5, 0.9, 0.99, 1.0):
+        assert sketch.quantile(q) == np.percentile(values, q * 100)
+
+
+def test_quantile_sketch_rank_error_is_bounded():
+    values = np.random.default_rng(4).normal(size=200_000)
+    sketch = app.QuantileSketch(k=256)
+    for chunk in np.array_split(values, 50):
+        sketch.update(chunk)
+    assert not sketch.exact
+    ranked = np.sort(values)
+    for q in (0.05, 0.5, 0.95):
+        rank = np.searchsorted(ranked, sketch.quantile(q)) / len(values)
+        assert abs(rank - q) < 0.02
@@ -0,0 +1,13 @@
+import app
+
+
+def _demo():
+    return app.parse_wkt(app.demo_wkt())
+
+
+def test_stats_build_the_component_graph_only_for_the_subnetwork_check():
+    lines = _demo()
+    plan = app.PipelineContext(lines, {'detectors': ['endpoint_gap']}).plan(['issues', 'fixes', 'stats'])
+    assert 'topology' not in plan
+    assert 'subnetworks' not in app.run_pipeline(lines, detectors=['endpoint_gap'])['stats']
+    assert app.run_pipeline(lines, detectors=['endpoint_gap', 'isolated_subnetwork'])['stats']['subnetworks'] > 1
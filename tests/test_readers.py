@@ -0,0 +1,72 @@
+import io
+import sqlite3
+import struct
+import types
+
+import pytest
+import shapely
+
+import app
+
+LINES = [shapely.LineString([(0, 0), (1, 0)]), shapely.LineString([(1.05, 0), (2, 0), (2, 1)])]
+
+
+def _geopackage_bytes(tmp_path):
+    path = tmp_path / 'roads.gpkg'
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE gpkg_geometry_columns (table_name TEXT, column_name TEXT)")
+    conn.execute("INSERT INTO gpkg_geometry_columns VALUES ('roads', 'geom')")
+    conn.execute("CREATE TABLE roads (fid INTEGER PRIMARY KEY, geom BLOB)")
+    header = b'GP' + bytes([0, 0b1]) + struct.pack('<i', 4326)  # no envelope, little-endian
+    conn.executemany("INSERT INTO roads (geom) VALUES (?)",
+                     [(header + shapely.to_wkb(line),) for line in LINES])
+    conn.commit()
+    conn.close()
+    return path.read_bytes()
+
+
+def test_read_geopackage(tmp_path):
+    geoms = app.read_geopackage(io.BytesIO(_geopackage_bytes(tmp_path)))
+    assert list(shapely.equals(geoms, LINES)) == [True, True]
+
+
+def test_read_geopackage_without_deserialize(tmp_path, monkeypatch):
+    # Python < 3.11 has no Connection.deserialize: the reader goes through a temporary file
+    data = _geopackage_bytes(tmp_path)
+    shim = types.SimpleNamespace(Connection=type('Connection', (), {}), connect=sqlite3.connect,
+                                 Error=sqlite3.Error)
+    monkeypatch.setattr(app, 'sqlite3', shim)
+    geoms = app.read_geopackage(io.BytesIO(data))
+    assert list(shapely.equals(geoms, LINES)) == [True, True]
+
+
+def test_malformed_flatgeobuf_is_a_read_error():
+    pytest.importorskip('pyogrio')
+    with pytest.raises(ValueError, match='FlatGeobuf'):
+        app.read_geometry_source('bad.fgb', io.BytesIO(b'not a flatgeobuf'))
+
+
+def _zip(path, members):
+    import zipfile
+    with zipfile.ZipFile(path, 'w') as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return str(path)
+
+
+def test_is_wkt_source_looks_inside_zips(tmp_path):
+    wkt = '\n'.join(line.wkt for line in LINES)
+    wkb = b''.join(shapely.to_wkb(line) for line in LINES)
+    assert app.is_wkt_source(_zip(tmp_path / 'a.zip', {'a.wkt': wkt, 'b.txt': wkt}))
+    assert not app.is_wkt_source(_zip(tmp_path / 'b.zip', {'a.wkb': wkb}))
+    assert not app.is_wkt_source(_zip(tmp_path / 'c.zip', {'a.wkt': wkt, 'b.wkb': wkb}))
+    assert not app.is_wkt_source(_zip(tmp_path / 'd.wkb.zip', {'raw': wkb}))
+    assert app.is_wkt_source(str(tmp_path / 'e.wkt.gz'))
+    assert not app.is_wkt_source(str(tmp_path / 'f.gpkg'))
+
+
+def test_out_of_core_check_reads_binary_zip_in_memory(tmp_path, capsys):
+    path = _zip(tmp_path / 'roads.zip', {'roads.wkb': '\n'.join(shapely.to_wkb(LINES, hex=True))})
+    assert app.cli(['check', '--out-of-core', '--detectors', 'endpoint_gap', path]) == 0
+    out = capsys.readouterr().out
+    assert '2 segments' in out and '[out-of-core]' not in out
@@ -0,0 +1,102 @@
+import numpy as np
+import shapely
+
+import app
+
+
+def _wave(n, phase=0.0, offset=0.0):
+    x = np.linspace(0, 100, n)
+    return shapely.LineString(np.column_stack([x + offset, np.sin(x + phase)]))
+
+
+def test_any_segment_pair_slices_a_single_long_pair():
+    lines = np.asarray([_wave(400), _wave(400, phase=1.0)], dtype=object)
+    segments = app.SegmentArrays(lines)
+    sizes = []
+
+    def test(sa, sb, la, lb):
+        sizes.append(len(sa))
+        return np.zeros(len(sa), dtype=bool)
+
+    app.any_segment_pair(np.array([0]), np.array([1]), segments, test, batch=1000, max_product=1 << 30)
+    assert max(sizes) <= 1000
+    assert sum(sizes) == 399 * 399
+
+
+def test_find_duplicates_two_long_crossing_lines():
+    lines = [_wave(3000), _wave(3000, phase=1.0)]
+    duplicates = app.find_duplicates(lines)
+    assert list(duplicates.twin) == [0, 1]
+    assert len(duplicates.overlap_pairs) == 0
+
+
+def test_find_duplicates_long_partial_overlap():
+    x = np.linspace(0, 100, 3000)
+    lines = [shapely.LineString(np.column_stack([x, np.full_like(x, 5.0)])),
+             shapely.LineString(np.column_stack([x + 50, np.full_like(x, 5.0)])),
+             _wave(3000)]
+    duplicates = app.find_duplicates(lines)
+    assert duplicates.overlap_pairs.tolist() == [[0, 1]]
+    assert np.isclose(duplicates.overlap_length[0], 50.0)
+
+
+def _crossing_pairs(lines):
+    geoms = np.asarray(lines, dtype=object)
+    a, b = shapely.STRtree(geoms).query(geoms, predicate='crosses')
+    keep = a < b
+    return sorted(zip(a[keep].tolist(), b[keep].tolist()))
+
+
+def test_find_crossings_two_long_crossing_lines():
+    lines = [_wave(3000), _wave(3000, phase=1.0)]
+    crossings = app.find_crossings(lines)
+    assert crossings.pairs.tolist() == [[0, 1]]
+    expected = shapely.get_coordinates(shapely.intersection(lines[0], lines[1]))
+    assert len(crossings.points) == len(expected)
+
+
+def test_envelope_screen_matches_full_expansion():
+    rng = np.random.default_rng(7)
+    lines = list(shapely.linestrings(rng.integers(0, 20, size=(120, 6, 2)).astype(float)))
+    lines += [_wave(500, phase=p, offset=-40) for p in (0.0, 0.5, 2.0)]
+    geoms = np.asarray(lines, dtype=object)
+    a, b = shapely.STRtree(geoms).query(geoms)
+    a, b = a[a < b], b[a < b]
+    segments = app.SegmentArrays(geoms)
+
+    def touching(sa, sb, la, lb):
+        return shapely.intersects(shapely.linestrings(np.stack([segments.p0[sa], segments.p1[sa]], axis=1)),
+                                  shapely.linestrings(np.stack([segments.p0[sb], segments.p1[sb]], axis=1)))
+
+    full = app.any_segment_pair(a, b, segments, touching, max_product=1 << 30)
+    screened = app.any_segment_pair(a, b, segments, touching, max_product=16)
+    assert np.array_equal(full, screened)
+    assert np.array_equal(full, shapely.intersects(geoms[a], geoms[b]))
+    assert sorted(map(tuple, app.find_crossings(lines).pairs.tolist())) == _crossing_pairs(lines)
+
+
+def _overshoot_network():
+    # Line 9 crosses x=2 and runs 0.2 past x=4, where it should end
+    wkt = "\n".join([f"LINESTRING ({x} 0, {x} 10)" for x in range(0, 11, 2)]
+                    + ["LINESTRING (0 0, 10 0)", "LINESTRING (0 10, 10 10)", "LINESTRING (0 5, 4.2 5)"])
+    return app.parse_wkt(wkt)
+
+
+def _reported(result, error_type):
+    return [i for i in result['issues'] if i['error_type'] == error_type]
+
+
+def test_overshoot_takes_its_crossing_from_the_crossing_check():
+    result = app.run_pipeline(_overshoot_network(), detectors=['unnoded_crossing', 'overshoot'])
+    [overshoot] = _reported(result, 'OVERSHOOT')
+    [crossing] = _reported(result, 'UNNODED_CROSSING')
+    assert overshoot['geometry_id'] == crossing['geometry_id'] == 9
+    assert crossing['crossings'] == 1
+    assert crossing['location'] == (2.0, 5.0)
+
+
+def test_crossing_check_alone_reports_the_overshot_crossing():
+    result = app.run_pipeline(_overshoot_network(), detectors=['unnoded_crossing'])
+    [crossing] = _reported(result, 'UNNODED_CROSSING')
+    assert crossing['crossings'] == 2
+    assert not _reported(result, 'OVERSHOOT')